@@ -0,0 +1,42 @@
+"""
+Background asset loading
+
+The window opens with only what the first screen (the countdown) draws. Everything else
+(audio, the sprite atlas) is handed to an `AssetLoader`, which loads it on its own thread
+in the order asked for while the countdown plays, and the game collects it when it first
+needs it, only waiting if it is not done yet.
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+
+class AssetLoader:
+	def __init__(self) -> None:
+		self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AssetLoader")
+		self.futures :dict[Hashable, Future] = {}
+		# name -> seconds it took to load, for the startup report
+		self.loadTimes :dict[Hashable, float] = {}
+
+	def load(self, name :Hashable, loader :Callable[[], object]):
+		"Queues {loader} to run on the loader thread, its result becomes the asset {name}. Asking again replaces it"
+		def timed():
+			start = time.perf_counter()
+			asset = loader()
+			self.loadTimes[name] = time.perf_counter()-start
+			return asset
+		self.futures[name] = self.executor.submit(timed)
+
+	def get(self, name :Hashable, default=None):
+		"The asset if it finished loading, {default} while it is still loading. A failed load raises its error here"
+		future = self.futures.get(name)
+		if future is None or not future.done():
+			return default
+		return future.result()
+
+	def wait(self, name :Hashable):
+		"The asset, waiting for it to finish loading"
+		return self.futures[name].result()
+
+	def pending(self) -> int:
+		return sum(not future.done() for future in self.futures.values())
@@ -0,0 +1,80 @@
+"""
+Disk writes off the main loop
+
+`BackgroundWriter` runs writes on one daemon thread, in the order they were submitted,
+from a bounded queue, and hands their completion callbacks back to whichever thread
+calls `poll` (the game loop), so callbacks can touch the display without locking.
+A write that fails is reported there on stderr, the game keeps running without it.
+`atomicWrite` replaces a file so a crash leaves either the old or the new contents.
+"""
+import os, queue, sys, threading, traceback
+from typing import Callable
+
+
+def atomicWrite(path :str, data :bytes):
+	"Writes {data} to a temporary file next to {path}, flushes it to disk and renames it over {path}"
+	os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+	temporaryPath = f"{path}.{os.getpid()}.tmp"
+	with open(temporaryPath, 'wb') as f:
+		f.write(data)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(temporaryPath, path)
+
+
+class BackgroundWriter:
+	def __init__(self, maxPending :int = 16, raiseErrors :bool = False):
+		"""
+		Submitting blocks once {maxPending} writes are waiting, so a stalled disk cannot queue up unbounded memory.
+		With {raiseErrors} `poll` raises the error of a failed write instead of reporting it, for tests	"""
+		self.raiseErrors = raiseErrors
+		# writes that failed so far, and the error of the last one
+		self.failures = 0
+		self.lastError :Exception | None = None
+		self.jobs :queue.Queue = queue.Queue(maxPending)
+		self.finished :queue.SimpleQueue = queue.SimpleQueue()
+		self.thread = threading.Thread(target=self.run, name="BackgroundWriter", daemon=True)
+		self.thread.start()
+
+	def submit(self, write :Callable[[], None], onDone :Callable[[], None] | None = None):
+		"Queues {write}, {onDone} runs from the next `poll` after it finished"
+		self.jobs.put((write, onDone))
+
+	def run(self):
+		while True:
+			write, onDone = self.jobs.get()
+			if write is None:
+				break
+			try:
+				write()
+				self.finished.put((onDone, None))
+			except Exception as e:
+				self.finished.put((onDone, e))
+
+	def poll(self):
+		"Runs the callbacks of every write finished since the last call, and reports those that failed"
+		while True:
+			try:
+				onDone, error = self.finished.get_nowait()
+			except queue.Empty:
+				return
+			if error is not None:
+				if self.raiseErrors:
+					raise error
+				# the write is lost, its callback does not run, the game goes on
+				self.failures += 1
+				self.lastError = error
+				print("background write failed:", file=sys.stderr)
+				traceback.print_exception(error, file=sys.stderr)
+				continue
+			if onDone is not None:
+				onDone()
+
+	def pending(self) -> int:
+		return self.jobs.qsize()
+
+	def close(self):
+		"Waits for every queued write to land, then stops the thread and runs the remaining callbacks"
+		self.jobs.put((None, None))
+		self.thread.join()
+		self.poll()
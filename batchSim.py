@@ -0,0 +1,217 @@
+import random
+import numpy as np
+from game import Game, Inputs
+
+
+#
+# Batched rules engine: N independent games stepped together with NumPy
+#
+# Boards are held as padded bitmask rows like in `moveGen`: row y of board n is
+# `rows[n, y+padding]`, with column x at bit (x+padding), wall bits on both sides
+# and `padding` solid rows above and below. Pieces are referred to by their index
+# in `metaIds` instead of their metaId so they can index the tables below.
+#
+# Everything follows the scalar `Game` rule for rule, and piece generation draws
+# from one `random.Random(seed)` per board in the same order `Game` draws from its
+# own RNG, so a board seeded with s plays out exactly like `Game(..., seed=s)`
+# receiving the same inputs.
+#
+
+
+padding = 4
+paddedWidth = 10+2*padding
+wallMask = ((1 << padding)-1) | (((1 << padding)-1) << (10+padding))
+solidRow = (1 << paddedWidth)-1
+noInput = -1
+
+metaIds = list(Game.metaIdToActiveBits.keys())
+metaIndex = {metaID: i for i, metaID in enumerate(metaIds)}
+typeIndex = {pieceType: i for i, pieceType in enumerate(Game.typeList)}
+
+# per piece index: 4 local row masks, the (x, y) of its 4 minos, its type and the index of its rotations
+pieceRowMasks = np.zeros((len(metaIds), 4), dtype=np.uint32)
+pieceCells = np.zeros((len(metaIds), 4, 2), dtype=np.int32)
+pieceType = np.zeros(len(metaIds), dtype=np.int8)
+# [piece, 0 for clockwise / 1 for counter-clockwise] -> rotated piece, and its 5 kicks as anchor offsets
+rotatedPiece = np.zeros((len(metaIds), 2), dtype=np.int32)
+rotationKicks = np.zeros((len(metaIds), 2, 5, 2), dtype=np.int32)
+for i, metaID in enumerate(metaIds):
+	for j, bit in enumerate(Game.metaIdToActiveBits[metaID]):
+		pieceRowMasks[i, (15-bit)//4] |= 1 << ((15-bit)%4)
+		pieceCells[i, j] = ((15-bit)%4, (15-bit)//4)
+	typeName, rot = Game.metaIdToTypeAndRot[metaID]
+	pieceType[i] = typeIndex[typeName]
+	for j, dir in enumerate((1, -1)):
+		if typeName == "O":
+			# getNeededKick never tests the O piece, rotating it is always a no-op
+			rotatedPiece[i, j] = i
+			continue
+		newRot = Game.nextRotation[(rot, dir)]
+		rotatedPiece[i, j] = metaIndex[Game.typeAndRotToMeta[typeName][newRot]]
+		rotationKicks[i, j] = [(xKick, -yKick) for xKick, yKick in Game.kickTests[(rot, newRot, typeName=="I")]]
+spawnPiece = np.array([metaIndex[Game.typeAndRotToMeta[typeName]['0']] for typeName in Game.typeList], dtype=np.int32)
+
+# score for clearing 0 to 4 lines at level 0, multiplied by (level+1) like `Game.placePiece`
+lineClearScores = np.array([0, 40, 100, 300, 1200], dtype=np.int64)
+
+
+class BatchGame:
+	def __init__(self, seeds :list[int], easyMode :bool):
+		self.size = len(seeds)
+		self.isEasymode = easyMode
+		self.rngs = [random.Random(seed) for seed in seeds]
+
+		self.rows = np.full((self.size, 20+2*padding), solidRow, dtype=np.uint32)
+		self.rows[:, padding:20+padding] = wallMask
+		# type plane, -1 for empty cells or the index into `Game.typeList`
+		self.cells = np.full((self.size, 20, 10), -1, dtype=np.int8)
+
+		self.activePiece = np.array([spawnPiece[rng.randint(0, 6)] for rng in self.rngs], dtype=np.int32)
+		self.droughtCounter = np.zeros((self.size, 7), dtype=np.int32)
+		self.anchorX = np.full(self.size, 3, dtype=np.int32)
+		self.anchorY = np.full(self.size, -1, dtype=np.int32)
+		self.canHoldPiece = np.ones(self.size, dtype=bool)
+		self.heldPiece = np.full(self.size, -1, dtype=np.int32)
+		self.totalLines = np.zeros(self.size, dtype=np.int64)
+		self.score = np.zeros(self.size, dtype=np.int64)
+		self.gameOver = np.zeros(self.size, dtype=bool)
+		self.nextList = np.zeros((self.size, 3), dtype=np.int32)
+		everyBoard = np.arange(self.size)
+		for i in range(3):
+			self.addNextPiece(everyBoard, i)
+
+	def collides(self, boards :np.ndarray, piece :np.ndarray, anchorX :np.ndarray, anchorY :np.ndarray) -> np.ndarray:
+		"Vectorized `Game.checkPieceCollision` for the given board indices"
+		rowIndices = anchorY[:, None]+padding+np.arange(4)
+		masks = pieceRowMasks[piece] << (anchorX+padding).astype(np.uint32)[:, None]
+		return (self.rows[boards[:, None], rowIndices] & masks).any(axis=1)
+
+	def addNextPiece(self, boards :np.ndarray, slot :int = 2):
+		"Draws one piece per board into `nextList[:, slot]` and flags boards whose active piece no longer fits"
+		for n in boards.tolist():
+			newPieceType = self.rngs[n].randint(0, 6)
+
+			if self.isEasymode:
+				droughtCounter = self.droughtCounter[n]
+				for droughtType in range(7):
+					if droughtType == newPieceType:
+						continue
+					if droughtCounter[droughtType] >= 25:
+						newPieceType = droughtType
+						break
+					droughtCounter[droughtType] += 1
+				droughtCounter[newPieceType] = 0
+
+			self.nextList[n, slot] = spawnPiece[newPieceType]
+
+		self.gameOver[boards] |= self.collides(boards, self.activePiece[boards], self.anchorX[boards], self.anchorY[boards])
+
+	def popNextPiece(self, boards :np.ndarray):
+		self.activePiece[boards] = self.nextList[boards, 0]
+		self.nextList[boards, :2] = self.nextList[boards, 1:]
+
+	def moveHorz(self, boards :np.ndarray, dir :int):
+		free = ~self.collides(boards, self.activePiece[boards], self.anchorX[boards]+dir, self.anchorY[boards])
+		self.anchorX[boards[free]] += dir
+
+	def rotate(self, boards :np.ndarray, dir :int):
+		piece = self.activePiece[boards]
+		newPiece = rotatedPiece[piece, 0 if dir == 1 else 1]
+		kicks = rotationKicks[piece, 0 if dir == 1 else 1]
+		# collision for all 5 tests at once, the first test that fits wins like in `getNeededKick`
+		hits = np.stack([
+			self.collides(boards, newPiece, self.anchorX[boards]+kicks[:, i, 0], self.anchorY[boards]+kicks[:, i, 1])
+			for i in range(5)
+		], axis=1)
+		fits = ~hits.all(axis=1)
+		firstFit = hits.argmin(axis=1)
+		boards, newPiece, kicks, firstFit = boards[fits], newPiece[fits], kicks[fits], firstFit[fits]
+		self.anchorX[boards] += kicks[np.arange(len(boards)), firstFit, 0]
+		self.anchorY[boards] += kicks[np.arange(len(boards)), firstFit, 1]
+		self.activePiece[boards] = newPiece
+
+	def stepDown(self, boards :np.ndarray):
+		blocked = self.collides(boards, self.activePiece[boards], self.anchorX[boards], self.anchorY[boards]+1)
+		self.anchorY[boards[~blocked]] += 1
+		self.placePiece(boards[blocked])
+
+	def dropDown(self, boards :np.ndarray):
+		falling = boards
+		while len(falling):
+			falling = falling[~self.collides(falling, self.activePiece[falling], self.anchorX[falling], self.anchorY[falling]+1)]
+			self.anchorY[falling] += 1
+		self.placePiece(boards)
+
+	def placePiece(self, boards :np.ndarray):
+		if not len(boards):
+			return
+		piece, anchorX, anchorY = self.activePiece[boards], self.anchorX[boards], self.anchorY[boards]
+
+		rowIndices = anchorY[:, None]+padding+np.arange(4)
+		masks = pieceRowMasks[piece] << (anchorX+padding).astype(np.uint32)[:, None]
+		self.rows[boards[:, None], rowIndices] |= masks
+		cellXY = pieceCells[piece]
+		self.cells[boards[:, None], anchorY[:, None]+cellXY[:, :, 1], anchorX[:, None]+cellXY[:, :, 0]] = pieceType[piece][:, None]
+
+		# a full playfield row has every bit set once the walls are included
+		playfield = self.rows[boards, padding:20+padding]
+		full = playfield == solidRow
+		linesThisPiece = full.sum(axis=1)
+		clearing = linesThisPiece > 0
+		if clearing.any():
+			# stable sort moves full rows to the top and keeps the order of the rest, then the top rows are emptied
+			order = np.argsort(~full[clearing], axis=1, kind='stable')
+			emptied = np.arange(20) < linesThisPiece[clearing][:, None]
+			clearedBoards = boards[clearing]
+			self.rows[clearedBoards, padding:20+padding] = np.where(emptied, wallMask, np.take_along_axis(playfield[clearing], order, axis=1))
+			self.cells[clearedBoards] = np.where(emptied[:, :, None], -1, np.take_along_axis(self.cells[clearedBoards], order[:, :, None], axis=1))
+
+		self.score[boards] += lineClearScores[linesThisPiece]*(self.totalLines[boards]//10+1)
+		self.totalLines[boards] += linesThisPiece
+		self.popNextPiece(boards)
+		self.canHoldPiece[boards] = True
+		self.anchorX[boards] = 3
+		self.anchorY[boards] = -1
+		self.addNextPiece(boards)
+
+	def hold(self, boards :np.ndarray):
+		boards = boards[self.canHoldPiece[boards]]
+		self.anchorX[boards] = 3
+		self.anchorY[boards] = -1
+		self.canHoldPiece[boards] = False
+
+		spawned = spawnPiece[pieceType[self.activePiece[boards]]]
+		empty = self.heldPiece[boards] == -1
+		swapping = boards[~empty]
+		self.activePiece[swapping] = self.heldPiece[swapping]
+		self.heldPiece[boards] = spawned
+
+		fromNext = boards[empty]
+		self.popNextPiece(fromNext)
+		self.addNextPiece(fromNext)
+
+	def step(self, inputs :np.ndarray):
+		"""
+		Applies one input per board, `noInput` (-1) skips a board, so do boards that are game over.
+		Inputs are the `game.Inputs` values and behave like `Game.applyInput`	"""
+		inputs = np.where(self.gameOver, noInput, inputs)
+		for input in np.unique(inputs).tolist():
+			if input == noInput:
+				continue
+			boards = np.flatnonzero(inputs == input)
+			match Inputs(input):
+				case Inputs.left: self.moveHorz(boards, -1)
+				case Inputs.right: self.moveHorz(boards, 1)
+				case Inputs.rotateCW: self.rotate(boards, 1)
+				case Inputs.rotateCCW: self.rotate(boards, -1)
+				case Inputs.softDrop | Inputs.gravity: self.stepDown(boards)
+				case Inputs.hardDrop: self.dropDown(boards)
+				case Inputs.hold: self.hold(boards)
+
+	def bitBoard(self, n :int) -> list[int]:
+		"Board n in the layout of `Game.bitBoard`"
+		return [(int(row) >> padding) & Game.fullRowMask for row in self.rows[n, padding:20+padding]]
+
+	def gameBoard(self, n :int) -> list[list[str]]:
+		"Board n in the layout of `Game.gameBoard`"
+		return [[Game.typeList[cell] if cell != -1 else '-' for cell in row] for row in self.cells[n].tolist()]
@@ -0,0 +1,61 @@
+"""
+Board cell drawing: one blit per cell from the separately loaded, unconverted sprites vs one batched `blits`
+call from the display-format sprite atlas, and building the atlas from the sprites vs loading it from the cache
+Runs headless on SDL's dummy video driver
+Run from the repository root: python -m benchmarks.atlas
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import shutil, tempfile, time
+import pygame as pg
+from pygame import Vector2
+from main import SpriteAtlas
+
+
+def fullBoard() -> list[list[str]]:
+	"Every cell filled, the most a board frame ever draws"
+	return [[SpriteAtlas.pieceTypes[(i+j)%7] for i in range(10)] for j in range(20)]
+
+
+def perCellFrame(screen :pg.Surface, board :list, images :dict, minoSize :int):
+	for j, row in enumerate(board):
+		for i, pieceType in enumerate(row):
+			screen.blit(images[pieceType], Vector2(400, 50) + Vector2(i, j)*minoSize)
+
+def atlasFrame(screen :pg.Surface, board :list, atlas :SpriteAtlas, minoSize :int):
+	screen.blits([
+		(atlas.surface, Vector2(400, 50) + Vector2(i, j)*minoSize, atlas.tiles[pieceType])
+		for j, row in enumerate(board) for i, pieceType in enumerate(row)
+	], doreturn=False)
+
+
+def timeIt(function, *args, repeats :int = 200) -> float:
+	"Mean milliseconds per call"
+	function(*args)
+	start = time.perf_counter()
+	for i in range(repeats):
+		function(*args)
+	return (time.perf_counter()-start)/repeats*1000
+
+
+if __name__ == "__main__":
+	pg.init()
+	screen = pg.display.set_mode((1200, 900))
+	board = fullBoard()
+	SpriteAtlas.cacheDir = tempfile.mkdtemp()
+	try:
+		for minoSize in (13, 24, 40, 48):
+			images = {pieceType: pg.transform.scale(pg.image.load(f'./assets/{pieceType.lower()}.png'), (minoSize, minoSize)) for pieceType in SpriteAtlas.pieceTypes}
+
+			start = time.perf_counter()
+			atlas = SpriteAtlas(minoSize).convert()
+			built = (time.perf_counter()-start)*1000
+			cached = timeIt(lambda: SpriteAtlas(minoSize).convert(), repeats=20)
+
+			perCell = timeIt(perCellFrame, screen, board, images, minoSize)
+			batched = timeIt(atlasFrame, screen, board, atlas, minoSize)
+			print(f"mino {minoSize:2}px: 200 cells per cell {perCell:6.3f} ms	atlas blits {batched:6.3f} ms	atlas built {built:6.2f} ms	from cache {cached:6.2f} ms")
+	finally:
+		shutil.rmtree(SpriteAtlas.cacheDir)
@@ -0,0 +1,92 @@
+"""
+Differential check of `batchSim.BatchGame` against the scalar `Game`, then board-steps/sec for both
+Both engines replay the same seeded input streams, every board's full state must match at the end
+Run from the repository root: python -m benchmarks.batchSim [boards] [steps]
+"""
+import random, sys, time
+import numpy as np
+from game import Game, GameStates, Inputs
+from batchSim import BatchGame, metaIds
+from moveGen import generatePlacements
+from simulate import landingScore
+
+
+def makeInputs(seeds :list[int], easyMode :bool, steps :int) -> np.ndarray:
+	"""
+	Per seed input streams recorded from a greedy player that takes the lowest landing spot with the fewest new
+	covered holes, with gravity ticks and stray shifts or rotations mixed in at random. Games live long enough
+	to clear plenty of lines and the stray inputs exercise kicks, holds and soft drops along the way	"""
+	inputs = np.empty((steps, len(seeds)), dtype=np.int64)
+	for n, seed in enumerate(seeds):
+		rng = random.Random(-1-seed)
+		placed = []
+		game = Game(easyMode, onPiecePlaced=lambda: placed.append(True), seed=seed)
+		stream = []
+		while len(stream) < steps and game.state != GameStates.initialsInput:
+			placements = generatePlacements(game)
+			best = max(placements, key=lambda p: (landingScore(game, p), rng.random()))
+			placed.clear()
+			for input in best.path:
+				while rng.random() < 0.03 and not placed:
+					stray = rng.choice([Inputs.gravity, Inputs.gravity, Inputs.left, Inputs.right, Inputs.rotateCW, Inputs.rotateCCW])
+					stream.append(stray); game.applyInput(stray)
+				if placed or game.state == GameStates.initialsInput:
+					break
+				stream.append(input); game.applyInput(input)
+		stream += [Inputs.hardDrop]*steps
+		inputs[:, n] = stream[:steps]
+	return inputs
+
+def runScalar(seeds :list[int], easyMode :bool, inputs :np.ndarray) -> list[Game]:
+	games = []
+	for n, seed in enumerate(seeds):
+		game = Game(easyMode, seed=seed)
+		for input in inputs[:, n].tolist():
+			if game.state == GameStates.initialsInput:
+				break
+			game.applyInput(Inputs(input))
+		games.append(game)
+	return games
+
+def runBatch(seeds :list[int], easyMode :bool, inputs :np.ndarray) -> BatchGame:
+	batch = BatchGame(seeds, easyMode)
+	for stepInputs in inputs:
+		batch.step(stepInputs)
+	return batch
+
+def compare(games :list[Game], batch :BatchGame):
+	for n, game in enumerate(games):
+		expected = (
+			game.bitBoard, game.gameBoard, game.activePiece, game.anchorX, game.anchorY, game.heldPiece, game.canHoldPiece,
+			game.nextList, game.score, game.totalLines, list(game.droughtCounter.values()), game.state == GameStates.initialsInput,
+		)
+		actual = (
+			batch.bitBoard(n), batch.gameBoard(n), metaIds[batch.activePiece[n]], int(batch.anchorX[n]), int(batch.anchorY[n]),
+			metaIds[batch.heldPiece[n]] if batch.heldPiece[n] != -1 else 0, bool(batch.canHoldPiece[n]),
+			[metaIds[x] for x in batch.nextList[n]], int(batch.score[n]), int(batch.totalLines[n]), batch.droughtCounter[n].tolist(), bool(batch.gameOver[n]),
+		)
+		assert expected == actual, f"board {n} diverged"
+
+
+if __name__ == "__main__":
+	boards = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+	uniqueStreams = 100
+
+	for easyMode in (False, True):
+		# a handful of recorded streams tiled across the batch, copies share a seed so they stay identical
+		streams = makeInputs(list(range(uniqueStreams)), easyMode, steps)
+		seeds = [n%uniqueStreams for n in range(boards)]
+		inputs = streams[:, seeds]
+
+		start = time.perf_counter()
+		games = runScalar(seeds, easyMode, inputs)
+		scalarTime = time.perf_counter()-start
+		start = time.perf_counter()
+		batch = runBatch(seeds, easyMode, inputs)
+		batchTime = time.perf_counter()-start
+
+		compare(games, batch)
+		print(f"easy mode {'on ' if easyMode else 'off'}: {boards} boards identical after {steps} steps, {int(batch.totalLines[:uniqueStreams].sum())} lines cleared in {uniqueStreams} unique games, {int(batch.gameOver[:uniqueStreams].sum())} topped out")
+		print(f"	scalar:	{boards*steps/scalarTime:12,.0f} board-steps/sec")
+		print(f"	batch:	{boards*steps/batchTime:12,.0f} board-steps/sec")
@@ -0,0 +1,66 @@
+"""
+Pieces/sec the beam search bot decides at each beam width, on the same seeded games, with the lines, score and
+top-outs it reaches, so a faster setting can be weighed against how well it plays. Only `Bot.choose` is timed, in
+CPU time, playing its placement out is not. Exits with status 1 when a width decides fewer pieces/sec than --budget
+Run from the repository root: python -m benchmarks.bot [--games 4] [--pieces 200] [--bits 8] [--budget 30] [width ...]
+"""
+import argparse, sys, time
+from game import Game, GameStates
+from bot import Bot
+from transposition import TranspositionTable
+
+
+def playGame(bot :Bot, seed :int, maxPieces :int) -> tuple[int, float, Game]:
+	"Pieces placed and seconds spent choosing them, on one game of {maxPieces} pieces or to topping out"
+	pieces = [0]
+	def onPiecePlaced():
+		pieces[0] += 1
+
+	game = Game(False, onPiecePlaced=onPiecePlaced, seed=seed)
+	thinking = 0.0
+	while game.state != GameStates.initialsInput and pieces[0] < maxPieces:
+		start = time.process_time()
+		placement = bot.choose(game)
+		thinking += time.process_time()-start
+		for input in placement.path:
+			game.applyInput(input)
+	return pieces[0], thinking, game
+
+
+def main(argv :list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Pieces/sec and results of the beam search bot per beam width")
+	parser.add_argument("widths", nargs="*", type=int, default=[1, 4, 8, 16], help="beam widths to run (default 1 4 8 16)")
+	parser.add_argument("--games", type=int, default=4, help="games per width, seeds 0..games-1 (default 4)")
+	parser.add_argument("--pieces", type=int, default=200, help="pieces per game at most (default 200)")
+	parser.add_argument("--depth", type=int, default=None, help="pieces of the next list searched, all of them by default")
+	parser.add_argument("--bits", type=int, default=8, help="each width's bot gets a transposition table of 2**bits slots, 0 for none (default 8, as the game's)")
+	parser.add_argument("--budget", type=float, default=None, help="fail when a width decides fewer pieces/sec than this")
+	args = parser.parse_args(argv)
+
+	slow = []
+	for width in args.widths:
+		bot = Bot(width, args.depth, table=TranspositionTable(args.bits) if args.bits else None)
+		pieces = lines = score = toppedOut = 0
+		thinking = 0.0
+		for seed in range(args.games):
+			placed, seconds, game = playGame(bot, seed, args.pieces)
+			pieces += placed
+			thinking += seconds
+			lines += game.totalLines
+			score += game.score
+			toppedOut += game.state == GameStates.initialsInput
+		rate = pieces/thinking
+		line = f"beam {width:3}:	{rate:8.1f} pieces/sec	{pieces:6} pieces	{lines:5} lines	{score:8} points	{toppedOut} topped out"
+		if args.budget is not None and rate < args.budget:
+			line += "	OVER BUDGET"
+			slow.append(width)
+		print(line, flush=True)
+
+	if slow:
+		print(f"beam widths under {args.budget:g} pieces/sec: {', '.join(map(str, slow))}")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
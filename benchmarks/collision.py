@@ -0,0 +1,62 @@
+"""
+Collision check throughput, list-of-lists board vs bitboard
+Run from the repository root: python -m benchmarks.collision
+"""
+import random, time
+from game import Game
+
+
+def legacyCheckPieceCollision(game :Game, anchorX :int, anchorY :int, metaID :int) -> bool:
+	"The pre-bitboard implementation, walks the type plane cell by cell"
+	if sum(list(map(lambda x: (not (0<=anchorX+((15-x)%4)<10))+(not (0<=anchorY+((15-x)//4)<20)), game.metaIdToActiveBits[metaID]))):
+		return True
+	for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[metaID])):
+		if game.gameBoard[anchorY+yComponent][anchorX+xComponent] != '-':
+			return True
+	return False
+
+
+def makeBoards(count :int, seed :int) -> list[Game]:
+	"Plays random moves for a while to get a spread of realistic, partially filled boards, topped out games are thrown away"
+	random.seed(seed)
+	games = []
+	while len(games) < count:
+		game = Game(False)
+		for piece in range(random.randint(5, 40)):
+			for move in range(random.randint(0, 4)):
+				random.choice([lambda: game.moveActivePieceHorz(-1), lambda: game.moveActivePieceHorz(1), lambda: game.rotateActivePiece(1)])()
+			game.dropActivePieceDown()
+			if game.state == game.state.initialsInput:
+				break
+		else:
+			games.append(game)
+	return games
+
+
+def makeQueries(count :int, seed :int) -> list[tuple[int, int, int]]:
+	rng = random.Random(seed)
+	metaIds = list(Game.metaIdToActiveBits.keys())
+	return [(rng.randint(-3, 10), rng.randint(-2, 19), rng.choice(metaIds)) for x in range(count)]
+
+
+def timeChecks(games :list[Game], queries :list, check) -> float:
+	start = time.perf_counter()
+	for game in games:
+		for anchorX, anchorY, metaID in queries:
+			check(game, anchorX, anchorY, metaID)
+	return len(games)*len(queries) / (time.perf_counter()-start)
+
+
+if __name__ == "__main__":
+	games = makeBoards(50, 0)
+	queries = makeQueries(2000, 1)
+
+	for game in games:
+		for anchorX, anchorY, metaID in queries:
+			assert game.checkPieceCollision(anchorX, anchorY, metaID) == legacyCheckPieceCollision(game, anchorX, anchorY, metaID), (anchorX, anchorY, metaID)
+
+	before = timeChecks(games, queries, legacyCheckPieceCollision)
+	after = timeChecks(games, queries, Game.checkPieceCollision)
+	print(f"list-of-lists:	{before:12,.0f} checks/sec")
+	print(f"bitboard:	{after:12,.0f} checks/sec")
+	print(f"speedup:	{after/before:12.2f}x")
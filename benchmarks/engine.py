@@ -0,0 +1,276 @@
+"""
+Engine micro-benchmarks: operations/sec of the rules hot paths on seeded inputs, no display needed
+Every case rebuilds its inputs from fixed seeds before each timed run, so two runs only differ by the code and
+the machine. Results are compared against a saved baseline, baselines are per machine so save one before a
+change and compare after it, on an otherwise idle machine: shared or throttled cores easily swing single cases
+by 10-20%. Exits with status 1 when a case got slower than its baseline by more than the threshold
+Run from the repository root: python -m benchmarks.engine [--save] [--threshold 0.15] [--baseline FILE] [case ...]
+"""
+import argparse, copy, gc, json, os, random, sys, time
+from typing import Callable
+from game import Game
+from simulate import playGame
+from benchmarks.collision import makeBoards, makeQueries
+
+
+# a case prepares its inputs and returns the run to time, which returns how many operations it did
+Case = Callable[[], Callable[[], int]]
+
+
+def noisyBoards(count :int, seed :int) -> list[Game]:
+	"Boards of random cells at densities from sparse to nearly full, every kick test gets to pass or fail on some"
+	rng = random.Random(seed)
+	games = []
+	for n in range(count):
+		game = Game(False, seed=n)
+		density = rng.uniform(0.1, 0.8)
+		for y in range(rng.randint(0, 12), 20):
+			game.bitBoard[y] = sum(1 << x for x in range(10) if rng.random() < density)
+		game.recount()
+		game.rehash()
+		games.append(game)
+	return games
+
+def freeSpot(game :Game, metaId :int, rng :random.Random, minY :int = -2, maxY :int = 19) -> tuple[int, int] | None:
+	"A random anchor where {metaId} fits on {game}'s board, None if a few tries found nothing"
+	for attempt in range(50):
+		anchorX, anchorY = rng.randint(-3, 10), rng.randint(minY, maxY)
+		if not game.checkPieceCollision(anchorX, anchorY, metaId):
+			return anchorX, anchorY
+	return None
+
+def kickOutcome(game :Game, oldRot :str, newRot :str, pieceType :str, anchorX :int, anchorY :int) -> int:
+	"Which SRS test lets the rotation through, 0 to 4, -1 when none do"
+	kick = game.getNeededKick(oldRot, newRot, pieceType, anchorX, anchorY)
+	if kick == (69, 420):
+		return -1
+	return game.kickTests[(oldRot, newRot, pieceType == "I")].index((kick[0], -kick[1]))
+
+def rotationQueries(count :int, seed :int) -> list[tuple[Game, str, str, str, int, int, int]]:
+	"""
+	(game, old rotation, new rotation, piece type, anchorX, anchorY, direction) with the piece fitting before it
+	turns, spread over every rotation of every piece but O. Checks every SRS test, and no test, decides some of them
+	for both the I and the JLSTZ tables, so the numbers cover the whole kick path	"""
+	rng = random.Random(seed)
+	games = noisyBoards(50, seed)
+	turns = [(pieceType, oldRot, dir) for pieceType in "IJLSTZ" for oldRot in "0R2L" for dir in (1, -1)]
+	queries, outcomes = [], set()
+	while len(queries) < count:
+		game = rng.choice(games)
+		pieceType, oldRot, dir = rng.choice(turns)
+		spot = freeSpot(game, game.typeAndRotToMeta[pieceType][oldRot], rng)
+		if spot is None:
+			continue
+		newRot = game.nextRotation[(oldRot, dir)]
+		queries.append((game, oldRot, newRot, pieceType, *spot, dir))
+		outcomes.add((pieceType == "I", kickOutcome(game, oldRot, newRot, pieceType, *spot)))
+	missing = {(isI, outcome) for isI in (False, True) for outcome in range(-1, 5)} - outcomes
+	assert not missing, f"kick outcomes never hit: {sorted(missing)}"
+	return queries
+
+def activePieces(count :int, seed :int) -> list[Game]:
+	"Realistic boards, each with a random piece somewhere above its stack, the boards are copies so they can be changed"
+	rng = random.Random(seed)
+	boards = makeBoards(50, seed)
+	games = []
+	while len(games) < count:
+		game = copy.deepcopy(rng.choice(boards))
+		metaId = rng.choice(list(game.metaIdToActiveBits))
+		spot = freeSpot(game, metaId, rng, maxY=4)
+		if spot is None:
+			continue
+		game.activePiece = metaId
+		game.anchorX, game.anchorY = spot
+		game.rehash()
+		games.append(game)
+	return games
+
+def lineClearGames(lines :int, count :int) -> list[Game]:
+	"Games with a vertical I about to lock into a 4 row stack, filling the one gap of exactly {lines} of its rows"
+	rng = random.Random(lines)
+	games = []
+	for n in range(count):
+		game = Game(False, seed=n)
+		column = rng.randint(0, 9)
+		# rows that must stay get a second gap next to the I's column
+		second = column+1 if column < 9 else column-1
+		for y in range(16, 20):
+			row = Game.fullRowMask & ~(1 << column)
+			if y < 20-lines:
+				row &= ~(1 << second)
+			game.bitBoard[y] = row
+			game.gameBoard[y] = [Game.typeList[(x+y)%7] if (row >> x) & 1 else '-' for x in range(10)]
+		game.activePiece = Game.typeAndRotToMeta["I"]["R"]
+		game.anchorX, game.anchorY = column-2, 16
+		game.recount()
+		game.rehash()
+		games.append(game)
+	return games
+
+
+def collisionCase() -> Callable[[], int]:
+	games = makeBoards(10, 0)
+	queries = makeQueries(5000, 1)
+	def run() -> int:
+		for game in games:
+			check = game.checkPieceCollision
+			for anchorX, anchorY, metaId in queries:
+				check(anchorX, anchorY, metaId)
+		return len(games)*len(queries)
+	return run
+
+def placePieceCase(lines :int) -> Case:
+	def case() -> Callable[[], int]:
+		games = lineClearGames(lines, 2000)
+		def run() -> int:
+			for game in games:
+				game.placePiece()
+			return len(games)
+		return run
+	return case
+
+def getNeededKickCase() -> Callable[[], int]:
+	queries = rotationQueries(20000, 2)
+	def run() -> int:
+		for game, oldRot, newRot, pieceType, anchorX, anchorY, dir in queries:
+			game.getNeededKick(oldRot, newRot, pieceType, anchorX, anchorY)
+		return len(queries)
+	return run
+
+def rotateActivePieceCase() -> Callable[[], int]:
+	"Puts each query's piece in place before turning it, those three stores are timed along with the rotation"
+	queries = [(game, game.typeAndRotToMeta[pieceType][oldRot], anchorX, anchorY, dir) for game, oldRot, newRot, pieceType, anchorX, anchorY, dir in rotationQueries(20000, 2)]
+	def run() -> int:
+		for game, metaId, anchorX, anchorY, dir in queries:
+			game.activePiece = metaId
+			game.anchorX = anchorX
+			game.anchorY = anchorY
+			game.rotateActivePiece(dir)
+		return len(queries)
+	return run
+
+def calcShadowPosCase(cached :bool) -> Case:
+	"Cold: the cache is dropped before every call, as after the board changes. Cached: the piece has not moved since the last call"
+	def case() -> Callable[[], int]:
+		games = activePieces(1000, 3)
+		repeats = 20 if cached else 1
+		for game in games:
+			game.calcShadowPos()
+		def run() -> int:
+			for i in range(repeats):
+				for game in games:
+					if not cached:
+						game.shadowCache = None
+					game.calcShadowPos()
+			return len(games)*repeats
+		return run
+	return case
+
+def dropActivePieceDownCase() -> Callable[[], int]:
+	games = activePieces(2000, 4)
+	def run() -> int:
+		for game in games:
+			game.dropActivePieceDown()
+		return len(games)
+	return run
+
+def addNextPieceCase(easyMode :bool) -> Case:
+	"Normal mode is a plain roll, easy mode also walks the drought counters"
+	def case() -> Callable[[], int]:
+		game = Game(easyMode, seed=5)
+		def run() -> int:
+			for i in range(20000):
+				game.addNextPiece()
+			return 20000
+		return run
+	return case
+
+def randomGamesCase() -> Callable[[], int]:
+	"Whole games of the random policy, move generation included, counted in pieces placed"
+	def run() -> int:
+		return sum(playGame(seed, "random", False, 500)["pieces"] for seed in range(20))
+	return run
+
+
+# name -> (unit, case), the names are the keys of the baseline file
+cases :dict[str, tuple[str, Case]] = {
+	"checkPieceCollision": ("checks", collisionCase),
+	**{f"placePiece {lines} lines": ("pieces", placePieceCase(lines)) for lines in range(5)},
+	"getNeededKick": ("kicks", getNeededKickCase),
+	"rotateActivePiece": ("rotations", rotateActivePieceCase),
+	"calcShadowPos cold": ("calls", calcShadowPosCase(False)),
+	"calcShadowPos cached": ("calls", calcShadowPosCase(True)),
+	"dropActivePieceDown": ("drops", dropActivePieceDownCase),
+	"addNextPiece normal": ("pieces", addNextPieceCase(False)),
+	"addNextPiece easy": ("pieces", addNextPieceCase(True)),
+	"random policy games": ("pieces", randomGamesCase),
+}
+
+
+def measure(case :Case) -> float:
+	"""
+	Operations/sec of one run of CPU time, its inputs are built fresh since most runs change their games. CPU time
+	leaves out whatever else the machine was doing meanwhile. The garbage collector is kept out of the timed part
+	like `timeit` does, the thousands of games a case builds would otherwise get walked by whichever run happens to
+	trigger a collection	"""
+	run = case()
+	gc.collect()
+	gc.disable()
+	try:
+		start = time.process_time()
+		ops = run()
+		return ops/(time.process_time()-start)
+	finally:
+		gc.enable()
+
+
+def main(argv :list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Engine micro-benchmarks, compared against a saved baseline")
+	parser.add_argument("cases", nargs="*", help=f"cases to run, all by default: {', '.join(cases)}")
+	parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "engineBaseline.json"), help="baseline file to compare against or save to")
+	parser.add_argument("--save", action="store_true", help="save the results as the new baseline, merged into the existing one")
+	parser.add_argument("--threshold", type=float, default=0.15, help="fail when a case is this much slower than its baseline, 0.15 is 15%% (default)")
+	parser.add_argument("--repeats", type=int, default=10, help="timed runs per case, the best one counts (default 10)")
+	args = parser.parse_args(argv)
+
+	unknown = [name for name in args.cases if name not in cases]
+	if unknown:
+		parser.error(f"unknown cases {unknown}, expected some of {list(cases)}")
+
+	baseline = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline) as f:
+			baseline = json.load(f)
+
+	# the runs of all cases take turns, so a stretch where the machine is busy with something else slows one
+	# run of many cases instead of every run of one case, and each case keeps its best run
+	names = args.cases or list(cases)
+	results = {name: 0.0 for name in names}
+	for i in range(args.repeats):
+		for name in names:
+			results[name] = max(results[name], measure(cases[name][1]))
+
+	regressed = []
+	for name in names:
+		unit, opsPerSec = cases[name][0], results[name]
+		line = f"{name:<22}{opsPerSec:14,.0f} {unit}/sec"
+		if name in baseline:
+			change = opsPerSec/baseline[name]-1
+			line += f"	baseline {baseline[name]:14,.0f}	{change:+7.1%}"
+			if change < -args.threshold:
+				line += "	REGRESSED"
+				regressed.append(name)
+		print(line, flush=True)
+
+	if args.save:
+		with open(args.baseline, 'w') as f:
+			json.dump(baseline | results, f, indent='\t')
+		print(f"baseline saved to {args.baseline}")
+	if regressed:
+		print(f"{len(regressed)} case(s) more than {args.threshold:.0%} slower than the baseline: {', '.join(regressed)}")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Playing screen frame time at every resolution preset (see `Layout`): everything drawn immediate mode vs a full frame
+started from the cached static layer vs the usual dirty rectangle frame where only the piece moved
+Runs headless on SDL's dummy video driver
+Run from the repository root: python -m benchmarks.frameTime
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import json, time
+import pygame as pg
+from game import Game, GameStates
+from main import Display
+
+
+def makeGame(seed :int) -> Game:
+	"A game some pieces in, so the board has locked cells and the HUD has something to show"
+	game = Game(True, seed=seed)
+	game.state = GameStates.playing
+	for piece in range(12):
+		game.moveActivePieceHorz((-1, 1)[piece%2]*(piece%4))
+		game.dropActivePieceDown()
+	game.holdActivePiece()
+	return game
+
+
+def immediateFrame(disp :Display, game :Game):
+	"Every frame redraws the layout geometry too, like before the static layer"
+	disp.drawStaticLayer(disp.screen)
+	for box in disp.layout.hold: disp.drawHold(game, box)
+	for box in disp.layout.nextlist: disp.drawNextlist(game, box)
+	for box in disp.layout.level: disp.drawLevel(game, box)
+	for box in disp.layout.score: disp.drawScore(game, box)
+	for box in disp.layout.board: disp.drawBoard(game, box)
+	for box in disp.layout.piece: disp.drawPiece(game, box)
+	pg.display.update()
+
+def cachedFrame(disp :Display, game :Game):
+	disp.fullRedraw = True
+	disp.drawWindow(game)
+	pg.display.update(disp.dirtyRects)
+
+def dirtyFrame(disp :Display, game :Game):
+	game.moveActivePieceHorz(-1 if game.anchorX > 3 else 1)
+	disp.drawWindow(game)
+	pg.display.update(disp.dirtyRects)
+
+
+def timeFrames(disp :Display, game :Game, frame, frames :int) -> float:
+	"Returns the mean frame time in milliseconds"
+	frame(disp, game)
+	start = time.perf_counter()
+	for i in range(frames):
+		frame(disp, game)
+	return (time.perf_counter()-start)/frames*1000
+
+
+if __name__ == "__main__":
+	with open('./resolutions.json', 'r') as f:
+		presets = json.load(f)
+
+	print(f"{'preset':>10}	{'immediate':>10}	{'static layer':>12}	{'dirty rects':>11}	(ms/frame)")
+	# the presets without a layout of their own are scaled from the reference one
+	for name in presets:
+		width, height = map(int, name.split('x'))
+		disp = Display(width, height)
+		disp.preparePlaying()
+		disp.debug = False
+		disp.fpsHistory = []
+		disp.fpsSum = 0
+		game = makeGame(0)
+
+		immediate = timeFrames(disp, game, immediateFrame, 200)
+		cached = timeFrames(disp, game, cachedFrame, 200)
+		dirty = timeFrames(disp, game, dirtyFrame, 1000)
+		print(f"{name:>10}	{immediate:10.3f}	{cached:12.3f}	{dirty:11.3f}")
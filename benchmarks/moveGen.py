@@ -0,0 +1,41 @@
+"""
+Legal placement generation throughput, with and without the hold alternative
+Every generated path is replayed on a copy of the board to check it reaches its placement
+Run from the repository root: python -m benchmarks.moveGen
+"""
+import random, time
+from copy import deepcopy
+from game import Game
+from moveGen import generatePlacements
+from benchmarks.collision import makeBoards
+
+
+def verify(games :list[Game]):
+	for game in games:
+		for placement in generatePlacements(game):
+			replay = deepcopy(game)
+			for input in placement.path[:-1]:
+				replay.applyInput(input)
+			assert (replay.activePiece, replay.anchorX, replay.calcShadowPos()) == placement[:3], placement
+
+def boardsPerSecond(games :list[Game], includeHold :bool, rounds :int = 5) -> tuple[float, float]:
+	placements = 0
+	start = time.perf_counter()
+	for i in range(rounds):
+		for game in games:
+			placements += len(generatePlacements(game, includeHold))
+	elapsed = time.perf_counter()-start
+	return rounds*len(games)/elapsed, placements/(rounds*len(games))
+
+
+if __name__ == "__main__":
+	random.seed(0)
+	boardSets = {
+		"empty board": [Game(False) for i in range(200)],
+		"random stacks": makeBoards(200, 0),
+	}
+	for name, games in boardSets.items():
+		verify(games)
+		for includeHold in (False, True):
+			rate, average = boardsPerSecond(games, includeHold)
+			print(f"{name}, hold {'on ' if includeHold else 'off'}:	{rate:10,.0f} boards/sec	{average:6.1f} placements/board")
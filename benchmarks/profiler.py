@@ -0,0 +1,34 @@
+"""
+Cost of a timed stage, `with profiler.stage(...)`, with the profiler off, showing statistics and tracing, against
+the same loop without it, and what that adds to a frame with the dozen or so stages the main loop times
+Run from the repository root: python -m benchmarks.profiler
+"""
+import time
+from profiler import Profiler
+
+
+stagesPerFrame = 12
+repeats = 10**6
+
+
+def bare() -> float:
+	start = time.perf_counter()
+	for i in range(repeats):
+		pass
+	return time.perf_counter()-start
+
+def staged(profiler :Profiler) -> float:
+	start = time.perf_counter()
+	for i in range(repeats):
+		with profiler.stage('stage'):
+			pass
+	return time.perf_counter()-start
+
+
+if __name__ == "__main__":
+	baseline = min(bare() for i in range(3))
+	for name, setup in (("off", lambda p: None), ("statistics", lambda p: p.setEnabled(True)), ("tracing", lambda p: p.startTrace())):
+		profiler = Profiler()
+		setup(profiler)
+		perStage = (min(staged(profiler) for i in range(3))-baseline)/repeats
+		print(f"{name:>10}: {perStage*1e9:6.0f} ns per stage, {perStage*stagesPerFrame*1e6:5.2f} us per frame of {stagesPerFrame} stages, {perStage*stagesPerFrame*60*100:.4f}% of a core at 60 fps")
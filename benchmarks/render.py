@@ -0,0 +1,298 @@
+"""
+Whole frames of the real game loop, headless: `Controller.startSinglePlayer` runs on SDL's dummy video driver at
+every resolution preset, played by a script that goes through the countdown, a greedy bot's game, the pause menu,
+topping out, typing initials and the highscore screen, for a fixed number of frames at a fixed 60 fps game clock.
+Reports the frame time distribution per `GameStates` value and preset, then how many surfaces, fonts and `Vector2`s
+a frame allocates, counted in a second, instrumented run of the same frames. The frames played can be saved with
+--record and played again with --replay, to time exactly the same frames against another version of the game
+Run from the repository root: python -m benchmarks.render [--frames 1500] [--record FILE | --replay FILE] [preset ...]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import argparse, json, random, shutil, statistics, sys, tempfile, threading, time
+from collections import defaultdict
+import pygame as pg
+import pygame.sysfont
+import layout, main
+from assets import AssetLoader
+from game import Game, GameStates, Inputs
+from main import Controller, KeyboardInput
+from simulate import greedyPolicy
+
+
+# keys pressed on a frame, as (key, unicode), and the inputs held on it
+Frame = tuple[list[tuple[int, str]], list[Inputs]]
+
+
+class AllocationCounter:
+	"""
+	Counts the surfaces, fonts and `Vector2`s the main thread makes, while entered. Surfaces: `pg.Surface(...)` and
+	every call of a pygame function or method that returns a new one (`Font.render`, `copy`, `subsurface`, `convert`,
+	`pygame.transform`...), seen through `sys.setprofile`. Fonts: every `pg.font.Font`, those `SysFont` makes included.
+	Vector2s: main's and layout's `Vector2` are swapped for a subclass, which arithmetic on one keeps, and each is
+	counted as it is freed, which for the temporaries of a frame is before the frame ends	"""
+	surfaceMakers = {'render', 'copy', 'subsurface', 'convert', 'convert_alpha', 'scale', 'smoothscale', 'scale2x', 'rotate', 'rotozoom', 'flip', 'chop', 'load'}
+	kinds = ('surfaces', 'fonts', 'Vector2s')
+
+	def __init__(self) -> None:
+		self.counts = dict.fromkeys(self.kinds, 0)
+		counter = self
+
+		def onMainThread() -> bool:
+			return threading.current_thread() is threading.main_thread()
+
+		class CountedSurface(pg.Surface):
+			def __init__(self, *args, **kwargs):
+				super().__init__(*args, **kwargs)
+				if onMainThread(): counter.counts['surfaces'] += 1
+
+		class CountedFont(pg.font.Font):
+			def __init__(self, *args, **kwargs):
+				super().__init__(*args, **kwargs)
+				if onMainThread(): counter.counts['fonts'] += 1
+
+		class CountedVector2(pg.Vector2):
+			def __del__(self):
+				if onMainThread(): counter.counts['Vector2s'] += 1
+
+		self.patches = [
+			(pg, 'Surface', CountedSurface),
+			(pg.font, 'Font', CountedFont),
+			(pygame.sysfont, 'Font', CountedFont),
+			(main, 'Vector2', CountedVector2),
+			(layout, 'Vector2', CountedVector2),
+		]
+		self.originals = []
+
+	def profile(self, frame, event :str, function):
+		if event != 'c_call' or function.__name__ not in self.surfaceMakers:
+			return
+		owner = getattr(function, '__self__', None)
+		if isinstance(owner, (pg.Surface, pg.font.Font)) or getattr(owner, '__name__', '').startswith('pygame.'):
+			self.counts['surfaces'] += 1
+
+	def __enter__(self) -> "AllocationCounter":
+		self.originals = [(module, name, getattr(module, name)) for module, name, replacement in self.patches]
+		for module, name, replacement in self.patches:
+			setattr(module, name, replacement)
+		sys.setprofile(self.profile)
+		return self
+
+	def __exit__(self, *exc):
+		sys.setprofile(None)
+		for module, name, original in self.originals:
+			setattr(module, name, original)
+		return False
+
+	def take(self) -> dict[str, int]:
+		"Counts since the last call"
+		counts = self.counts
+		self.counts = dict.fromkeys(self.kinds, 0)
+		return counts
+
+
+class FrameStats:
+	"""
+	Frame times, and allocations when counting, per `GameStates` value. A frame is timed from the end of the
+	script's turn on one frame to the start of its turn on the next, so deciding what to press is not counted	"""
+	def __init__(self, warmup :int, counter :AllocationCounter | None = None) -> None:
+		self.warmup = warmup
+		self.counter = counter
+		self.frames = 0
+		# the state drawn on each frame, two runs of the same frames must match
+		self.states :list[GameStates] = []
+		self.times :dict[GameStates, list[float]] = defaultdict(list)
+		self.allocations :dict[GameStates, dict[str, int]] = defaultdict(lambda: dict.fromkeys(AllocationCounter.kinds, 0))
+		self.resumed :float | None = None
+
+	def pause(self, state :GameStates):
+		"""
+		Ends the frame, which drew {state}. The first {warmup} frames load assets and build layers, they are left out,
+		and `ScriptedInput` waits for the asset loader after them	"""
+		now = time.perf_counter()
+		counts = self.counter.take() if self.counter is not None else None
+		self.frames += 1
+		self.states.append(state)
+		if self.resumed is None or self.frames <= self.warmup:
+			return
+		self.times[state].append(now-self.resumed)
+		if counts is not None:
+			for kind, count in counts.items():
+				self.allocations[state][kind] += count
+
+	def resume(self):
+		if self.counter is not None:
+			self.counter.take()
+		self.resumed = time.perf_counter()
+
+
+class ScriptedInput(KeyboardInput):
+	"""
+	Plays recorded frames, whatever happens in the game, at a fixed 60 fps game clock and quits after the last one.
+	Window events are still drained so the queue never fills up	"""
+	keyEvents = False
+	frameSeconds = 1/60
+
+	def __init__(self, frames :list[Frame], stats :FrameStats) -> None:
+		self.frames = frames
+		self.stats = stats
+		self.holding :list[Inputs] = []
+		# the game's asset loader, set by `play`
+		self.assets :AssetLoader | None = None
+
+	def next(self, game :Game) -> Frame | None:
+		"The keys and held inputs of the next frame, None once there are no more"
+		return self.frames[self.stats.frames-1] if self.stats.frames <= len(self.frames) else None
+
+	def events(self, game :Game) -> list[pg.event.Event]:
+		self.stats.pause(game.state)
+		if self.stats.frames == self.stats.warmup and self.assets is not None:
+			# the first frame to need an asset still loading would wait for it, which is not drawing
+			for name in list(self.assets.futures):
+				self.assets.wait(name)
+		events = pg.event.get()
+		frame = self.next(game)
+		if frame is None:
+			events.append(pg.event.Event(pg.QUIT))
+		else:
+			keys, self.holding = frame
+			events += [pg.event.Event(pg.KEYDOWN, key=key, unicode=unicode, mod=0, scancode=0) for key, unicode in keys]
+		self.stats.resume()
+		return events
+
+	def held(self, game :Game) -> set[Inputs]:
+		return set(self.holding)
+
+	def elapsed(self, measured :float) -> float:
+		return self.frameSeconds
+
+
+class ScriptedPlayer(ScriptedInput):
+	"""
+	Decides every frame from the game on screen, and keeps what it pressed so the run can be played again: waits out
+	the countdown, lets the greedy bot play for {playFrames} frames, pauses for a second, then holds hard drop until
+	the stack tops out, types initials and waits on the highscore screen for 5 s before starting over	"""
+	playFrames = 600
+	pauseFrames = 60
+	highscoreFrames = 300
+
+	def __init__(self, frameCount :int, stats :FrameStats, seed :int = 0) -> None:
+		super().__init__([], stats)
+		self.frameCount = frameCount
+		self.rng = random.Random(seed)
+		self.state :GameStates | None = None
+		# frames since the game entered its current state
+		self.stateFrames = 0
+		self.paused = False
+
+	def next(self, game :Game) -> Frame | None:
+		if len(self.frames) >= self.frameCount:
+			return None
+		self.stateFrames = self.stateFrames+1 if game.state == self.state else 0
+		self.state = game.state
+		self.frames.append(self.decide(game))
+		return self.frames[-1]
+
+	def decide(self, game :Game) -> Frame:
+		match game.state:
+			case GameStates.playing if not self.paused:
+				if self.stateFrames == self.playFrames:
+					self.paused = True
+					return [(pg.K_ESCAPE, '\x1b')], []
+				# every other frame released, so each press fires once and does not repeat
+				if self.stateFrames%2:
+					return [], []
+				input = greedyPolicy(game, self.rng)[0]
+				return ([(pg.K_c, 'c')], []) if input == Inputs.hold else ([], [input])
+			case GameStates.playing:
+				return [], [Inputs.hardDrop]
+			case GameStates.menu if self.stateFrames == self.pauseFrames:
+				return [(pg.K_ESCAPE, '\x1b')], []
+			case GameStates.initialsInput if self.stateFrames in (10, 12, 14):
+				letter = "abc"[(self.stateFrames-10)//2]
+				return [(getattr(pg, f"K_{letter}"), letter)], []
+			case GameStates.initialsInput if self.stateFrames == 16:
+				return [(pg.K_RETURN, '\r')], []
+			case GameStates.gameover if self.stateFrames == self.highscoreFrames:
+				self.paused = False
+				return [(pg.K_SPACE, ' ')], []
+		return [], []
+
+
+def play(size :str, source :ScriptedInput, seed :int):
+	"Runs the game loop at the preset {size} on {source}, with scores and replays kept in a throwaway directory"
+	logDir = tempfile.mkdtemp()
+	# the game picks its seeds from the global RNG
+	random.seed(seed)
+	loader = main.AssetLoader
+
+	class WatchedLoader(loader):
+		def __init__(self) -> None:
+			super().__init__()
+			source.assets = self
+
+	main.AssetLoader = WatchedLoader
+	try:
+		Controller.startSinglePlayer(0, 0, size=tuple(map(int, size.split('x'))), inputSource=source, logDir=logDir)
+	finally:
+		main.AssetLoader = loader
+		shutil.rmtree(logDir)
+
+
+def report(size :str, timed :FrameStats, counted :FrameStats):
+	print(f"{size}: {timed.frames} frames, {timed.warmup} of warm-up left out")
+	print(f"	{'state':<14}{'frames':>7}{'mean':>8}{'p50':>8}{'p99':>8}{'max':>8} ms	{'surfaces':>9}{'fonts':>7}{'Vector2s':>9} per frame")
+	for state in GameStates:
+		times = sorted(timed.times.get(state, []))
+		if not times:
+			continue
+		p50, p99 = times[len(times)//2], times[min(len(times)-1, int(len(times)*0.99))]
+		line = f"	{state.name:<14}{len(times):7}{statistics.fmean(times)*1000:8.3f}{p50*1000:8.3f}{p99*1000:8.3f}{times[-1]*1000:8.3f}"
+		frames = len(counted.times.get(state, []))
+		if frames:
+			line += "	"+"".join(f"{counted.allocations[state][kind]/frames:{width}.1f}" for kind, width in zip(AllocationCounter.kinds, (9, 7, 9)))
+		print(line, flush=True)
+
+
+if __name__ == "__main__":
+	with open('./resolutions.json', 'r') as f:
+		presets = list(json.load(f))
+
+	parser = argparse.ArgumentParser(description="Frame times and allocations of the whole game loop, per game state and resolution preset")
+	parser.add_argument("presets", nargs="*", help=f"window sizes to run, all presets by default: {', '.join(presets)}")
+	parser.add_argument("--frames", type=int, default=1500, help="frames the scripted player plays per preset (default 1500)")
+	parser.add_argument("--warmup", type=int, default=60, help="first frames left out of the statistics (default 60)")
+	parser.add_argument("--seed", type=int, default=0)
+	source = parser.add_mutually_exclusive_group()
+	source.add_argument("--record", metavar="FILE", help="save the frames the script played, at the first preset")
+	source.add_argument("--replay", metavar="FILE", help="play frames saved with --record instead of the script")
+	args = parser.parse_args()
+
+	recorded = None
+	if args.replay:
+		with open(args.replay) as f:
+			recorded = [(list(map(tuple, keys)), list(map(Inputs, held))) for keys, held in json.load(f)]
+
+	for size in args.presets or presets:
+		timed = FrameStats(args.warmup)
+		if recorded is None:
+			player = ScriptedPlayer(args.frames, timed, args.seed)
+			play(size, player, args.seed)
+			frames = player.frames
+			if args.record:
+				with open(args.record, 'w') as f:
+					json.dump([[keys, [int(input) for input in held]] for keys, held in frames], f)
+				print(f"{len(frames)} frames saved to {args.record}")
+				recorded = frames
+		else:
+			frames = recorded
+			play(size, ScriptedInput(frames, timed), args.seed)
+
+		# the same frames again, instrumented, the counting slows them down too much to time them in the same run
+		counted = FrameStats(args.warmup, AllocationCounter())
+		with counted.counter:
+			play(size, ScriptedInput(frames, counted), args.seed)
+		assert counted.states == timed.states, "the instrumented run played out differently, the game is not deterministic on these frames"
+		report(size, timed, counted)
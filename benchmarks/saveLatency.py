@@ -0,0 +1,96 @@
+"""
+Checks saving a game never holds up a frame: a 60 fps loop records a game into a store of 10^5 games and saves
+its replay while the disk takes {diskStall} per flush (an SD card or a busy drive), once writing on the frame
+and once through the background writer, and every frame of the background run must stay within the budget
+Run from the repository root: python -m benchmarks.saveLatency
+"""
+import json, os, random, tempfile, time
+from backgroundWriter import BackgroundWriter
+from scoreStore import ScoreStore
+from benchmarks.scoreStore import makeGame
+from game import Game, GameStates
+from inputLog import InputLog
+from simulate import greedyPolicy
+
+
+frameBudget = 1/60
+diskStall = 0.1
+frames = 60
+
+
+def slowFsync(fsync):
+	def stalled(fd):
+		time.sleep(diskStall)
+		fsync(fd)
+	return stalled
+
+
+def finishedReplay(seed :int) -> InputLog:
+	rng = random.Random(seed)
+	game = Game(True, seed=seed)
+	game.state = GameStates.playing
+	log = InputLog.forGame(game)
+	frame = 0
+	while game.state == GameStates.playing and frame < 20000:
+		for input in greedyPolicy(game, rng):
+			frame += 1
+			log.apply(game, frame, input)
+			if game.state != GameStates.playing:
+				break
+	log.finish(game)
+	return log
+
+
+def run(directory :str, store :ScoreStore, writer :BackgroundWriter | None, replay :InputLog, entry :dict) -> list[float]:
+	"Frame times of a second of frames with the save on the first, polling the writer like `Controller` does"
+	saved = []
+	times = []
+	for frame in range(frames):
+		start = time.perf_counter()
+		if writer is not None:
+			writer.poll()
+		if frame == 0:
+			store.record(dict(entry), onSaved=lambda: saved.append(store.leaderboard()))
+			if writer is None:
+				replay.save(os.path.join(directory, "replays", "sync.tlog"))
+			else:
+				writer.submit(lambda: replay.save(os.path.join(directory, "replays", "background.tlog")))
+			assert store.leaderboard()[0] == (entry['Initials'], entry['Score']), "the leaderboard must have the game right away"
+		# stand-in for a frame's simulation and drawing
+		while time.perf_counter()-start < 0.002:
+			pass
+		times.append(time.perf_counter()-start)
+		time.sleep(max(0.0, frameBudget-(time.perf_counter()-start)))
+	if writer is not None:
+		writer.close()
+	assert saved, "the save callback never ran"
+	return times
+
+
+if __name__ == "__main__":
+	rng = random.Random(0)
+	replay = finishedReplay(0)
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "scores.jsonl")
+		with open(path, 'w') as f:
+			for i in range(10**5):
+				f.write(json.dumps(makeGame(rng, i))+'\n')
+		ScoreStore(path)
+
+		fsync = os.fsync
+		os.fsync = slowFsync(fsync)
+		try:
+			results = {}
+			for name, writer in (("on the frame", None), ("background writer", BackgroundWriter(raiseErrors=True))):
+				entry = {**makeGame(rng, 10**5), 'Score': 10**6+len(results), 'Initials': name[:3].upper()}
+				times = run(directory, ScoreStore(path, writer=writer), writer, replay, entry)
+				results[name] = times
+				print(f"{name:18}	save frame {times[0]*1000:7.2f} ms	worst {max(times)*1000:7.2f} ms	over budget {sum(t > frameBudget for t in times):2}/{frames}")
+		finally:
+			os.fsync = fsync
+
+		reopened = ScoreStore(path)
+		assert len(reopened) == 10**5+2 and reopened.leaderboard(2) == [("BAC", 10**6+1), ("ON ", 10**6)], "both saves must be on disk"
+		assert InputLog.load(os.path.join(directory, "replays", "background.tlog")).toBytes() == replay.toBytes()
+		assert max(results["background writer"]) <= frameBudget, "a frame went over budget while saving in the background"
+		print(f"no frame over {frameBudget*1000:.1f} ms while saving in the background")
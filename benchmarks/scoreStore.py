@@ -0,0 +1,76 @@
+"""
+High score store at 10^5 and 10^6 games: opening it, recording a game and fetching the leaderboard, next to the
+old YAML read-modify-write (at a size it can still get through)
+Run from the repository root: python -m benchmarks.scoreStore
+"""
+import json, os, random, tempfile, time
+import yaml
+from scoreStore import ScoreStore
+
+
+def makeGame(rng :random.Random, i :int) -> dict:
+	return {
+		"Game": f"Game @ {i}",
+		"Total Gametime": "0:05:00",
+		"Total Lines": rng.randint(0, 200),
+		"Level": rng.randint(0, 20),
+		"Score": rng.randint(0, 100000),
+		"Drought at Game Over": {pieceType: rng.randint(0, 25) for pieceType in "IJLOSTZ"},
+		"Initials": "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=3)),
+	}
+
+
+def timeStore(directory :str, size :int, records :int = 1000):
+	rng = random.Random(size)
+	path = os.path.join(directory, f"scores{size}.jsonl")
+	with open(path, 'w') as f:
+		for i in range(size):
+			f.write(json.dumps(makeGame(rng, i))+'\n')
+
+	start = time.perf_counter()
+	store = ScoreStore(path)
+	rebuild = time.perf_counter()-start
+
+	start = time.perf_counter()
+	store = ScoreStore(path)
+	reopen = time.perf_counter()-start
+	assert len(store) == size
+
+	games = [makeGame(rng, size+i) for i in range(records)]
+	start = time.perf_counter()
+	for game in games:
+		store.record(game)
+	record = (time.perf_counter()-start)/records
+
+	start = time.perf_counter()
+	for i in range(records):
+		store.leaderboard()
+	leaderboard = (time.perf_counter()-start)/records
+
+	print(f"{size:>9,} games:	rebuild index {rebuild*1000:9.1f} ms	open {reopen*1000:6.2f} ms	record {record*1e6:7.1f} us/game	leaderboard {leaderboard*1e6:6.1f} us")
+
+
+def timeYaml(directory :str, size :int, records :int = 3):
+	"The pre-store game over: load the whole log, add the game, sort every score and dump it all back"
+	rng = random.Random(size)
+	path = os.path.join(directory, f"gamelogs{size}.yaml")
+	with open(path, 'w') as f:
+		yaml.safe_dump({game.pop("Game"): game for game in (makeGame(rng, i) for i in range(size))}, f)
+
+	start = time.perf_counter()
+	for i in range(records):
+		game = makeGame(rng, size+i)
+		with open(path, 'r+') as f:
+			file :dict = yaml.safe_load(f)
+			f.seek(0)
+			file.update({game.pop("Game"): game})
+			sorted(((g['Initials'], g['Score']) for g in file.values()), key=lambda x: x[1], reverse=True)
+			yaml.safe_dump(file, f)
+	print(f"{size:>9,} games:	YAML read-modify-write {(time.perf_counter()-start)/records*1000:9.1f} ms/game")
+
+
+if __name__ == "__main__":
+	with tempfile.TemporaryDirectory() as directory:
+		timeYaml(directory, 1000)
+		for size in (10**5, 10**6):
+			timeStore(directory, size)
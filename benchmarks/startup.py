@@ -0,0 +1,58 @@
+"""
+Cold start cost of the headless engine vs the pygame front end, each import runs in a fresh interpreter
+The engine import is done with pygame blocked, so it also fails loudly if anything in `game` pulls pygame in
+Then the game itself is started with --startup-report a few times, for the median time to the end of its imports,
+to the first frame and to everything loaded
+Run from the repository root: python -m benchmarks.startup
+"""
+import subprocess, sys, os, re, statistics
+
+
+blockPygame = "import sys; sys.modules['pygame'] = None\n"
+timedImport = """
+import time
+start = time.perf_counter()
+import {module}
+{check}
+print((time.perf_counter()-start)*1000)
+"""
+
+
+def timeImport(module :str, prelude :str = "", check :str = "", runs :int = 5) -> float:
+	"Returns the best of {runs} import times for {module} in milliseconds"
+	env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+	best = float('inf')
+	for i in range(runs):
+		result = subprocess.run([sys.executable, "-c", prelude+timedImport.format(module=module, check=check)], capture_output=True, text=True, env=env)
+		if result.returncode != 0:
+			raise RuntimeError(f"importing {module} failed:\n{result.stderr}")
+		best = min(best, float(result.stdout.strip().splitlines()[-1]))
+	return best
+
+
+def timeGameStart() -> dict[str, float]:
+	"Milliseconds per mark of the game's startup report, the game is stopped as soon as it printed it"
+	env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+	process = subprocess.Popen([sys.executable, "main.py", "--startup-report"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+	try:
+		for line in process.stdout:
+			if line.startswith("startup:"):
+				marks = line.split("|")[0].removeprefix("startup:")
+				return {name.strip(): float(ms) for name, ms in re.findall(r"([a-z ]+?) (\d+) ms", marks)}
+		raise RuntimeError("the game exited without a startup report")
+	finally:
+		process.kill()
+		process.wait()
+
+
+if __name__ == "__main__":
+	engine = timeImport("game", blockPygame, "game.Game(True).dropActivePieceDown()")
+	print(f"game (pygame blocked):	{engine:8.2f} ms")
+	try:
+		frontEnd = timeImport("main")
+		print(f"main (pygame front end):	{frontEnd:8.2f} ms")
+	except RuntimeError as e:
+		print(f"main (pygame front end):	unavailable, {str(e).splitlines()[-1]}")
+	else:
+		runs = [timeGameStart() for i in range(5)]
+		print("main.py startup, median of 5:	"+", ".join(f"{name} {statistics.median(run[name] for run in runs):.0f} ms" for name in runs[0]))
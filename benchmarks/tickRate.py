@@ -0,0 +1,70 @@
+"""
+Checks the fixed 60 Hz simulation tick makes games independent of the frame rate: the same held keys, played
+back at simulated 15, 60 and 240 fps, must apply the same inputs on the same ticks and end on the same game
+Keys are steered by the greedy bot and change every 1/15 s so every frame rate sees them, keys are sampled at
+the end of each frame
+Run from the repository root: python -m benchmarks.tickRate
+"""
+import random
+from game import Game, GameStates, Inputs
+from ticker import Ticker
+from simulate import greedyPolicy
+
+
+slotsPerSecond = 15
+seconds = 180
+
+
+def steer(game :Game, rng :random.Random, schedule :list):
+	"""
+	Appends the keys for the next slot: the first input of the greedy bot's path for the current piece, held
+	for one slot, with every other slot released so each press fires exactly once	"""
+	if schedule and schedule[-1] != (frozenset(), False):
+		schedule.append((frozenset(), False))
+		return
+	input = greedyPolicy(game, rng)[0]
+	schedule.append((frozenset(), True) if input == Inputs.hold else (frozenset({input}), False))
+
+
+def play(schedule :list, seed :int, fps :int) -> tuple:
+	"""
+	Plays the schedule of (held inputs, hold pressed) per 1/15 s slot at {fps} and returns the game's end state
+	and every input applied with its tick. Slots past the end of the schedule are steered by the greedy bot and
+	appended to it, so the first run records the schedule the others replay	"""
+	rng = random.Random(seed)
+	game = Game(True, seed=seed)
+	game.state = GameStates.playing
+	applied = []
+	def apply(tick :int, input :Inputs):
+		applied.append((tick, input))
+		game.applyInput(input)
+	ticker = Ticker(game, apply)
+
+	lastSlot = -1
+	for frame in range(1, seconds*fps+1):
+		# the slot the end of this frame falls in, a key change right on a frame boundary belongs to the next frame
+		slot = -(-frame*slotsPerSecond//fps)-1
+		if slot == len(schedule):
+			steer(game, rng, schedule)
+		held, pressHold = schedule[slot]
+		if pressHold and slot != lastSlot:
+			ticker.press(Inputs.hold)
+		lastSlot = slot
+		ticker.advance(1/fps, held)
+		if game.state != GameStates.playing:
+			break
+	return (tuple(game.bitBoard), game.score, game.totalLines, game.state), applied
+
+
+if __name__ == "__main__":
+	games = 20
+	for seed in range(games):
+		schedule = []
+		results = {fps: play(schedule, seed, fps) for fps in (15, 60, 240)}
+		(state, applied), *others = results.values()
+		for fps, (otherState, otherApplied) in results.items():
+			assert otherApplied == applied, f"seed {seed}: inputs at {fps} fps differ from 15 fps"
+			assert otherState == state, f"seed {seed}: game at {fps} fps ends differently than at 15 fps"
+		lastTick = applied[-1][0]
+		print(f"seed {seed:2}: {len(applied):5} inputs over {lastTick:5} ticks, score {state[1]:6}, {state[2]:3} lines, identical at 15/60/240 fps")
+	print(f"{games} games identical at every frame rate")
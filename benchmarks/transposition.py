@@ -0,0 +1,61 @@
+"""
+The beam search bot with and without a transposition table, on the same seeded games: nodes/sec (boards searched
+per CPU second of `Bot.choose`) and the table's hit rate per beam width. Both have to play exactly the same
+placements. First checks `Game.boardHash`, cached until the board changes, against hashing the board from scratch
+after every input of random play
+Run from the repository root: python -m benchmarks.transposition [--games 4] [--pieces 150] [--bits 8] [width ...]
+"""
+import argparse, random, time
+from game import Game, GameStates, Inputs
+from bot import Bot
+from transposition import TranspositionTable
+
+
+def verifyHashes(games :int, seed :int) -> int:
+	"Plays random inputs to game over on {games} games, returns how many inputs were checked"
+	rng = random.Random(seed)
+	checked = 0
+	for n in range(games):
+		game = Game(n%2 == 1, seed=n)
+		while game.state != GameStates.initialsInput:
+			game.applyInput(rng.choice(list(Inputs)))
+			assert game.boardHash == Game.hashBoard(game.bitBoard), f"hash out of date after {checked} inputs of game {n}"
+			checked += 1
+	return checked
+
+def playGames(bot :Bot, games :int, maxPieces :int) -> tuple[list[tuple[int, int, int]], float]:
+	"Every placement the bot chose, and the CPU seconds it took choosing them"
+	placements = []
+	thinking = 0.0
+	for seed in range(games):
+		game = Game(False, seed=seed)
+		for piece in range(maxPieces):
+			if game.state == GameStates.initialsInput:
+				break
+			start = time.process_time()
+			placement = bot.choose(game)
+			thinking += time.process_time()-start
+			placements.append(placement[:3])
+			for input in placement.path:
+				game.applyInput(input)
+	return placements, thinking
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Bot search speed with and without a transposition table")
+	parser.add_argument("widths", nargs="*", type=int, default=[4, 8, 16], help="beam widths to run (default 4 8 16)")
+	parser.add_argument("--games", type=int, default=4, help="games per width, seeds 0..games-1 (default 4)")
+	parser.add_argument("--pieces", type=int, default=150, help="pieces per game at most (default 150)")
+	parser.add_argument("--bits", type=int, default=8, help="the table has 2**bits slots (default 8)")
+	args = parser.parse_args()
+
+	print(f"hashes match from scratch after {verifyHashes(100, 0)} random inputs")
+	for width in args.widths:
+		plain = Bot(width)
+		placements, plainSeconds = playGames(plain, args.games, args.pieces)
+		table = TranspositionTable(args.bits)
+		tabled = Bot(width, table=table)
+		tabledPlacements, tabledSeconds = playGames(tabled, args.games, args.pieces)
+		assert tabledPlacements == placements, "the table changed what the bot played"
+		print(f"beam {width:3}:	without {plain.nodes/plainSeconds:10,.0f} nodes/sec	with {tabled.nodes/tabledSeconds:10,.0f} nodes/sec	"
+			f"{plainSeconds/tabledSeconds:5.2f}x	hit rate {table.hitRate():6.1%}	{table.replaced} replaced", flush=True)
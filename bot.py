@@ -0,0 +1,284 @@
+"""
+Beam search bot
+
+Every new active piece, each placement it can reach, holding included (see `moveGen`), is locked
+into a copy of the board and the board is scored with a weighted sum of its features: aggregate
+column height, holes, bumpiness, and the points the placement earned under `Game.placePiece`'s
+scoring rule. The best {beamWidth} boards are searched on over the pieces of the next list, which
+are hard dropped straight down into every column and rotation (holding included), keeping the
+best {beamWidth} boards after each piece, and the first placement on the way to the best board
+at the end is played. Given a `TranspositionTable`, the boards a piece makes dropped into a board are worked out
+once and looked up by the board's Zobrist hash (see `Game.zobrist`) and the piece after that: boards reached in
+another order, and the ones the last search already went through, which the next one mostly goes through again.
+
+	python simulate.py --policy beam
+	python main.py --bot
+"""
+import operator, random
+from typing import NamedTuple
+from game import Game, Inputs
+from moveGen import Placement, generatePlacements
+from transposition import TranspositionTable
+
+
+class Weights(NamedTuple):
+	"Per unit of each board feature, boards with higher totals are preferred"
+	aggregateHeight :float = -0.51
+	holes :float = -0.36
+	bumpiness :float = -0.18
+	# a single at level 0 is worth about as much as the weight one cleared line usually gets
+	points :float = 0.019
+
+
+class Drop(NamedTuple):
+	"A board a piece was locked into, `Bot.lock`"
+	board :list[int]
+	hash :int
+	tops :list[int]
+	cells :int
+	lines :int
+	# `Bot.evaluate` of the board
+	value :float
+
+
+class Node(NamedTuple):
+	value :float
+	board :list[int]
+	# Zobrist hash of the board, see `Game.hashBoard`
+	hash :int
+	# see `columnTops`
+	tops :list[int]
+	# filled cells on the board
+	cells :int
+	# metaId of the held piece in its spawn rotation, 0 when none
+	heldPiece :int
+	# index of the next list piece that comes next
+	nextIndex :int
+	totalLines :int
+	points :int
+	first :Placement
+
+
+# metaId -> metaIds of its piece type's differently shaped or placed rotations, O's four rotations are the same
+metaIdToRotations :dict[int, tuple[int, ...]] = {
+	rotations['0']: tuple(dict.fromkeys(rotations.values())) for rotations in Game.typeAndRotToMeta.values()
+}
+
+# (metaId, anchorX, anchorY) -> xor of the Zobrist keys of the cells the piece fills there, for every anchor it fits
+# the board at
+placementKeys :dict[tuple[int, int, int], int] = {}
+for metaID, activeBits in Game.metaIdToActiveBits.items():
+	minX, maxX, minY, maxY = Game.metaIdToXYBounds[metaID]
+	for anchorX in range(-minX, 10-maxX):
+		for anchorY in range(-minY, 20-maxY):
+			key = 0
+			for bit in activeBits:
+				key ^= Game.zobristCells[anchorY+(15-bit)//4][anchorX+(15-bit)%4]
+			placementKeys[metaID, anchorX, anchorY] = key
+
+# columns 3 to 6 of the top two rows, where new pieces spawn
+spawnMask = 0x78
+
+
+def lockPiece(board :list[int], metaID :int, anchorX :int, anchorY :int) -> tuple[list[int], int]:
+	"A copy of {board} with the piece locked in and its full rows cleared, and how many were"
+	shift = anchorX+Game.metaIdToXYBounds[metaID][0]
+	board = board.copy()
+	filled = False
+	for yComponent, rowMask in Game.metaIdToRowMasks[metaID]:
+		row = board[anchorY+yComponent] = board[anchorY+yComponent] | (rowMask << shift)
+		filled |= row == Game.fullRowMask
+	if not filled:
+		return board, 0
+	kept = [row for row in board if row != Game.fullRowMask]
+	return [0]*(20-len(kept)) + kept, 20-len(kept)
+
+def columnTops(board :list[int]) -> list[int]:
+	"The row of the highest filled cell of each column, 20 for empty ones"
+	tops = [20]*10
+	seen = 0
+	for y, row in enumerate(board):
+		new = row & ~seen
+		if not new:
+			continue
+		seen |= new
+		while new:
+			bit = new & -new
+			tops[bit.bit_length()-1] = y
+			new ^= bit
+		if seen == Game.fullRowMask:
+			break
+	return tops
+
+def drops(tops :list[int], metaID :int) -> list[tuple[int, int]]:
+	"Every anchor (x, y) where the piece comes to rest dropped straight down from above the stack"
+	minX, maxX, minY, maxY = Game.metaIdToXYBounds[metaID]
+	bottoms = Game.metaIdToColumnBottoms[metaID]
+	out = []
+	for anchorX in range(-minX, 10-maxX):
+		anchorY = min(tops[anchorX+x]-1-y for x, y in bottoms)
+		if anchorY+minY >= 0:
+			out.append((anchorX, anchorY))
+	return out
+
+
+class Bot:
+	def __init__(self, beamWidth :int = 8, depth :int | None = None, weights :Weights = Weights(), table :TranspositionTable | None = None):
+		"""
+		Keeps the {beamWidth} best boards after every piece, {depth} pieces of the next list are searched, all of them
+		when None. Boards scored are kept in {table} when given, it has to be used with the same weights only	"""
+		self.beamWidth = beamWidth
+		self.depth = depth
+		self.weights = weights
+		self.table = table
+		# boards searched, whether they came from the table or not
+		self.nodes = 0
+
+	def evaluate(self, board :list[int], tops :list[int], cells :int) -> float:
+		"The score of the board's features, the points that led to it are added on top"
+		if (board[0] | board[1]) & spawnMask:
+			# the next piece would spawn into the stack, game over
+			return float('-inf')
+		aggregateHeight = 200-sum(tops)
+		# every cell under a column's top that is not filled is a hole
+		holes = aggregateHeight-cells
+		bumpiness = sum(map(abs, map(operator.sub, tops, tops[1:])))
+		w = self.weights
+		return w.aggregateHeight*aggregateHeight + w.holes*holes + w.bumpiness*bumpiness
+
+	def lock(self, board :list[int], boardHash :int, tops :list[int], cells :int, metaID :int, anchorX :int, anchorY :int) -> Drop:
+		"{board}, whose hash, columns' {tops} and filled {cells} are given, after the piece is locked at the anchor"
+		board, lines = lockPiece(board, metaID, anchorX, anchorY)
+		cells += 4-10*lines
+		if lines:
+			tops = columnTops(board)
+			boardHash = Game.hashBoard(board)
+		else:
+			# nothing moved down, only the piece's columns can have grown
+			tops = tops.copy()
+			for x, y in Game.metaIdToColumnTops[metaID]:
+				if anchorY+y < tops[anchorX+x]:
+					tops[anchorX+x] = anchorY+y
+			boardHash ^= placementKeys[metaID, anchorX, anchorY]
+		return Drop(board, boardHash, tops, cells, lines, self.evaluate(board, tops, cells))
+
+	def expand(self, node :Node, metaID :int) -> list[Drop]:
+		"""
+		The boards of {node} with the piece {metaID} (in its spawn rotation) hard dropped into every column in every
+		rotation, from the table when they were worked out before. The key is the board's hash xored with the key of
+		the piece as the active one, which no board hash has a part in	"""
+		key = node.hash ^ Game.zobristPiece[metaID]
+		table = self.table
+		out = table.get(key) if table is not None else None
+		if out is None:
+			out = []
+			for rotation in metaIdToRotations[metaID]:
+				for anchorX, anchorY in drops(node.tops, rotation):
+					out.append(self.lock(node.board, node.hash, node.tops, node.cells, rotation, anchorX, anchorY))
+			if table is not None:
+				table.put(key, out)
+		self.nodes += len(out)
+		return out
+
+	def best(self, nodes :list[Node]) -> list[Node]:
+		"The {beamWidth} best nodes, a board reached through several placements is kept once"
+		unique = {}
+		for node in nodes:
+			key = (node.hash, node.heldPiece, node.nextIndex)
+			if key not in unique or unique[key].value < node.value:
+				unique[key] = node
+		return sorted(unique.values(), key=lambda node: node.value, reverse=True)[:self.beamWidth]
+
+	def choose(self, game :Game) -> Placement:
+		"The placement to play for the active piece"
+		placements = generatePlacements(game)
+		if not placements:
+			# spawned into the stack, nothing can move, the hard drop ends the game
+			return Placement(game.activePiece, game.anchorX, game.anchorY, False, (Inputs.hardDrop,))
+		activePiece = Game.typeAndRotToMeta[Game.metaIdToTypeAndRot[game.activePiece][0]]['0']
+		# the bot's boards keep the row of each column's highest cell, see `columnTops`
+		tops, cells = [20-height for height in game.columnHeights], game.filledCells
+		pointsWeight = self.weights.points
+		if self.table is not None:
+			self.table.newSearch()
+		beam = []
+		for placement in placements:
+			heldPiece, nextIndex = game.heldPiece, 0
+			if placement.usedHold:
+				# holding with nothing held brings in the first piece of the next list
+				heldPiece, nextIndex = activePiece, 0 if game.heldPiece else 1
+			drop = self.lock(game.bitBoard, game.boardHash, tops, cells, placement.metaId, placement.anchorX, placement.anchorY)
+			points = Game.lineClearPoints[drop.lines]*(game.totalLines//10+1)
+			beam.append(Node(drop.value+pointsWeight*points, drop.board, drop.hash, drop.tops, drop.cells, heldPiece, nextIndex, game.totalLines+drop.lines, points, placement))
+		self.nodes += len(placements)
+		beam = self.best(beam)
+
+		nextList = game.nextList
+		for depth in range(len(nextList) if self.depth is None else min(self.depth, len(nextList))):
+			children = []
+			for node in beam:
+				if node.nextIndex >= len(nextList):
+					children.append(node)
+					continue
+				piece = nextList[node.nextIndex]
+				# (piece played, piece held after, index of the piece after)
+				options = [(piece, node.heldPiece, node.nextIndex+1)]
+				if node.heldPiece:
+					options.append((node.heldPiece, piece, node.nextIndex+1))
+				elif node.nextIndex+1 < len(nextList):
+					options.append((nextList[node.nextIndex+1], piece, node.nextIndex+2))
+				level = node.totalLines//10+1
+				for played, heldPiece, nextIndex in options:
+					for drop in self.expand(node, played):
+						points = node.points+Game.lineClearPoints[drop.lines]*level
+						children.append(Node(drop.value+pointsWeight*points, drop.board, drop.hash, drop.tops, drop.cells, heldPiece, nextIndex, node.totalLines+drop.lines, points, node.first))
+			# a stack too high for any of the next pieces to fit keeps the boards it has
+			beam = self.best(children) or beam
+		return max(beam, key=lambda node: node.value).first
+
+
+def landing(game :Game, path :list[Inputs]) -> tuple[int, int, int] | None:
+	"""
+	(metaId, anchorX, anchorY) where the active piece locks when {path}, ending on its hard drop, is played without
+	gravity, None when a soft drop on the way would lock it early	"""
+	metaID, anchorX, anchorY = game.activePiece, game.anchorX, game.anchorY
+	for input in path[:-1]:
+		match input:
+			case Inputs.left | Inputs.right:
+				dir = -1 if input == Inputs.left else 1
+				if not game.checkPieceCollision(anchorX+dir, anchorY, metaID):
+					anchorX += dir
+			case Inputs.rotateCW | Inputs.rotateCCW:
+				pieceType, pieceRot = game.metaIdToTypeAndRot[metaID]
+				newRot = game.nextRotation[(pieceRot, 1 if input == Inputs.rotateCW else -1)]
+				xKick, yKick = game.getNeededKick(pieceRot, newRot, pieceType, anchorX, anchorY)
+				if (xKick, yKick) != (69, 420):
+					metaID, anchorX, anchorY = game.typeAndRotToMeta[pieceType][newRot], anchorX+xKick, anchorY+yKick
+			case Inputs.softDrop:
+				if game.checkPieceCollision(anchorX, anchorY+1, metaID):
+					return None
+				anchorY += 1
+			case Inputs.hold:
+				metaID, anchorX, anchorY = game.heldPiece or game.nextList[0], 3, -1
+	while not game.checkPieceCollision(anchorX, anchorY+1, metaID):
+		anchorY += 1
+	return metaID, anchorX, anchorY
+
+def trimSoftDrops(game :Game, placement :Placement) -> list[Inputs]:
+	"""
+	{placement}'s path without the soft drops it can do without. Paths drop the piece through the open air before
+	moving it, each input costs a player (or `main.BotInput`) a keypress, so only those a tuck needs are kept	"""
+	path = list(placement.path)
+	target = (placement.metaId, placement.anchorX, placement.anchorY)
+	for i in range(len(path)-2, -1, -1):
+		if path[i] == Inputs.softDrop and landing(game, path[:i]+path[i+1:]) == target:
+			del path[i]
+	return path
+
+
+# 256 slots of up to about 20 KB of boards each, the hit rate levels off there
+defaultBot = Bot(table=TranspositionTable(8))
+
+def beamPolicy(game :Game, rng :random.Random) -> list[Inputs]:
+	"`simulate` policy, the inputs of `defaultBot`'s placement"
+	return list(defaultBot.choose(game).path)
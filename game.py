@@ -0,0 +1,563 @@
+from enum import Enum, IntEnum, auto
+from typing import Callable
+import random
+
+
+# 
+# Rules engine for Tetris, no pygame imports allowed in here so headless
+# simulations can run without SDL, audio devices or a display
+# 
+
+
+class GameStates(Enum):
+	menu = auto()
+	countdown = auto()
+	playing = auto()
+	gameover = auto()
+	initialsInput = auto()
+class Inputs(IntEnum):
+	"Every action a player (or a bot) can apply to a game, values are stable so they can be stored"
+	left = 0
+	right = 1
+	rotateCW = 2
+	rotateCCW = 3
+	softDrop = 4
+	hardDrop = 5
+	hold = 6
+	gravity = 7
+class Game:
+	#	    0      90    180    270
+	# I : 03840  08738  00240  17476
+	# J : 02272  01604  00226  01100
+	# L : 00736  01094  00232  03140
+	# O : 01632  01632  01632  01632
+	# S : 01728  01122  00108  02244
+	# T : 01248  01124  00228  01220
+	# Z : 03168  00612  00198  01224
+
+	"""
+	Pieces are encoded like this:
+	Imagine a 4x4 grid of cells, each cell is either filled or not, 2^16 bits can represent any combination like this
+	Because there are only 4 rotations of a given type of piece (i.e. 'I', 'J', 'T', etc.), any and every piece can
+	be given a "meta id" based on which 4 of the 16 bits are active. Any rotation of a piece is just a permutation 
+	of those 4 bits. Things like color can be deduced by using a hashmap. The x and y components for the anchor of
+	the active piece describe the top left of the 4x4 grid of cells. Hopefully that makes sense.
+	"""
+	
+	fTimeElapsed = -1
+
+	typeAndRotToMeta = {
+		"I" : {
+			"0": 0xF00,
+			"R": 0x2222,
+			"2": 0xF0,
+			"L": 0x4444,
+		},
+		"J" : {
+			"0": 0x8E0,
+			"R": 0x644,
+			"2": 0xE2,
+			"L": 0x44C,
+		},
+		"L" : {
+			"0": 0x2E0,
+			"R": 0x446,
+			"2": 0xE8,
+			"L": 0xC44,
+		},
+		"O" : {
+			"0": 0x660,
+			"R": 0x660,
+			"2": 0x660,
+			"L": 0x660,
+		},
+		"S" : {
+			"0": 0x6C0,
+			"R": 0x462,
+			"2": 0x6C,
+			"L": 0x8C4,
+		},
+		"T" : {
+			"0": 0x4E0,
+			"R": 0x464,
+			"2": 0xE4,
+			"L": 0x4C4,
+		},
+		"Z" : {
+			"0": 0xC60,
+			"R": 0x264,
+			"2": 0xC6,
+			"L": 0x4C8,
+		}
+	}
+	typeList = ["I", "J", "L", "O", "S", "T", "Z"]
+
+	metaIdToActiveBits = {
+		3840: [8, 9, 10, 11], 	# I0
+		8738: [1, 5, 9, 13],	# IR
+		240: [4, 5, 6, 7],		# I2
+		17476: [2, 6, 10, 14],	# IL
+		
+		2272: [5, 6, 7, 11],	# J0
+		1604: [2, 6, 9, 10],	# JR
+		226: [1, 5, 6, 7],		# J2
+		1100: [2, 3, 6, 10],	# JL
+
+		736: [5, 6, 7, 9],		# L0
+		1094: [1, 2, 6, 10],	# LR
+		232: [3, 5, 6, 7],		# L2
+		3140: [2, 6, 10, 11],	# LL
+
+		1632: [5, 6, 9, 10],	# O
+
+		1728: [6, 7, 9, 10],	# S0
+		1122: [1, 5, 6, 10],	# SR
+		108: [2, 3, 5, 6],		# S2
+		2244: [2, 6, 7, 11],	# SL
+
+		1248: [5, 6, 7, 10],	# T0
+		1124: [2, 5, 6, 10],	# TR
+		228: [2, 5, 6, 7],		# T2
+		1220: [2, 6, 7, 10],	# TL
+
+		3168: [5, 6, 10, 11],	# Z0
+		612: [2, 5, 6, 9],		# ZR
+		198: [1, 2, 6, 7],		# Z2
+		1224: [3, 6, 7, 10],	# ZL
+	}
+	metaIdToTypeAndRot = {}
+	for outerK, outerV in typeAndRotToMeta.items():
+		for innerK, innerV in outerV.items():
+			metaIdToTypeAndRot[innerV] = outerK+innerK
+	
+	metaIdToXYBounds = {}
+	for k, v in metaIdToActiveBits.items():
+		minX, maxX, minY, maxY = 4, 0, 4, 0
+		for bit in v:
+			x = (15 - bit) %  4
+			y = (15 - bit) // 4
+			if x < minX:
+				minX = x
+			if x > maxX:
+				maxX = x
+			if y < minY:
+				minY = y
+			if y > maxY:
+				maxY = y
+		metaIdToXYBounds[k] = [minX, maxX, minY, maxY]
+
+	# (current rotation, direction) -> rotation after turning, 1 is clockwise
+	nextRotation = {
+		('0',  1): 'R',
+		('R',  1): '2',
+		('R', -1): '0',
+		('2',  1): 'L',
+		('2', -1): 'R',
+		('L',  1): '0',
+		('L', -1): '2',
+		('0', -1): 'L',
+	}
+
+	# SRS wall kick tests keyed by (old rotation, new rotation, is I piece), y is positive upwards
+	kickTests = {
+		('0', 'R', False): [(0, 0), (-1, 0), (-1,+1), ( 0,-2), (-1,-2)],
+		('R', '0', False): [(0, 0), (+1, 0), (+1,-1), ( 0,+2), (+1,+2)],
+		('R', '2', False): [(0, 0), (+1, 0), (+1,-1), ( 0,+2), (+1,+2)],
+		('2', 'R', False): [(0, 0), (-1, 0), (-1,+1), ( 0,-2), (-1,-2)],
+		('2', 'L', False): [(0, 0), (+1, 0), (+1,+1), ( 0,-2), (+1,-2)],
+		('L', '2', False): [(0, 0), (-1, 0), (-1,-1), ( 0,+2), (-1,+2)],
+		('L', '0', False): [(0, 0), (-1, 0), (-1,-1), ( 0,+2), (-1,+2)],
+		('0', 'L', False): [(0, 0), (+1, 0), (+1,+1), ( 0,-2), (+1,-2)],
+		('0', 'R', True): [(0, 0), (-2, 0), (+1, 0), (+1,+2), (-2,-1)],
+		('R', '0', True): [(0, 0), (+2, 0), (-1, 0), (+2,+1), (-1,-2)],
+		('R', '2', True): [(0, 0), (-1, 0), (+2, 0), (-1,+2), (+2,-1)],
+		('2', 'R', True): [(0, 0), (-2, 0), (+1, 0), (-2,+1), (+1,-1)],
+		('2', 'L', True): [(0, 0), (+2, 0), (-1, 0), (+2,+1), (-1,-1)],
+		('L', '2', True): [(0, 0), (+1, 0), (-2, 0), (+1,+2), (-2,-1)],
+		('L', '0', True): [(0, 0), (-2, 0), (+1, 0), (-2,+1), (+1,-2)],
+		('0', 'L', True): [(0, 0), (+2, 0), (-1, 0), (-1,+2), (+2,-1)],
+	}
+
+	# Bitboard rows: bit x of a row int is set when column x of that row is filled
+	fullRowMask = 0x3FF
+	# points for clearing 0 to 4 lines with one piece, multiplied by the level plus one
+	lineClearPoints = (0, 40, 100, 300, 1200)
+	# Per metaId tuple of (rowOffset, rowMask); masks are shifted right by the piece's minX so that
+	# positioning them on the board is always a non-negative left shift by (anchorX + minX)
+	metaIdToRowMasks = {}
+	for k, v in metaIdToActiveBits.items():
+		minX, maxX, minY, maxY = metaIdToXYBounds[k]
+		rowMasks = [0, 0, 0, 0]
+		for bit in v:
+			rowMasks[(15 - bit) // 4] |= 1 << ((15 - bit) % 4)
+		metaIdToRowMasks[k] = []
+		for y in range(minY, maxY+1):
+			metaIdToRowMasks[k].append((y, rowMasks[y] >> minX))
+		metaIdToRowMasks[k] = tuple(metaIdToRowMasks[k])
+	# Per metaId tuple of (x, y) of the lowest cell of each of the piece's columns, relative to the anchor, and the
+	# same with the highest cell
+	metaIdToColumnBottoms = {}
+	metaIdToColumnTops = {}
+	for k, v in metaIdToActiveBits.items():
+		bottoms, tops = {}, {}
+		for bit in v:
+			x, y = (15-bit)%4, (15-bit)//4
+			bottoms[x] = max(bottoms.get(x, 0), y)
+			tops[x] = min(tops.get(x, 3), y)
+		metaIdToColumnBottoms[k] = tuple(sorted(bottoms.items()))
+		metaIdToColumnTops[k] = tuple(sorted(tops.items()))
+
+	# Zobrist keys, random 64 bit ints xored together into `zobrist`, one for each filled cell (by [y][x]), active
+	# piece metaId, anchor column, anchor row, held piece (none is 0) and for being able to hold. Fixed seed, so hashes
+	# are the same in every process
+	zobristRng = random.Random(0x7E7215)
+	zobristCells = []
+	for y in range(20):
+		zobristCells.append(tuple(map(zobristRng.getrandbits, [64]*10)))
+	zobristPiece = dict(zip(metaIdToActiveBits, map(zobristRng.getrandbits, [64]*len(metaIdToActiveBits))))
+	# anchors a piece of the board can have, with room for kick tests
+	zobristAnchorX = dict(zip(range(-4, 14), map(zobristRng.getrandbits, [64]*18)))
+	zobristAnchorY = dict(zip(range(-4, 24), map(zobristRng.getrandbits, [64]*28)))
+	zobristHeld = {0: 0}
+	for pieceType in typeList:
+		zobristHeld[typeAndRotToMeta[pieceType]['0']] = zobristRng.getrandbits(64)
+	zobristCanHold = zobristRng.getrandbits(64)
+	# [y][row] -> xor of the keys of the cells filled in a bitboard row, a board hashes in one lookup per row
+	zobristRows = []
+	for cellKeys in zobristCells:
+		rowKeys = [0]*(fullRowMask+1)
+		for row in range(1, fullRowMask+1):
+			rowKeys[row] = rowKeys[row & (row-1)] ^ cellKeys[(row & -row).bit_length()-1]
+		zobristRows.append(tuple(rowKeys))
+
+
+	def moveActivePieceHorz(self, dir :int):
+		if self.checkPieceCollision(self.anchorX+dir, self.anchorY, self.activePiece):
+			return
+		self.anchorX += dir
+
+	def placePiece(self):
+		minoType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
+		minX, maxX, minY, maxY = self.metaIdToXYBounds[self.activePiece]
+
+		bitBoard, heights = self.bitBoard, self._columnHeights
+		anchorX, anchorY = self.anchorX, self.anchorY
+		shift = anchorX+minX
+		for yComponent, rowMask in self.metaIdToRowMasks[self.activePiece]:
+			bitBoard[anchorY+yComponent] |= rowMask << shift
+		for xComponent, yComponent in self.metaIdToColumnTops[self.activePiece]:
+			height = 20-(anchorY+yComponent)
+			if height > heights[anchorX+xComponent]:
+				heights[anchorX+xComponent] = height
+		for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), self.metaIdToActiveBits[self.activePiece])):
+			self.gameBoard[anchorY+yComponent][anchorX+xComponent] = minoType
+		wrapped = anchorY+minY < 0
+
+		linesThisPiece = 0
+		for i in range(minY, maxY+1):
+			if bitBoard[anchorY+i] == self.fullRowMask:
+				if not linesThisPiece:
+					topCleared = anchorY+i
+				bitBoard.pop(anchorY+i)
+				bitBoard.insert(0, 0)
+				self.gameBoard.pop(anchorY+i)
+				self.gameBoard.insert(0, ['-' for x in range(10)])
+				linesThisPiece += 1
+		if wrapped:
+			# locked above the board on game over, its rows wrapped around onto the bottom ones
+			self.countHeights()
+		elif linesThisPiece:
+			# a full row has a cell in every column, so columns whose top was above the cleared rows only moved
+			# down, those whose top was the highest cleared row get theirs looked up again from there down
+			rescan = 0
+			for x in range(10):
+				if 20-heights[x] < topCleared:
+					heights[x] -= linesThisPiece
+				else:
+					heights[x] = 0
+					rescan |= 1 << x
+			y = topCleared
+			while rescan and y < 20:
+				found = bitBoard[y] & rescan
+				rescan ^= found
+				while found:
+					bit = found & -found
+					heights[bit.bit_length()-1] = 20-y
+					found ^= bit
+				y += 1
+
+		self.score += self.lineClearPoints[linesThisPiece]*((self.totalLines//10)+1)
+
+		self.totalLines += linesThisPiece
+		self.boardVersion += 1
+		self.activePiece = self.nextList.pop(0)
+		if self.onPiecePlaced is not None: self.onPiecePlaced()
+		self.canHoldPiece = True
+		self.anchorX = 3
+		self.anchorY = -1
+		self.addNextPiece()
+
+	def updateDisplayedBoard(self):
+		outBoard = [row[:] for row in self.gameBoard]
+
+		minoType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
+		for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), self.metaIdToActiveBits[self.activePiece])):
+			outBoard[self.anchorY+yComponent][self.anchorX+xComponent] = minoType
+
+		return outBoard
+
+	def checkPieceCollision(self, anchorX :int, anchorY :int, metaID :int) -> bool:
+		"""
+		Returns True if collision is detected for given piece ( {metaID} ) at given XY anchor ( {anchorX, anchorY} )
+		Falsy condition could be for multiple reasons: cell out of bounds, overlap on filled cell	"""
+
+		minX, maxX, minY, maxY = self.metaIdToXYBounds[metaID]
+		if anchorX+minX < 0 or anchorX+maxX > 9 or anchorY+minY < 0 or anchorY+maxY > 19:
+			return True
+		shift = anchorX+minX
+		bitBoard = self.bitBoard
+		for yComponent, rowMask in self.metaIdToRowMasks[metaID]:
+			if bitBoard[anchorY+yComponent] & (rowMask << shift):
+				return True
+		return False
+
+	def stepActivePieceDown(self):
+		newAnchorY = self.anchorY
+		if not self.checkPieceCollision(self.anchorX, newAnchorY+1, self.activePiece):
+			# print(newAnchorY)
+			self.anchorY = newAnchorY+1
+			return
+		
+
+		self.placePiece()
+	
+	def dropActivePieceDown(self):
+		self.anchorY = self.calcShadowPos()
+		self.placePiece()
+
+	def getNeededKick(self, oldRot, newRot, pieceType, anchorX :int | None = None, anchorY :int | None = None):
+		"""
+		Returns the first SRS kick as an (x, y) offset in anchor space that lets the rotation succeed, (69, 420) if none do
+		Tests from the active piece's anchor unless another anchor is given ( {anchorX, anchorY} )	"""
+		if pieceType == "O":
+			return (0, 0)
+		if anchorX is None: anchorX = self.anchorX
+		if anchorY is None: anchorY = self.anchorY
+
+		# iterate through each available test
+		for xKick, yKick in self.kickTests[(oldRot, newRot, pieceType=="I")]:
+			# if test does not collide, return
+			if not self.checkPieceCollision(anchorX+xKick, anchorY-yKick, self.typeAndRotToMeta[pieceType][newRot]):
+				return (xKick, -yKick)
+		return (69, 420) # No tests work, abort rotation
+
+	def rotateActivePiece(self, dir :int):
+		pieceType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
+
+		assert dir in [ 1, -1], "Variable 'dir' must be of type 'int' with value '1' or '-1'"
+		newRot = self.nextRotation[(pieceRot, dir)]
+		
+		xKick, yKick = self.getNeededKick(pieceRot, newRot, pieceType)
+		if (xKick, yKick) == (69, 420): # No rotation test succeeded, abort
+			return
+		self.anchorX += xKick; self.anchorY += yKick
+		self.activePiece = self.typeAndRotToMeta[pieceType][newRot]
+	
+	def addNextPiece(self):
+		newPieceType = self.typeList[self.rng.randint(0, 6)]
+			
+		if self.isEasymode:
+			for pieceType, piecesDroughtSize in self.droughtCounter.items():
+				if pieceType == newPieceType:
+					continue
+				if piecesDroughtSize >= 25:
+					newPieceType = pieceType
+					break
+				self.droughtCounter[pieceType] += 1
+			self.droughtCounter[newPieceType] = 0
+
+		self.nextList.append(self.typeAndRotToMeta[newPieceType]['0'])
+
+		
+		if self.checkPieceCollision(self.anchorX, self.anchorY, self.activePiece):
+			if self.onGameOver is not None: self.onGameOver()
+			# game over
+			self.state = GameStates.initialsInput
+
+	def holdActivePiece(self):
+		if not self.canHoldPiece:
+			return
+		
+		self.anchorX = 3
+		self.anchorY = -1
+		
+		self.canHoldPiece = False
+		
+		if self.heldPiece == 0:
+			self.heldPiece = self.typeAndRotToMeta[self.metaIdToTypeAndRot[self.activePiece][0]]['0']
+			self.activePiece = self.nextList.pop(0)
+			self.addNextPiece()
+			return
+
+		temp = self.typeAndRotToMeta[self.metaIdToTypeAndRot[self.activePiece][0]]['0']
+		self.activePiece = self.heldPiece
+		self.heldPiece = temp
+
+	def applyInput(self, input :Inputs):
+		match input:
+			case Inputs.left: self.moveActivePieceHorz(-1)
+			case Inputs.right: self.moveActivePieceHorz( 1)
+			case Inputs.rotateCW: self.rotateActivePiece( 1)
+			case Inputs.rotateCCW: self.rotateActivePiece(-1)
+			case Inputs.softDrop: self.stepActivePieceDown()
+			case Inputs.hardDrop: self.dropActivePieceDown()
+			case Inputs.hold: self.holdActivePiece()
+			case Inputs.gravity: self.stepActivePieceDown()
+
+	@classmethod
+	def hashBoard(cls, bitBoard :list[int]) -> int:
+		"Zobrist hash of the locked cells of {bitBoard}, from scratch"
+		h = 0
+		for rowKeys, row in zip(cls.zobristRows, bitBoard):
+			h ^= rowKeys[row]
+		return h
+
+	def pieceHash(self) -> int:
+		"Zobrist hash of the active piece, its anchor, the held piece and whether holding is allowed"
+		return self.zobristPiece[self.activePiece] ^ self.zobristAnchorX[self.anchorX] ^ self.zobristAnchorY[self.anchorY] \
+			^ self.zobristHeld[self.heldPiece] ^ (self.zobristCanHold if self.canHoldPiece else 0)
+
+	@property
+	def boardHash(self) -> int:
+		"Zobrist hash of the locked cells, hashed when first asked for after the board changed (see `boardVersion`)"
+		if self.hashedVersion != self.boardVersion:
+			self._boardHash = self.hashBoard(self.bitBoard)
+			self.hashedVersion = self.boardVersion
+		return self._boardHash
+
+	@property
+	def zobrist(self) -> int:
+		"Zobrist hash of the whole state: the locked cells, the active piece, its anchor and the hold state"
+		return self.boardHash ^ self.pieceHash()
+
+	def rehash(self):
+		"Code that writes `bitBoard` directly, without bumping `boardVersion`, calls this after, and `recount`"
+		self.hashedVersion = None
+
+	def countHeights(self):
+		"Recomputes the columns' heights from `bitBoard`, after rows moved"
+		heights = [0]*10
+		seen = 0
+		for y, row in enumerate(self.bitBoard):
+			new = row & ~seen
+			while new:
+				bit = new & -new
+				heights[bit.bit_length()-1] = 20-y
+				new ^= bit
+			seen |= row
+			if seen == self.fullRowMask:
+				break
+		self._columnHeights = heights
+
+	def recount(self):
+		"""
+		Recomputes the board statistics from scratch. The game keeps the column heights up to date as pieces lock
+		and lines clear, code that writes `bitBoard` directly calls this, and `rehash`, after	"""
+		self.countHeights()
+
+	@property
+	def columnHeights(self) -> tuple[int, ...]:
+		"Per column, how many rows up from the floor its highest filled cell is, 0 for empty ones"
+		return tuple(self._columnHeights)
+
+	# the rest are counted off the board when asked for, a few bit counts, cheaper than keeping them on every lock
+	@property
+	def rowFillCounts(self) -> tuple[int, ...]:
+		"Per row, top to bottom like `bitBoard`, how many of its cells are filled"
+		return tuple(row.bit_count() for row in self.bitBoard)
+
+	@property
+	def aggregateHeight(self) -> int:
+		"Sum of the `columnHeights`"
+		return sum(self._columnHeights)
+
+	@property
+	def filledCells(self) -> int:
+		return sum(row.bit_count() for row in self.bitBoard)
+
+	@property
+	def holes(self) -> int:
+		"Empty cells with a filled cell somewhere above them in their column"
+		return self.aggregateHeight-self.filledCells
+
+	def calcShadowPos(self):
+		"""
+		Returns the anchor Y the active piece would land on if dropped. Cached until the piece moves sideways, rotates
+		or the board changes, stepping down towards the landing row keeps the same answer	"""
+		if self.shadowCache is not None:
+			activePiece, anchorX, boardVersion, fromAnchorY, shadowAnchorY = self.shadowCache
+			if (activePiece, anchorX, boardVersion) == (self.activePiece, self.anchorX, self.boardVersion) and fromAnchorY <= self.anchorY <= shadowAnchorY:
+				return shadowAnchorY
+
+		# above the stack in every column it covers, the piece lands on the highest of them, read off the heights
+		newAnchorY = 20
+		for xComponent, yComponent in self.metaIdToColumnBottoms[self.activePiece]:
+			landing = 19-self._columnHeights[self.anchorX+xComponent]-yComponent
+			if landing < self.anchorY:
+				newAnchorY = None
+				break
+			newAnchorY = min(newAnchorY, landing)
+		if newAnchorY is None:
+			# tucked under an overhang, stepped down instead
+			newAnchorY = self.anchorY
+			while not self.checkPieceCollision(self.anchorX, newAnchorY+1, self.activePiece):
+				newAnchorY += 1
+		self.shadowCache = (self.activePiece, self.anchorX, self.boardVersion, self.anchorY, newAnchorY)
+		return newAnchorY
+
+	def __init__(self, easyMode :bool, onPiecePlaced :Callable[[], None] | None = None, onGameOver :Callable[[], None] | None = None, seed :int | None = None):
+		"""
+		{onPiecePlaced} and {onGameOver} are optional hooks for the front end (sound effects, music),
+		the engine itself never touches audio or the display. Every piece comes from the game's own RNG, so
+		the same {seed} and the same inputs always play out the same game, a seed is picked when none is given	"""
+		self.onPiecePlaced = onPiecePlaced
+		self.onGameOver = onGameOver
+		self.seed :int = random.randrange(1 << 63) if seed is None else seed
+		self.rng = random.Random(self.seed)
+
+		# occupancy of the locked cells, one int per row (see `fullRowMask`)
+		self.bitBoard :list[int] = [0 for x in range(20)]
+		# type plane parallel to `bitBoard`, holds '-' or the mino type of each locked cell for drawing
+		self.gameBoard :list[list[str]] = [['-' for x in range(10)] for x in range(20)]
+		# bumped every time locked cells change, lets the shadow and the display tell when the board is still the same
+		self.boardVersion = 0
+		self.shadowCache :tuple | None = None
+		
+		
+		# self.activePiece = 1124
+		self.activePiece :int = self.typeAndRotToMeta[self.typeList[self.rng.randint(0, 6)]]['0']
+		self.droughtCounter = { type: 0 for type in self.typeList }
+		self.anchorX :int= 3
+		self.anchorY :int= -1
+		self.canHoldPiece = True
+		self.heldPiece = 0
+		self.totalLines = 0
+		self.score = 0
+		self.isEasymode = easyMode
+		self.nextList = []; self.addNextPiece(); self.addNextPiece(); self.addNextPiece()
+		# Zobrist hash of the locked cells and the `boardVersion` it was taken at, see `boardHash` and `zobrist`
+		self._boardHash = 0
+		self.hashedVersion :int | None = None
+		# per column height, kept up to date as pieces lock and lines clear, read through `columnHeights`
+		self._columnHeights :list[int] = [0]*10
+		
+		self.state = GameStates.countdown
+		self.countdownTimer = 3.0
+	
+	def __str__(self):
+		o = ""
+		o += f"fTimeElapsed: 	{self.fTimeElapsed}\n"
+		o += f"Total Lines: 	{self.totalLines}\n"
+		o += f"Level: 		{self.totalLines//10}\n"
+		o += f"Score:		{self.score}"
+		return o
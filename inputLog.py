@@ -0,0 +1,161 @@
+"""
+Compact binary input logs and a headless replayer
+
+A log holds the game's seed and mode, then one record per input applied to the game
+keyed by the pseudo-frame it happened on, then the final state of the game. Records
+are a single byte, high nibble the frame delta since the previous record, low nibble
+the `Inputs` value, a delta that does not fit in 4 bits is escaped to a varint.
+
+	python inputLog.py logs/replays/*.tlog
+
+re-simulates every given log as fast as possible and checks it ends on the recorded
+board, score and line count.
+"""
+import struct, sys, time
+from game import Game, Inputs
+from backgroundWriter import atomicWrite
+
+
+magic = b'TLOG'
+version = 1
+headerFormat = '<4sBB3xq'		# magic, version, easy mode, padding, seed (signed, any 64 bit seed a game can be given)
+footerFormat = '<QI20H'			# score, total lines, bitboard rows
+deltaEscape = 0xF				# frame delta follows as a varint
+endOfInputs = 0xF				# input nibble marking the end of the records, the footer follows
+
+
+class InputLog:
+	def __init__(self, seed :int, easyMode :bool) -> None:
+		self.seed = seed
+		self.easyMode = easyMode
+		self.records :list[tuple[int, Inputs]] = []
+		self.lastFrame = 0
+		# final state, filled in by `finish` (or when loading a finished log)
+		self.score :int | None = None
+		self.totalLines :int | None = None
+		self.bitBoard :list[int] | None = None
+
+	@classmethod
+	def forGame(cls, game :Game) -> "InputLog":
+		return cls(game.seed, game.isEasymode)
+
+	def record(self, frame :int, input :Inputs):
+		# frames only go forwards within a log, anything else is recorded on the last frame seen
+		frame = max(frame, self.lastFrame)
+		self.records.append((frame, input))
+		self.lastFrame = frame
+
+	def apply(self, game :Game, frame :int, input :Inputs):
+		"Records the input and applies it to the game"
+		self.record(frame, input)
+		game.applyInput(input)
+
+	def finish(self, game :Game):
+		self.score = game.score
+		self.totalLines = game.totalLines
+		self.bitBoard = list(game.bitBoard)
+
+	def toBytes(self) -> bytes:
+		out = bytearray(struct.pack(headerFormat, magic, version, self.easyMode, self.seed))
+		previous = 0
+		for frame, input in self.records:
+			delta = frame-previous
+			previous = frame
+			if delta < deltaEscape:
+				out.append((delta << 4) | input)
+				continue
+			out.append((deltaEscape << 4) | input)
+			while True:
+				byte = delta & 0x7F
+				delta >>= 7
+				if delta:
+					out.append(byte | 0x80)
+				else:
+					out.append(byte)
+					break
+		out.append(endOfInputs)
+		if self.bitBoard is not None:
+			out += struct.pack(footerFormat, self.score, self.totalLines, *self.bitBoard)
+		return bytes(out)
+
+	@classmethod
+	def fromBytes(cls, data :bytes) -> "InputLog":
+		fileMagic, fileVersion, easyMode, seed = struct.unpack_from(headerFormat, data)
+		if fileMagic != magic or fileVersion != version:
+			raise ValueError(f"Not a version {version} input log")
+		log = cls(seed, bool(easyMode))
+
+		i = struct.calcsize(headerFormat)
+		frame = 0
+		while True:
+			byte = data[i]; i += 1
+			input, delta = byte & 0xF, byte >> 4
+			if input == endOfInputs:
+				break
+			if delta == deltaEscape:
+				delta, shift = 0, 0
+				while True:
+					byte = data[i]; i += 1
+					delta |= (byte & 0x7F) << shift
+					shift += 7
+					if not byte & 0x80:
+						break
+			frame += delta
+			log.records.append((frame, Inputs(input)))
+		log.lastFrame = frame
+
+		if len(data)-i >= struct.calcsize(footerFormat):
+			log.score, log.totalLines, *log.bitBoard = struct.unpack_from(footerFormat, data, i)
+		return log
+
+	def save(self, path :str):
+		atomicWrite(path, self.toBytes())
+
+	@classmethod
+	def load(cls, path :str) -> "InputLog":
+		with open(path, 'rb') as f:
+			return cls.fromBytes(f.read())
+
+
+def replay(log :InputLog) -> Game:
+	"Re-simulates the log headless and returns the game as it ended"
+	game = Game(log.easyMode, seed=log.seed)
+	# same dispatch as `Game.applyInput`, looked up by value instead of matched per input
+	handlers = [
+		lambda: game.moveActivePieceHorz(-1),
+		lambda: game.moveActivePieceHorz( 1),
+		lambda: game.rotateActivePiece( 1),
+		lambda: game.rotateActivePiece(-1),
+		game.stepActivePieceDown,
+		game.dropActivePieceDown,
+		game.holdActivePiece,
+		game.stepActivePieceDown,
+	]
+	for frame, input in log.records:
+		handlers[input]()
+	return game
+
+def verify(log :InputLog) -> Game:
+	"Replays the log and raises AssertionError if the game does not end on the recorded state"
+	game = replay(log)
+	assert log.bitBoard is not None, "log was never finished, there is no final state to compare against"
+	assert game.bitBoard == log.bitBoard, "final board differs"
+	assert (game.score, game.totalLines) == (log.score, log.totalLines), f"final score/lines differ: {(game.score, game.totalLines)} != {(log.score, log.totalLines)}"
+	return game
+
+
+if __name__ == "__main__":
+	paths = sys.argv[1:]
+	failed = inputs = 0
+	start = time.perf_counter()
+	for path in paths:
+		log = InputLog.load(path)
+		inputs += len(log.records)
+		try:
+			verify(log)
+		except AssertionError as e:
+			failed += 1
+			print(f"{path}: {e}")
+	elapsed = time.perf_counter()-start
+	print(f"{len(paths)-failed}/{len(paths)} logs match, {len(paths)/max(elapsed, 1e-9):,.0f} games/sec, {inputs/max(elapsed, 1e-9):,.0f} inputs/sec")
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,71 @@
+"""
+Screen layouts for any window size
+
+`resolutions.json` describes every screen for the 1200x900 reference window. A `Layout`
+scales it to a window size once: positions, sizes, border thicknesses and radii, font
+sizes and spacings are multiplied by how much smaller or larger the window is than the
+reference (the smaller of the two axes, the playing screen is centred along the other),
+rounded to whole pixels and stored as attributes, so drawing reads `layout.board[0].boxPos`
+instead of looking it up in the preset every frame. A non-empty entry for the exact window
+size in `resolutions.json` is used unscaled instead, to hand-tune a size.
+"""
+from pygame import Vector2
+
+
+def scaled(value, scale :float):
+	"A preset value scaled: numbers are rounded to whole pixels (never below 1 when they were positive), pairs become `Vector2`s"
+	if isinstance(value, (int, float)):
+		return max(1, round(value*scale)) if value > 0 else round(value*scale)
+	if value and isinstance(value[0], list):
+		return tuple(scaled(point, scale) for point in value)
+	return Vector2(round(value[0]*scale), round(value[1]*scale))
+
+
+class Elements:
+	"One element of a screen, every key of its preset is an attribute holding the scaled value"
+	def __init__(self, preset :dict, scale :float, offset :Vector2 = Vector2()):
+		for key, value in preset.items():
+			if key.startswith('_'):
+				continue
+			setattr(self, key, scaled(value, scale))
+		if hasattr(self, 'boxPos'):
+			self.boxPos += offset
+
+
+class Layout:
+	referenceSize = (1200, 900)
+	# below this the cells' shadow outline no longer fits in them
+	minMinoSize = 6
+
+	def __init__(self, width :int, height :int, presets :dict):
+		"{presets} is `resolutions.json` as loaded"
+		self.size = (width, height)
+		preset = presets.get(f'{width}x{height}')
+		if preset:
+			self.scale = 1.0
+			offset = Vector2()
+		else:
+			preset = presets['{}x{}'.format(*self.referenceSize)]
+			self.scale = min(width/self.referenceSize[0], height/self.referenceSize[1])
+			offset = Vector2(round((width-self.referenceSize[0]*self.scale)/2), round((height-self.referenceSize[1]*self.scale)/2))
+
+		playing = preset['playing']
+		self.minoSize :int = max(self.minMinoSize, round(playing['minoSize']*self.scale))
+		# in cells, not scaled
+		self.pieceOffsets = {pieceType: Vector2(cells) for pieceType, cells in playing['pieceOffsets'].items() if not pieceType.startswith('_')}
+
+		self.hold = [Elements(elements, self.scale, offset) for elements in playing['hold']]
+		self.nextlist = [Elements(elements, self.scale, offset) for elements in playing['nextlist']]
+		self.level = [Elements(elements, self.scale, offset) for elements in playing['level']]
+		self.score = [Elements(elements, self.scale, offset) for elements in playing['score']]
+		self.piece = [Elements(elements, self.scale, offset) for elements in playing['piece']]
+		self.board = [Elements(elements, self.scale, offset) for elements in playing['board']]
+		for board in self.board:
+			# whole cells, so the grid and the sprites line up whatever the scale
+			board.boxSize = Vector2(10, 20)*self.minoSize
+
+		self.menu = Elements(preset['menu'], self.scale)
+		self.countdown = Elements(preset['countdown'], self.scale)
+		# centred on screen, their boxes have no position
+		self.gameover = Elements(preset['gameover'], self.scale)
+		self.initialsInput = Elements(preset['initialsInput'], self.scale)
@@ -1,8 +1,21 @@
-from copy import deepcopy
-from enum import Enum, auto
+import time
+# start of the startup report, see Controller.startSinglePlayer
+startupBegan = time.perf_counter()
+from game import Game, GameStates, Inputs
+from inputLog import InputLog
+from ticker import Ticker
+from scoreStore import ScoreStore, importYaml
+from layout import Layout, Elements
+from backgroundWriter import BackgroundWriter, atomicWrite
+from assets import AssetLoader
+from profiler import Profiler
 from utilities.signaledge import SignalEdge; from utilities.repeatedPrint import RepeatedPrint as RP
-import random, pygame as pg, math, datetime, time, json, pprint, yaml
+import pygame as pg, math, datetime, json, pprint, argparse, statistics, os, functools, hashlib, io
+from collections import OrderedDict, deque
+from typing import Callable, TYPE_CHECKING
 from pygame import Vector2
+if TYPE_CHECKING:
+	from bot import Bot
 
 
 # 
@@ -10,530 +23,453 @@ from pygame import Vector2
 # Requires Pygame package
 # 
 
-pg.init()
-
-
-class GameStates(Enum):
-	menu = auto()
-	countdown = auto()
-	playing = auto()
-	gameover = auto()
-	initialsInput = auto()
-class Game:
-	#	    0      90    180    270
-	# I : 03840  08738  00240  17476
-	# J : 02272  01604  00226  01100
-	# L : 00736  01094  00232  03140
-	# O : 01632  01632  01632  01632
-	# S : 01728  01122  00108  02244
-	# T : 01248  01124  00228  01220
-	# Z : 03168  00612  00198  01224
+# the mixer is started with the sounds on the asset thread, opening the audio device would hold up the window
+pg.display.init()
+pg.font.init()
+importsDone = time.perf_counter()
 
-	"""
-	Pieces are encoded like this:
-	Imagine a 4x4 grid of cells, each cell is either filled or not, 2^16 bits can represent any combination like this
-	Because there are only 4 rotations of a given type of piece (i.e. 'I', 'J', 'T', etc.), any and every piece can
-	be given a "meta id" based on which 4 of the 16 bits are active. Any rotation of a piece is just a permutation 
-	of those 4 bits. Things like color can be deduced by using a hashmap. The x and y components for the anchor of
-	the active piece describe the top left of the 4x4 grid of cells. Hopefully that makes sense.
-	"""
-	
-	# tests if audio devices are attached to machine
-	canPlayMusic = True
-	try:
-		pg.mixer.init()
-	except:
-		canPlayMusic = False
-	if canPlayMusic:
-		themeSong = pg.mixer.Sound("./assets/mainTheme.ogg")
-		themeSong.set_volume(0.05)
-		popSound = pg.mixer.Sound("./assets/pop.ogg")
-		popSound.set_volume(0.02)
-		gameoverMusic = pg.mixer.Sound("./assets/gameover.ogg")
-		gameoverMusic.set_volume(0.03)
-
-	fTimeElapsed = -1
-
-	typeAndRotToMeta = {
-		"I" : {
-			"0": 0xF00,
-			"R": 0x2222,
-			"2": 0xF0,
-			"L": 0x4444,
-		},
-		"J" : {
-			"0": 0x8E0,
-			"R": 0x644,
-			"2": 0xE2,
-			"L": 0x44C,
-		},
-		"L" : {
-			"0": 0x2E0,
-			"R": 0x446,
-			"2": 0xE8,
-			"L": 0xC44,
-		},
-		"O" : {
-			"0": 0x660,
-			"R": 0x660,
-			"2": 0x660,
-			"L": 0x660,
-		},
-		"S" : {
-			"0": 0x6C0,
-			"R": 0x462,
-			"2": 0x6C,
-			"L": 0x8C4,
-		},
-		"T" : {
-			"0": 0x4E0,
-			"R": 0x464,
-			"2": 0xE4,
-			"L": 0x4C4,
-		},
-		"Z" : {
-			"0": 0xC60,
-			"R": 0x264,
-			"2": 0xC6,
-			"L": 0x4C8,
-		}
-	}
-	typeList = ["I", "J", "L", "O", "S", "T", "Z"]
 
-	metaIdToActiveBits = {
-		3840: [8, 9, 10, 11], 	# I0
-		8738: [1, 5, 9, 13],	# IR
-		240: [4, 5, 6, 7],		# I2
-		17476: [2, 6, 10, 14],	# IL
-		
-		2272: [5, 6, 7, 11],	# J0
-		1604: [2, 6, 9, 10],	# JR
-		226: [1, 5, 6, 7],		# J2
-		1100: [2, 3, 6, 10],	# JL
-
-		736: [5, 6, 7, 9],		# L0
-		1094: [1, 2, 6, 10],	# LR
-		232: [3, 5, 6, 7],		# L2
-		3140: [2, 6, 10, 11],	# LL
-
-		1632: [5, 6, 9, 10],	# O
-
-		1728: [6, 7, 9, 10],	# S0
-		1122: [1, 5, 6, 10],	# SR
-		108: [2, 3, 5, 6],		# S2
-		2244: [2, 6, 7, 11],	# SL
-
-		1248: [5, 6, 7, 10],	# T0
-		1124: [2, 5, 6, 10],	# TR
-		228: [2, 5, 6, 7],		# T2
-		1220: [2, 6, 7, 10],	# TL
-
-		3168: [5, 6, 10, 11],	# Z0
-		612: [2, 5, 6, 9],		# ZR
-		198: [1, 2, 6, 7],		# Z2
-		1224: [3, 6, 7, 10],	# ZL
-	}
-	metaIdToTypeAndRot = {}
-	for outerK, outerV in typeAndRotToMeta.items():
-		for innerK, innerV in outerV.items():
-			metaIdToTypeAndRot[innerV] = outerK+innerK
-	
-	metaIdToXYBounds = {}
-	for k, v in metaIdToActiveBits.items():
-		minX, maxX, minY, maxY = 4, 0, 4, 0
-		for bit in v:
-			x = (15 - bit) %  4
-			y = (15 - bit) // 4
-			if x < minX:
-				minX = x
-			if x > maxX:
-				maxX = x
-			if y < minY:
-				minY = y
-			if y > maxY:
-				maxY = y
-		metaIdToXYBounds[k] = [minX, maxX, minY, maxY]
-
-
-	def moveActivePieceHorz(self, dir :int):
-		if self.checkPieceCollision(self.anchorX+dir, self.anchorY, self.activePiece):
+class Sounds:
+	def __init__(self, assets :AssetLoader) -> None:
+		# silent until the sounds finished loading on the asset thread, and for good without an audio device
+		self.canPlayMusic = False
+		assets.load('sounds', self.load)
+
+	def load(self):
+		# tests if audio devices are attached to machine
+		try:
+			pg.mixer.init()
+		except:
 			return
-		self.anchorX += dir
-
-	def placePiece(self):
-		minoType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
-
-		for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), self.metaIdToActiveBits[self.activePiece])):
-			self.gameBoard[self.anchorY+yComponent][self.anchorX+xComponent] = minoType
-
-		minY, maxY = self.metaIdToXYBounds[self.activePiece][2:]
-		linesThisPiece = 0
-		for i in range(minY, maxY+1):
-			for cell in self.gameBoard[self.anchorY+i]:
-				if cell == '-':
-					break
-			else:
-				self.gameBoard.pop(self.anchorY+i)
-				self.gameBoard.insert(0, ['-' for x in range(10)])
-				linesThisPiece += 1
-
-		match linesThisPiece:
-			case 0:
-				self.score += 0
-			case 1:
-				self.score += 40*((self.totalLines//10)+1)
-			case 2:
-				self.score += 100*((self.totalLines//10)+1)
-			case 3:
-				self.score += 300*((self.totalLines//10)+1)
-			case 4:
-				self.score += 1200*((self.totalLines//10)+1)
-
-
-		self.totalLines += linesThisPiece
-		self.activePiece = self.nextList.pop(0)
+		self.themeSong = pg.mixer.Sound("./assets/mainTheme.ogg")
+		self.themeSong.set_volume(0.05)
+		self.popSound = pg.mixer.Sound("./assets/pop.ogg")
+		self.popSound.set_volume(0.02)
+		self.gameoverMusic = pg.mixer.Sound("./assets/gameover.ogg")
+		self.gameoverMusic.set_volume(0.03)
+		self.canPlayMusic = True
+
+	def onPiecePlaced(self):
 		if self.canPlayMusic: self.popSound.play()
-		self.canHoldPiece = True
-		self.anchorX = 3
-		self.anchorY = -1
-		self.addNextPiece()
-
-	def updateDisplayedBoard(self):
-		outBoard = deepcopy(self.gameBoard)
 
-		minoType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
-		for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), self.metaIdToActiveBits[self.activePiece])):
-			outBoard[self.anchorY+yComponent][self.anchorX+xComponent] = minoType
+	def onGameOver(self):
+		if self.canPlayMusic: self.themeSong.stop(); self.gameoverMusic.play()
 
-		return outBoard
 
-	def checkPieceCollision(self, anchorX :int, anchorY :int, metaID :int) -> bool:
-		"""
-		Returns True if collision is detected for given piece ( {metaID} ) at given XY anchor ( {anchorX, anchorY} )
-		Falsy condition could be for multiple reasons: cell out of bounds, overlap on filled cell	"""
-
-		if sum(list(map(lambda x: (not (0<=anchorX+((15-x)%4)<10))+(not (0<=anchorY+((15-x)//4)<20)), self.metaIdToActiveBits[metaID]))):
-			return True
-		for xComponent, yComponent in list(map(lambda x: ((15-x)%4, (15-x)//4), self.metaIdToActiveBits[metaID])):
-			if self.gameBoard[anchorY+yComponent][anchorX+xComponent] != '-':
-				return True
-		return False
-
-	def stepActivePieceDown(self):
-		newAnchorY = self.anchorY
-		if not self.checkPieceCollision(self.anchorX, newAnchorY+1, self.activePiece):
-			# print(newAnchorY)
-			self.anchorY = newAnchorY+1
-			return
-		
-
-		self.placePiece()
-	
-	def dropActivePieceDown(self):
-		newAnchorY = self.anchorY
-		while not self.checkPieceCollision(self.anchorX, newAnchorY+1, self.activePiece):
-			newAnchorY += 1
-		self.anchorY = newAnchorY
-		self.placePiece()
-
-	def getNeededKick(self, oldRot, newRot, pieceType):
-		if pieceType == "O":
-			return (0, 0)
-		
-		match (oldRot, newRot, pieceType=="I"):
-			case ('0', 'R', False): kickTests = [(0, 0), (-1, 0), (-1,+1), ( 0,-2), (-1,-2)]
-			case ('R', '0', False): kickTests = [(0, 0), (+1, 0), (+1,-1), ( 0,+2), (+1,+2)]
-			case ('R', '2', False): kickTests = [(0, 0), (+1, 0), (+1,-1), ( 0,+2), (+1,+2)]
-			case ('2', 'R', False): kickTests = [(0, 0), (-1, 0), (-1,+1), ( 0,-2), (-1,-2)]
-			case ('2', 'L', False): kickTests = [(0, 0), (+1, 0), (+1,+1), ( 0,-2), (+1,-2)]
-			case ('L', '2', False): kickTests = [(0, 0), (-1, 0), (-1,-1), ( 0,+2), (-1,+2)]
-			case ('L', '0', False): kickTests = [(0, 0), (-1, 0), (-1,-1), ( 0,+2), (-1,+2)]
-			case ('0', 'L', False): kickTests = [(0, 0), (+1, 0), (+1,+1), ( 0,-2), (+1,-2)]
-			case ('0', 'R', True): kickTests = [(0, 0), (-2, 0), (+1, 0), (+1,+2), (-2,-1)]
-			case ('R', '0', True): kickTests = [(0, 0), (+2, 0), (-1, 0), (+2,+1), (-1,-2)]
-			case ('R', '2', True): kickTests = [(0, 0), (-1, 0), (+2, 0), (-1,+2), (+2,-1)]
-			case ('2', 'R', True): kickTests = [(0, 0), (-2, 0), (+1, 0), (-2,+1), (+1,-1)]
-			case ('2', 'L', True): kickTests = [(0, 0), (+2, 0), (-1, 0), (+2,+1), (-1,-1)]
-			case ('L', '2', True): kickTests = [(0, 0), (+1, 0), (-2, 0), (+1,+2), (-2,-1)]
-			case ('L', '0', True): kickTests = [(0, 0), (-2, 0), (+1, 0), (-2,+1), (+1,-2)]
-			case ('0', 'L', True): kickTests = [(0, 0), (+2, 0), (-1, 0), (-1,+2), (+2,-1)]
+class Fonts:
+	"""
+	Font objects by (face, size) and a bounded LRU cache of the text surfaces rendered with them, so a
+	font is only looked up once and a text is only rendered again when it changes	"""
+	maxCachedTexts = 256
+
+	def __init__(self) -> None:
+		self.fonts :dict[tuple[str, int], pg.font.Font] = {}
+		self.texts :OrderedDict[tuple, pg.Surface] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, face :str, size :int) -> pg.font.Font:
+		"{face} is either a font file ('./assets/font.ttf') or the name of a system font ('calibri')"
+		font = self.fonts.get((face, size))
+		if font is None:
+			font = pg.font.Font(face, size) if face.endswith('.ttf') else pg.font.SysFont(face, size)
+			self.fonts[(face, size)] = font
+		return font
+
+	def render(self, face :str, size :int, text :str, color=(255, 255, 255)) -> pg.Surface:
+		key = (face, size, text, tuple(color))
+		surface = self.texts.get(key)
+		if surface is not None:
+			self.hits += 1
+			self.texts.move_to_end(key)
+			return surface
+
+		self.misses += 1
+		surface = self.get(face, size).render(text, 1, color)
+		self.texts[key] = surface
+		if len(self.texts) > self.maxCachedTexts:
+			self.texts.popitem(last=False)
+		return surface
+
+
+class SpriteAtlas:
+	"""
+	The mino and shadow tiles of every piece type at one cell size, in a single surface converted to the display's
+	pixel format: minos in the first row and their shadows in the second, a column per type. Generated atlases are
+	saved in {cacheDir} under the cell size and a hash of the source sprites, so later starts at that size load one
+	image instead of scaling and drawing the tiles again. Building it needs no display, so it can happen on the asset
+	thread, `convert` has to run on the main thread before drawing with it	"""
+	cacheDir = './assets/cache'
+	# part of the cache key, bump when the tiles are drawn differently
+	version = 1
+	pieceTypes = 'IJLSZOT'
+
+	def __init__(self, minoSize :int) -> None:
+		self.minoSize = minoSize
+		# piece type -> area of the atlas its tile is in
+		self.tiles = {pieceType: pg.Rect(i*minoSize, 0, minoSize, minoSize) for i, pieceType in enumerate(self.pieceTypes)}
+		self.shadowTiles = {pieceType: pg.Rect(i*minoSize, minoSize, minoSize, minoSize) for i, pieceType in enumerate(self.pieceTypes)}
+
+		sources = {}
+		digest = hashlib.sha1(str(self.version).encode())
+		for pieceType in self.pieceTypes:
+			with open(f'./assets/{pieceType.lower()}.png', 'rb') as f:
+				sources[pieceType] = f.read()
+			digest.update(sources[pieceType])
+		self.cachePath = f'{self.cacheDir}/atlas_{minoSize}_{digest.hexdigest()[:16]}.png'
+
+		try:
+			surface = pg.image.load(self.cachePath)
+		except (OSError, pg.error):
+			surface = self.generate(sources)
+			try:
+				buffer = io.BytesIO()
+				pg.image.save(surface, buffer, self.cachePath)
+				atomicWrite(self.cachePath, buffer.getvalue())
+			except OSError:
+				# read-only install, it gets generated again next time
+				pass
+		self.surface = surface
+
+	def convert(self) -> "SpriteAtlas":
+		self.surface = self.surface.convert_alpha()
+		return self
+
+	def generate(self, sources :dict[str, bytes]) -> pg.Surface:
+		minoSize = self.minoSize
+		surface = pg.Surface((len(self.pieceTypes)*minoSize, 2*minoSize), pg.SRCALPHA, 32)
+		for pieceType, data in sources.items():
+			image = pg.transform.scale(pg.image.load(io.BytesIO(data), f'{pieceType}.png'), (minoSize, minoSize))
+			# copied as is, blending it onto the transparent atlas would darken its translucent edges
+			surface.blit(image, self.tiles[pieceType], special_flags=pg.BLEND_RGBA_MAX)
+
+			shadowTexture = surface.subsurface(self.shadowTiles[pieceType])
 
-		
-		# iterate through each available test
-		for xKick, yKick in kickTests:
-			# if test does not collide, return
-			if not self.checkPieceCollision(self.anchorX+xKick, self.anchorY-yKick, self.typeAndRotToMeta[pieceType][newRot]):
-				return (xKick, -yKick)
-		return (69, 420) # No tests work, abort rotation
-
-	def rotateActivePiece(self, dir :int):
-		pieceType, pieceRot = self.metaIdToTypeAndRot[self.activePiece]
-
-		assert dir in [ 1, -1], "Variable 'dir' must be of type 'int' with value '1' or '-1'"
-		match (pieceRot, dir):
-			case ('0',  1): newRot = 'R'
-			case ('R',  1): newRot = '2'
-			case ('R', -1): newRot = '0'
-			case ('2',  1): newRot = 'L'
-			case ('2', -1): newRot = 'R'
-			case ('L',  1): newRot = '0'
-			case ('L', -1): newRot = '2'
-			case ('0', -1): newRot = 'L'
-		
-		xKick, yKick = self.getNeededKick(pieceRot, newRot, pieceType)
-		if (xKick, yKick) == (69, 420): # No rotation test succeeded, abort
-			return
-		self.anchorX += xKick; self.anchorY += yKick
-		self.activePiece = self.typeAndRotToMeta[pieceType][newRot]
-	
-	def addNextPiece(self):
-		newPieceType = self.typeList[random.randint(0, 6)]
+			skew = 1
+			swatch = image.get_at((minoSize//2, minoSize//2))
+			shadowColor = pg.Color([x*y for x, y in zip(swatch, [skew, skew, skew])])
 			
-		if self.isEasymode:
-			for pieceType, piecesDroughtSize in self.droughtCounter.items():
-				if pieceType == newPieceType:
-					continue
-				if piecesDroughtSize >= 25:
-					newPieceType = pieceType
-					break
-				self.droughtCounter[pieceType] += 1
-			self.droughtCounter[newPieceType] = 0
-
-		self.nextList.append(self.typeAndRotToMeta[newPieceType]['0'])
-
-		
-		if self.checkPieceCollision(self.anchorX, self.anchorY, self.activePiece):
-			if self.canPlayMusic: self.themeSong.stop(); self.gameoverMusic.play()
-			# game over
-			self.state = GameStates.initialsInput
-
-	def holdActivePiece(self):
-		if not self.canHoldPiece:
-			return
-		
-		self.anchorX = 3
-		self.anchorY = -1
-		
-		self.canHoldPiece = False
-		
-		if self.heldPiece == 0:
-			self.heldPiece = self.typeAndRotToMeta[self.metaIdToTypeAndRot[self.activePiece][0]]['0']
-			self.activePiece = self.nextList.pop(0)
-			self.addNextPiece()
-			return
-
-		temp = self.typeAndRotToMeta[self.metaIdToTypeAndRot[self.activePiece][0]]['0']
-		self.activePiece = self.heldPiece
-		self.heldPiece = temp
+			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2( 1,  1), pg.Vector2( 3,  3), pg.Vector2(minoSize-3,  3), pg.Vector2(minoSize-1,  1)])
+			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2( 1,  1), pg.Vector2( 3,  3), pg.Vector2( 3, minoSize-3), pg.Vector2( 1, minoSize-1)])
+			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2(minoSize-1,  1), pg.Vector2(minoSize-3,  3), pg.Vector2(minoSize-3, minoSize-3), pg.Vector2(minoSize-1, minoSize-1)])
+			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2(minoSize-1, minoSize-1), pg.Vector2(minoSize-3, minoSize-3), pg.Vector2( 3, minoSize-3), pg.Vector2( 1, minoSize-1)])
+		return surface
 
-	def calcShadowPos(self):
-		newAnchorY = self.anchorY
-		while not self.checkPieceCollision(self.anchorX, newAnchorY+1, self.activePiece):
-			newAnchorY += 1
-		return newAnchorY
 
-	def __init__(self, easyMode :bool):
-		self.gameBoard :list[list[str]] = [['-' for x in range(10)] for x in range(20)]
-		
-		
-		# self.activePiece = 1124
-		self.activePiece :int = self.typeAndRotToMeta[self.typeList[random.randint(0, 6)]]['0']
-		self.droughtCounter = { type: 0 for type in self.typeList }
-		self.anchorX :int= 3
-		self.anchorY :int= -1
-		self.canHoldPiece = True
-		self.heldPiece = 0
-		self.totalLines = 0
-		self.score = 0
-		self.isEasymode = easyMode
-		self.nextList = []; self.addNextPiece(); self.addNextPiece(); self.addNextPiece()
-		
-		self.state = GameStates.countdown
-		self.countdownTimer = 3.0
-	
-	def __str__(self):
-		o = ""
-		o += f"fTimeElapsed: 	{self.fTimeElapsed}\n"
-		o += f"Total Lines: 	{self.totalLines}\n"
-		o += f"Level: 		{self.totalLines//10}\n"
-		o += f"Score:		{self.score}"
-		return o
+class FrameScheduler:
+	"""
+	Paces the main loop at {targetFps}, or {idleFps} on screens that barely change. It sleeps until the next frame
+	is due and only busy-waits the last {spinSeconds} for accuracy. With vsync, presenting the frame already
+	waits for the display, so only idle frames are paced here. 0 fps runs uncapped. Frame times and the
+	process' CPU time are kept for the last {historySize} frames. While waiting it calls a poll function every
+	{pollSeconds}, see `KeyboardInput.poll`.
+	With {lateLatch} the wait ends as late as it can instead, the recent time from the end of the wait to the frame
+	being on screen (see `presented`) before the frame is due, so the input read after it is as fresh as it gets
+	when the frame shows. Frames are then due at the frame rate's pace, or with vsync a refresh after the last one
+	was presented, the display taken to refresh at {targetFps}	"""
+	spinSeconds = 0.002
+	pollSeconds = 0.001
+	historySize = 120
+	# late latching plans for this share of the recent frames' work, plus the margin
+	latchPercentile = 0.9
+	latchMargin = 0.001
+
+	def __init__(self, targetFps :int = 60, idleFps :int = 10, vsync :bool = False, lateLatch :bool = False) -> None:
+		self.targetFps = targetFps
+		self.idleFps = idleFps
+		self.vsync = vsync
+		self.lateLatch = lateLatch
+		self.lastTick = time.perf_counter()
+		self.lastCpuTime = time.process_time()
+		self.lastPresent = self.lastTick
+		self.nextFrame = self.lastTick
+		self.frameTimes :deque[float] = deque(maxlen=self.historySize)
+		self.cpuTimes :deque[float] = deque(maxlen=self.historySize)
+		# seconds from the end of each wait to the frame being presented
+		self.workTimes :deque[float] = deque(maxlen=self.historySize)
+
+	def tick(self, idle :bool = False, poll :Callable[[], None] | None = None) -> float:
+		"Waits until the next frame is due, calling {poll} while it does, and returns the seconds since the last call"
+		fps = self.idleFps if idle else self.targetFps
+		if fps and (idle or not self.vsync):
+			period = 1/fps
+			now = time.perf_counter()
+			self.nextFrame += period
+			if self.nextFrame < now-period:
+				# fell more than a frame behind, restart from now instead of rushing frames out to catch up
+				self.nextFrame = now
+			self.waitUntil(self.nextFrame-self.workEstimate() if self.lateLatch else self.nextFrame, poll)
+		elif fps and self.lateLatch:
+			# presenting waits for the next refresh, the wait ends the frame's work before the one after the last
+			self.waitUntil(self.lastPresent+1/fps-self.workEstimate(), poll)
+
+		now, cpuTime = time.perf_counter(), time.process_time()
+		dt = now-self.lastTick
+		self.frameTimes.append(dt)
+		self.cpuTimes.append(cpuTime-self.lastCpuTime)
+		self.lastTick, self.lastCpuTime = now, cpuTime
+		return dt
+
+	def waitUntil(self, due :float, poll :Callable[[], None] | None):
+		"Sleeps, then spins the last {spinSeconds}, until perf_counter reaches {due}"
+		now = time.perf_counter()
+		# slept in slices when polling, so what comes in gets seen within a slice of happening
+		wait = self.pollSeconds if poll is not None else math.inf
+		while due-now > self.spinSeconds:
+			time.sleep(min(due-now-self.spinSeconds, wait))
+			if poll is not None:
+				poll()
+			now = time.perf_counter()
+		while time.perf_counter() < due:
+			pass
+		if poll is not None:
+			poll()
+
+	def presented(self) -> float:
+		"Call once the frame is on screen, returns the perf_counter it was presented at"
+		self.lastPresent = time.perf_counter()
+		self.workTimes.append(self.lastPresent-self.lastTick)
+		return self.lastPresent
+
+	def workEstimate(self) -> float:
+		"Seconds a late latched wait ends before the frame is due"
+		if not self.workTimes:
+			return self.latchMargin
+		ordered = sorted(self.workTimes)
+		return ordered[min(len(ordered)-1, int(len(ordered)*self.latchPercentile))]+self.latchMargin
+
+	@property
+	def cpuUsage(self) -> float:
+		"Share of one core the process used over the recent frames, sleeping frames bring it down"
+		return sum(self.cpuTimes)/max(sum(self.frameTimes), 1e-9)
+
+	@property
+	def frameTime(self) -> float:
+		return statistics.fmean(self.frameTimes) if self.frameTimes else 0.0
+
+	@property
+	def jitter(self) -> float:
+		"Standard deviation of the recent frame times, in seconds"
+		return statistics.pstdev(self.frameTimes) if len(self.frameTimes) > 1 else 0.0
 
 
 class Display:
-	pseudoFramesPerSecond = 60
 	maxFrameHistory = 5
 
-	pseudoFrameCount :int
-	pseudoFrameCountDelta :float
-	pseudoFrameCountLastTrigger :int
-	fTimeElapsed :float
 	fpsHistory :list
 	fpsSum :int
 	pause :bool
 	debug :bool
 
+	# dirty rectangles, see drawWindow
+	fullRedraw :bool
+	dirtyRects :list[pg.Rect]
+	pixelsPushed :int
+
 	highscores = []
 
 	initialsText = ''
 
-	# things for key "listener"
-	perKeyTickCache = {}
-
-	
-	background = pg.image.load('./assets/board.png')
-
-
-	def checkIfKeyShouldExec(self, keycode :int, keys :list[int]):
-		isPressed = keys[keycode]
-		if not isPressed  or  (not keycode in self.perKeyTickCache):
-			#									V    first pressed     V  V     last trigger     V
-			self.perKeyTickCache[keycode] = [self.pseudoFrameCount, self.pseudoFrameCount]
-			return False
-
-		# passes guard clause if it is a new pseudoframe
-		if self.pseudoFrameCount == self.perKeyTickCache[keycode][1]:
-			return False
-		self.perKeyTickCache[keycode][1] = self.pseudoFrameCount
-
-		deltaFrames = self.pseudoFrameCount-self.perKeyTickCache[keycode][0]-1
-		spamFrequency = 4		# in pseudo-frames
-		delayBeforeSpam = 16 	# in pseudo-frames
-		return ((deltaFrames < 1) or (deltaFrames-delayBeforeSpam >= 0 and ((deltaFrames-delayBeforeSpam)%spamFrequency) == 0))
-	
-	
-
-	def drawLevel(self, game :Game, elements :dict):
-		boxPos, boxSize, boxBorderThickness, boxBorderRadius, fontSize \
-		= elements.values()
-		
-		# draws the rounded rectangle for the given box
-		pg.draw.rect(self.screen, (255, 255, 255), (*boxPos, *boxSize), boxBorderThickness, boxBorderRadius)
-		
-		levelText = pg.font.SysFont('calibri', fontSize).render("LEVEL: "+ str(game.totalLines//10), 1, (255, 255, 255))
-		self.screen.blit(levelText, boxPos+(boxSize-Vector2(levelText.get_rect().size))/2)
+	def drawStaticLayer(self, surface :pg.Surface):
+		"""
+		Draws everything of the playing layout that never changes on {surface}: the HUD boxes with their labels
+		and the board's fill, border and cell separators. Composed once per layout into {self.staticLayer}	"""
+		surface.fill((0, 0, 0))
+
+		for label, boxes in (("HOLD", self.layout.hold), ("NEXT", self.layout.nextlist)):
+			for box in boxes:
+				# draws the rounded rectangle for the given box
+				font = self.fonts.render('calibri', box.fontSize, label)
+				surface.blit(font, box.boxPos+(Vector2(box.boxSize[0], box.lineSeparatorPos[0][1]+box.lineSeparatorThickness/2)-Vector2(font.get_rect().size))/2)
+				pg.draw.rect(surface, (255, 255, 255), (*box.boxPos, *box.boxSize), box.boxBorderThickness, box.boxBorderRadius)
+				pg.draw.line(surface, (255, 255, 255), *(box.boxPos+x for x in box.lineSeparatorPos), box.lineSeparatorThickness)
+
+		for box in self.layout.level:
+			# draws the rounded rectangle for the given box
+			pg.draw.rect(surface, (255, 255, 255), (*box.boxPos, *box.boxSize), box.boxBorderThickness, box.boxBorderRadius)
+
+		for box in self.layout.score:
+			# draws the rounded rectangle for the given box
+			pg.draw.rect(surface, (255, 255, 255), (*box.boxPos, *box.boxSize), box.boxBorderThickness, box.boxBorderRadius)
+			pg.draw.line(surface, (255, 255, 255), *(box.boxPos+x for x in box.lineSeparatorPos), box.lineSeparatorThickness)
+
+			labelText = self.fonts.render('calibri', box.fontSizePrimary, "SCORE")
+			surface.blit(labelText, box.boxPos+(Vector2(box.boxSize[0], box.lineSeparatorPos[0][1]+box.lineSeparatorThickness/2)-Vector2(labelText.get_rect().size))/2)
+
+		minoSize = self.layout.minoSize
+		for board in self.layout.board:
+			boxPos = board.boxPos
+
+			# draws fill color of board
+			pg.draw.rect(surface, (26, 26, 26), (*boxPos, *board.boxSize))
+			# draws border color of board as outset border
+			borderOffset = Vector2(board.boxBorderThickness, board.boxBorderThickness)
+			pg.draw.rect(surface, (255, 255, 255), (*(boxPos-borderOffset), *(board.boxSize+borderOffset)), board.boxBorderThickness)
+
+			# cell separators, from the left/top edge of the board to the right/bottom one
+			for y in range(20):
+				pg.draw.line(surface, (255, 255, 255), boxPos+Vector2(0, y*minoSize), boxPos+Vector2(10*minoSize, y*minoSize), board.cellSeparatorThickness)
+			for x in range(10):
+				pg.draw.line(surface, (255, 255, 255), boxPos+Vector2(x*minoSize, 0), boxPos+Vector2(x*minoSize, 20*minoSize), board.cellSeparatorThickness)
+
+	def updateStaticLayer(self):
+		"Recomposes {self.staticLayer} when the layout changed since it was last drawn"
+		if self.staticLayerLayout is self.layout:
+			return
+		self.staticLayer = pg.Surface(self.screen.get_size()).convert()
+		with self.profiler.stage('drawStaticLayer'):
+			self.drawStaticLayer(self.staticLayer)
+		self.staticLayerLayout = self.layout
 
-	def drawScore(self, game :Game, elements :dict):
-		boxPos, boxSize, boxBorderThickness, boxBorderRadius, fontSizePrimary, fontSizeSecondary, lineSeparatorPos, lineSeparatorThickness \
-		= elements.values()
-		boxPos = Vector2(boxPos)
-		
-		# draws the rounded rectangle for the given box
-		pg.draw.rect(self.screen, (255, 255, 255), (*boxPos, *boxSize), boxBorderThickness, boxBorderRadius)
-		pg.draw.line(self.screen, (255, 255, 255), *(boxPos+Vector2(x) for x in lineSeparatorPos), lineSeparatorThickness)
-		
-		labelText = pg.font.SysFont('calibri', fontSizePrimary).render("SCORE", 1, (255, 255, 255))
-		scoreText = pg.font.SysFont('calibri', fontSizeSecondary).render(str(game.score), 1, (255, 255, 255))
-		self.screen.blit(labelText, boxPos+(Vector2(boxSize[0], lineSeparatorPos[0][1]+lineSeparatorThickness/2)-Vector2(labelText.get_rect().size))/2)
-		self.screen.blit(scoreText, boxPos+(boxSize-Vector2(scoreText.get_rect().size)+Vector2(0, -2*boxBorderThickness+lineSeparatorPos[0][1]+lineSeparatorThickness/2))/2)
-
-	def drawHold(self, game :Game, elements :dict):
-		boxPos, boxSize, boxBorderThickness, boxBorderRadius, fontSize, lineSeparatorPos, lineSeparatorThickness \
-		= elements.values()
-		boxPos = Vector2(boxPos)
-		
-		# draws the rounded rectangle for the given box
-		font = pg.font.SysFont('calibri', fontSize).render("HOLD", 1, (255, 255, 255))
-		self.screen.blit(font, boxPos+(Vector2(boxSize[0], lineSeparatorPos[0][1]+lineSeparatorThickness/2)-Vector2(font.get_rect().size))/2)
-		pg.draw.rect(self.screen, (255, 255, 255), (*boxPos, *boxSize), boxBorderThickness, boxBorderRadius)
-		pg.draw.line(self.screen, (255, 255, 255), *(boxPos+Vector2(x) for x in lineSeparatorPos), lineSeparatorThickness)
-		
-		piecePos = (boxSize + Vector2(0, lineSeparatorPos[0][1]+(lineSeparatorThickness/2)-boxBorderThickness))/2
+	def preparePlaying(self, wait :bool = True) -> bool:
+		"""
+		Gets the sprite atlas and the static layer of the playing screen ready. Returns False, having done nothing,
+		when the atlas is still loading and not to {wait} for	"""
+		if self.atlas is None:
+			atlas = self.assets.wait(('atlas', self.layout.minoSize)) if wait else self.assets.get(('atlas', self.layout.minoSize))
+			if atlas is None:
+				return False
+			self.atlas = atlas.convert()
+		self.updateStaticLayer()
+		return True
+
+	def drawLevel(self, game :Game, box :Elements):
+		levelText = self.fonts.render('calibri', box.fontSize, "LEVEL: "+ str(game.totalLines//10))
+		self.screen.blit(levelText, box.boxPos+(box.boxSize-Vector2(levelText.get_rect().size))/2)
+
+	def drawScore(self, game :Game, box :Elements):
+		scoreText = self.fonts.render('calibri', box.fontSizeSecondary, str(game.score))
+		self.screen.blit(scoreText, box.boxPos+(box.boxSize-Vector2(scoreText.get_rect().size)+Vector2(0, -2*box.boxBorderThickness+box.lineSeparatorPos[0][1]+box.lineSeparatorThickness/2))/2)
+
+	def drawHold(self, game :Game, box :Elements):
+		minoSize = self.layout.minoSize
+		piecePos = (box.boxSize + Vector2(0, box.lineSeparatorPos[0][1]+(box.lineSeparatorThickness/2)-box.boxBorderThickness))/2
 		if game.heldPiece != 0:
-			for x, y in list(map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[game.heldPiece])):
-				offset = self.playingElements['pieceOffsets'][game.metaIdToTypeAndRot[game.heldPiece][0]]
-				boardVector = Vector2(x, y)
-				position = boxPos+piecePos+(boardVector-offset)*self.playingElements['minoSize']
-				self.screen.blit(
-					self.typeToImage[game.metaIdToTypeAndRot[game.heldPiece][0]], (
-					position,
-					Vector2(self.playingElements['minoSize'], self.playingElements['minoSize']))
-				)
-
-	def drawNextlist(self, game :Game, elements :dict):
-		boxPos, boxSize, boxBorderThickness, boxBorderRadius, fontSize, lineSeparatorPos, lineSeparatorThickness, indexOffset \
-		= elements.values()
-		boxPos = Vector2(boxPos)
-		
-		# draws the rounded rectangle for the given box
-		font = pg.font.SysFont('calibri', fontSize).render("NEXT", 1, (255, 255, 255))
-		self.screen.blit(font, boxPos+(Vector2(boxSize[0], lineSeparatorPos[0][1]+lineSeparatorThickness/2)-Vector2(font.get_rect().size))/2)
-		pg.draw.rect(self.screen, (255, 255, 255), (*boxPos, *boxSize), boxBorderThickness, boxBorderRadius)
-		pg.draw.line(self.screen, (255, 255, 255), *(boxPos+Vector2(x) for x in lineSeparatorPos), lineSeparatorThickness)
-
-		piecePos = (boxSize + Vector2(0, lineSeparatorPos[0][1]+(lineSeparatorThickness/2)-boxBorderThickness))/2
+			pieceType = game.metaIdToTypeAndRot[game.heldPiece][0]
+			offset = self.layout.pieceOffsets[pieceType]
+			self.screen.blits([
+				(self.atlas.surface, box.boxPos+piecePos+(Vector2(x, y)-offset)*minoSize, self.atlas.tiles[pieceType])
+				for x, y in map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[game.heldPiece])
+			], doreturn=False)
+
+	def drawNextlist(self, game :Game, box :Elements):
+		minoSize = self.layout.minoSize
+		piecePos = (box.boxSize + Vector2(0, box.lineSeparatorPos[0][1]+(box.lineSeparatorThickness/2)-box.boxBorderThickness))/2
+		blits = []
 		for i, metaID in enumerate(game.nextList):
-			for x, y in list(map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[metaID])):
-				offset = self.playingElements['pieceOffsets'][game.metaIdToTypeAndRot[metaID][0]]
-				boardVector = Vector2(x, y)
-				indexOffsetVector = Vector2(0, (i-1)*indexOffset)
-				position = boxPos+piecePos+(boardVector-offset)*self.playingElements['minoSize']+indexOffsetVector
-				self.screen.blit(
-					self.typeToImage[game.metaIdToTypeAndRot[metaID][0]], (
-					position,
-					Vector2(self.playingElements['minoSize'], self.playingElements['minoSize']))
-				)
-
-	def drawBoard(self, game :Game, elements :dict):
-		boxPos, boxSize, boxBorderThickness, cellSeparatorThickness \
-		= elements.values()
-		board = game.updateDisplayedBoard()
-
-		boxPos = Vector2(boxPos)
-		
-		# draws fill color of board
-		pg.draw.rect(self.screen, (26, 26, 26), (*boxPos, *boxSize))
-		# draws border color of board as outset border
-		borderOffset = Vector2(boxBorderThickness, boxBorderThickness)
-		pg.draw.rect(self.screen, (255, 255, 255), (*(boxPos-borderOffset), *(boxSize+borderOffset)), boxBorderThickness)
-
-		# Converts index values from board space coordinates (10x20) as integer tuples into screenspace coordinates as pygame.Vector2
-		# Iterates through separator ending positions and draws them on the screen
-		horizontalSeparators :list[Vector2]= list(map(lambda x: (Vector2(x)*self.playingElements['minoSize']), zip([10 for x in range(20)], range(20))))
-		for position in horizontalSeparators:
-			pg.draw.line(self.screen, (255, 255, 255), boxPos+Vector2(0, position.y), boxPos+position, cellSeparatorThickness)
-		verticalSeparators :list[Vector2]= list(map(lambda x: (Vector2(x)*self.playingElements['minoSize']), zip(range(10), [20 for x in range(10)])))
-		for position in verticalSeparators:
-			pg.draw.line(self.screen, (255, 255, 255), boxPos+Vector2(position.x, 0), boxPos+position, cellSeparatorThickness)
-
-		
-		for j in range(len(board)):
-			for i in range(len(board[j])):
-				if board[j][i] != '-':
-					tup = boxPos + Vector2(i, j)*self.playingElements['minoSize']
-					image = self.typeToImage[board[j][i].upper()]
-					self.screen.blit(image, (tup[0], tup[1], 40, 40))
-
-	def drawPiece(self, game :Game, elements :dict):
-		boxPos = elements['boxPos']
-		boxPos = Vector2(boxPos)
-
-		
+			pieceType = game.metaIdToTypeAndRot[metaID][0]
+			offset = self.layout.pieceOffsets[pieceType]
+			indexOffsetVector = Vector2(0, (i-1)*box.indexOffset)
+			for x, y in map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[metaID]):
+				position = box.boxPos+piecePos+(Vector2(x, y)-offset)*minoSize+indexOffsetVector
+				blits.append((self.atlas.surface, position, self.atlas.tiles[pieceType]))
+		self.screen.blits(blits, doreturn=False)
+
+	def cellRect(self, board :Elements, region :tuple[int, int, int, int]) -> pg.Rect:
+		"Screen rect of an inclusive (x0, y0, x1, y1) range of cells of {board}"
+		x0, y0, x1, y1 = region
+		minoSize = self.layout.minoSize
+		return pg.Rect(board.boxPos[0]+x0*minoSize, board.boxPos[1]+y0*minoSize, (x1-x0+1)*minoSize, (y1-y0+1)*minoSize)
+
+	def cellsIn(self, regions :list[tuple[int, int, int, int]] | None) -> set[tuple[int, int]]:
+		"Every (x, y) cell of the cell ranges {regions}, each once where they overlap, or of the whole board when there are none"
+		return {(i, j) for x0, y0, x1, y1 in regions or [(0, 0, 9, 19)] for j in range(y0, y1+1) for i in range(x0, x1+1)}
+
+	def drawBoard(self, game :Game, board :Elements, regions :list[tuple[int, int, int, int]] | None = None):
+		"""
+		Draws the locked cells and then the active piece over the static layer, on the whole board or only in the
+		given cell ranges ( {regions}, see `cellRect` ), which are first reset from the static layer. Each layer
+		is one batch of blits from the atlas	"""
+		boxPos = board.boxPos
+		minoSize = self.layout.minoSize
+		atlas, tiles = self.atlas.surface, self.atlas.tiles
+		pieceTile = tiles[game.metaIdToTypeAndRot[game.activePiece][0].upper()]
+		pieceCells = [(game.anchorX+(15-bit)%4, game.anchorY+(15-bit)//4) for bit in game.metaIdToActiveBits[game.activePiece]]
+		cells = self.cellsIn(regions)
+
+		for region in regions or []:
+			rect = self.cellRect(board, region)
+			self.screen.blit(self.staticLayer, rect, rect)
+
+		# locked cells layer
+		self.screen.blits([
+			(atlas, boxPos + Vector2(i, j)*minoSize, tiles[game.gameBoard[j][i].upper()])
+			for i, j in cells if game.gameBoard[j][i] != '-'
+		], doreturn=False)
+
+		# active piece layer
+		self.screen.blits([(atlas, boxPos + Vector2(i, j)*minoSize, pieceTile) for i, j in pieceCells if (i, j) in cells], doreturn=False)
+
+	def drawPiece(self, game :Game, piece :Elements, regions :list[tuple[int, int, int, int]] | None = None):
+		"Draws the shadow layer, on cells neither locked nor covered by the active piece, in the given cell ranges if any"
+		boxPos = piece.boxPos
+		minoSize = self.layout.minoSize
 
-		# draws shadow of piece
 		shadowAnchorY = game.calcShadowPos()
 		pieceType, pieceRot = game.metaIdToTypeAndRot[game.activePiece]
-		for cellX, cellY in list(map(lambda x: ((15-x)%4, (15-x)//4), game.metaIdToActiveBits[game.activePiece])):
-			if game.updateDisplayedBoard()[shadowAnchorY+cellY][game.anchorX+cellX] != '-':
+		shadowTile = self.atlas.shadowTiles[pieceType]
+		cells = self.cellsIn(regions)
+		pieceCells = [((15-bit)%4, (15-bit)//4) for bit in game.metaIdToActiveBits[game.activePiece]]
+		blits = []
+		for cellX, cellY in pieceCells:
+			i, j = game.anchorX+cellX, shadowAnchorY+cellY
+			if (i, j) not in cells:
+				continue
+			if game.gameBoard[j][i] != '-' or (cellX, j-game.anchorY) in pieceCells:
 				continue
-			tup = boxPos + Vector2(game.anchorX+cellX, shadowAnchorY+cellY)*self.playingElements['minoSize']
-			self.screen.blit(self.typeToShadowImage[pieceType], (*tup, *Vector2(self.playingElements['minoSize'], self.playingElements['minoSize'])))
+			blits.append((self.atlas.surface, boxPos + Vector2(i, j)*minoSize, shadowTile))
+		self.screen.blits(blits, doreturn=False)
+
+	def latencyLine(self, name :str, latencies :deque[float]) -> str:
+		ordered = sorted(latencies)
+		return f"{name}: p50 {ordered[len(ordered)//2]*1000:.2f} ms, p99 {ordered[min(len(ordered)-1, int(len(ordered)*0.99))]*1000:.2f} ms"
 
 	def drawFrameRate(self):
 		fps = self.fpsSum / self.maxFrameHistory
 
-		font = pg.font.SysFont("Arial", 36)
-		fps_text = font.render(f"FPS: {fps:.2f}", 1, (255,255,255))
-
-		self.screen.blit(fps_text, (10, 10))
-
-
-	def drawHighScores(self, elements :dict):
-		garbage, headerFontSize, listFontSize, boxSize, boxBorderThickness, boxBorderRadius, lineSeparatorPos, lineSeparatorThickness, elementSpacing \
-		= elements.values()
+		# changes every frame, rendered straight from the font instead of going through the text cache
+		font = self.fonts.get("Arial", 36)
+		lines = [
+			f"FPS: {fps:.2f}",
+			f"{self.pixelsPushed} px pushed",
+			f"text cache: {self.fonts.hits} hits, {self.fonts.misses} misses",
+			f"CPU: {self.scheduler.cpuUsage:.0%}, frame: {self.scheduler.frameTime*1000:.2f} ms, jitter: {self.scheduler.jitter*1000:.2f} ms",
+		]
+		if self.inputLatencies:
+			# key event to the game changing from it, see `Ticker`, and to that change being on screen
+			lines.append(self.latencyLine("input to game", self.inputLatencies))
+		if self.presentLatencies:
+			lines.append(self.latencyLine("input to present", self.presentLatencies) + (" (late latch)" if self.scheduler.lateLatch else ""))
+		for i, line in enumerate(lines):
+			self.blitOverlay(font.render(line, 1, (255,255,255)), (10, 10+i*font.get_linesize()))
+
+		# rolling median and 99th percentile of every stage of the loop, see `Profiler`
+		top = 10+len(lines)*font.get_linesize()
+		font = self.fonts.get("Arial", 22)
+		for i, (name, p50, p99) in enumerate(self.profiler.percentiles()):
+			line = f"{name}: p50 {p50*1000:.2f} ms, p99 {p99*1000:.2f} ms"
+			self.blitOverlay(font.render(line, 1, (255,255,255)), (10, top+i*font.get_linesize()))
+
+	def blitOverlay(self, surface :pg.Surface, pos):
+		"Blits a debug overlay surface, keeping what it covers so the next frame can put it back"
+		rect = pg.Rect(pos, surface.get_size()).clip(self.screen.get_rect())
+		self.overlayUnder.append((rect, self.screen.subsurface(rect).copy()))
+		self.screen.blit(surface, pos)
+		self.overlayRects.append(rect)
+
+	def drawRepaintedRegions(self, repainted :list[pg.Rect]):
+		"Debug overlay outlining the regions repainted this frame"
+		for rect in repainted:
+			outline = pg.Surface(rect.size, pg.SRCALPHA)
+			pg.draw.rect(outline, (255, 0, 255), outline.get_rect(), 2)
+			self.blitOverlay(outline, rect.topleft)
+
+
+	def drawHighScores(self, box :Elements):
+		headerFontSize, listFontSize, boxSize, boxBorderThickness, boxBorderRadius, lineSeparatorPos, lineSeparatorThickness, elementSpacing \
+		= box.headerFontSize, box.listFontSize, box.boxSize, box.boxBorderThickness, box.boxBorderRadius, box.lineSeparatorPos, box.lineSeparatorThickness, box.elementSpacing
 
 		screenSize = Vector2(self.screen.get_rect().size)
-		boxSize = Vector2(boxSize)
 
 		# box is centered on screen, so values are in absolute space
 		# draws the rounded rectangle for the given box
@@ -542,8 +478,7 @@ class Display:
 
 		boxPos = screenSize - boxSize
 
-		headerFont = pg.font.Font('./assets/font.ttf', headerFontSize).render("Highscores", 1, (255, 255, 255))
-		listFont = pg.font.Font('./assets/font.ttf', listFontSize)
+		headerFont = self.fonts.render('./assets/font.ttf', headerFontSize, "Highscores")
 		self.screen.blit(headerFont, (
 			boxPos \
 			 + Vector2(boxSize[0], 2*boxBorderThickness+lineSeparatorPos[0][1]-lineSeparatorThickness/2) \
@@ -554,7 +489,7 @@ class Display:
 		for i in range(min(int((boxSize[1]-lineSeparatorPos[0][1])//listFontSize), len(self.highscores))):
 			paddingWidth = targetWidth-len(f"{self.highscores[i][0]}")-len(f"{self.highscores[i][1]}")
 			outString = f"{self.highscores[i][0]}"+"."*paddingWidth+f"{self.highscores[i][1]}"
-			leaderBoardFont = listFont.render(outString, 1, (255, 255, 255))
+			leaderBoardFont = self.fonts.render('./assets/font.ttf', listFontSize, outString)
 			indexOffset = Vector2(0, listFontSize*i+elementSpacing)
 			self.screen.blit(leaderBoardFont, (
 				boxPos \
@@ -564,12 +499,11 @@ class Display:
 				+ indexOffset)
 
 
-	def drawInitialsInput(self, elements :dict):
-		garbage, headerFontSize, inputFontSize, boxSize, boxBorderThickness, boxBorderRadius, lineSeparatorPos, lineSeparatorThickness \
-		= elements.values()
-		
+	def drawInitialsInput(self, box :Elements):
+		headerFontSize, inputFontSize, boxSize, boxBorderThickness, boxBorderRadius, lineSeparatorPos, lineSeparatorThickness \
+		= box.headerFontSize, box.inputFontSize, box.boxSize, box.boxBorderThickness, box.boxBorderRadius, box.lineSeparatorPos, box.lineSeparatorThickness
+
 		screenSize = Vector2(self.screen.get_rect().size)
-		boxSize = Vector2(boxSize)
 		boxPos = screenSize - boxSize
 
 		# box is centered on screen, so values are in absolute space
@@ -578,8 +512,8 @@ class Display:
 		pg.draw.line(self.screen, (255, 255, 255), *(((screenSize-boxSize)/2)+Vector2(x) for x in lineSeparatorPos), lineSeparatorThickness)
 		
 
-		headerFontTop = pg.font.Font('./assets/font.ttf', headerFontSize).render("Enter", 1, (255, 255, 255))
-		headerFontBot = pg.font.Font('./assets/font.ttf', headerFontSize).render("your name!", 1, (255, 255, 255))
+		headerFontTop = self.fonts.render('./assets/font.ttf', headerFontSize, "Enter")
+		headerFontBot = self.fonts.render('./assets/font.ttf', headerFontSize, "your name!")
 		self.screen.blit(headerFontTop, (
 			screenSize \
 			- boxSize \
@@ -596,7 +530,7 @@ class Display:
 			)/2)
 
 		inputText = self.initialsText + "_"*(3-len(self.initialsText))
-		initialsFont = pg.font.Font('./assets/font.ttf', inputFontSize).render(inputText, 1, (255, 255, 255))
+		initialsFont = self.fonts.render('./assets/font.ttf', inputFontSize, inputText)
 		self.screen.blit(initialsFont, (
 				boxPos \
 				+ Vector2(boxSize[0], boxSize[1]+(lineSeparatorPos[0][1]+lineSeparatorThickness-boxBorderThickness))
@@ -604,292 +538,529 @@ class Display:
 				)/2)
 
 
+	def drawPlaying(self, game :Game):
+		"Repaints the HUD boxes whose value changed and the board cells the piece, its shadow or the locked cells changed in"
+		self.preparePlaying()
+		if self.drawnCells is None:
+			self.screen.blit(self.staticLayer, (0, 0))
+
+		# pythonic way to execute respective functions with respective arguments
+		# needs to be changed to accommodate multiple games
+		for name, key, draw in (
+			('hold', game.heldPiece, self.drawHold),
+			('nextlist', tuple(game.nextList), self.drawNextlist),
+			('level', game.totalLines//10, self.drawLevel),
+			('score', game.score, self.drawScore),
+		):
+			if self.drawnKeys.get(name) == key:
+				continue
+			self.drawnKeys[name] = key
+			for box in getattr(self.layout, name):
+				rect = pg.Rect(box.boxPos, box.boxSize)
+				self.screen.blit(self.staticLayer, rect, rect)
+				with self.profiler.stage(draw.__name__):
+					draw(game, box)
+				self.repainted.append(rect)
+
+		# dirty cells as inclusive (x0, y0, x1, y1) ranges: runs of rows whose locked cells changed (placed piece,
+		# cleared lines) and the boxes the active piece and its shadow left and moved into
+		if self.drawnCells is None:
+			regions = [(0, 0, 9, 19)]
+		elif game.boardVersion == self.drawnBoardVersion:
+			regions = []
+		else:
+			regions = []
+			for y in range(20):
+				if game.gameBoard[y] == self.drawnCells[y]:
+					continue
+				if regions and regions[-1][3] == y-1:
+					regions[-1] = (0, regions[-1][1], 9, y)
+				else:
+					regions.append((0, y, 9, y))
+		if regions:
+			self.drawnCells = [row[:] for row in game.gameBoard]
+		self.drawnBoardVersion = game.boardVersion
+
+		piece = (game.activePiece, game.anchorX, game.anchorY, game.calcShadowPos())
+		if piece != self.drawnPiece:
+			for drawn in (self.drawnPiece, piece):
+				if drawn is None:
+					continue
+				metaID, anchorX, anchorY, shadowAnchorY = drawn
+				minX, maxX, minY, maxY = game.metaIdToXYBounds[metaID]
+				for y in (anchorY, shadowAnchorY):
+					regions.append((max(0, anchorX+minX), max(0, y+minY), min(9, anchorX+maxX), min(19, y+maxY)))
+			self.drawnPiece = piece
+
+		if not regions:
+			return
+		for board, piece in zip(self.layout.board, self.layout.piece):
+			with self.profiler.stage('drawBoard'):
+				self.drawBoard(game, board, None if self.fullRedraw else regions)
+			with self.profiler.stage('drawPiece'):
+				self.drawPiece(game, piece, None if self.fullRedraw else regions)
+			self.repainted += [self.cellRect(board, region) for region in regions]
+
 	def drawWindow(self, game :Game):
+		"""
+		Only repaints what changed since the last call, the screen rects to push to the display end up in
+		{self.dirtyRects}. Everything is repainted when the game state or the debug view changes, or when
+		{self.fullRedraw} is set	"""
 		w, h = self.screen.get_rect().size
+		if (game.state, self.debug) != self.drawnView:
+			self.drawnView = (game.state, self.debug)
+			self.fullRedraw = True
+		if self.fullRedraw:
+			self.drawnKeys = {}
+			self.drawnCells = None
+			self.drawnPiece = None
+
+		# puts back what last frame's debug overlay covered
+		restored = []
+		for rect, pixels in reversed(self.overlayUnder):
+			self.screen.blit(pixels, rect)
+			restored.append(rect)
+		self.overlayUnder = []
+		self.overlayRects = []
+		self.repainted = []
+
 		match game.state:
 			case GameStates.playing:
-				self.screen.fill((0, 0, 0))
-				
-				# pythonic way to execute respective functions with respective arguments
-				# needs to be changed to accommodate multiple games
-				[self.drawHold(game, holdElements) for holdElements in self.playingElements['hold']]
-				[self.drawNextlist(game, nextlistElements) for nextlistElements in self.playingElements['nextlist']]
-				[self.drawLevel(game, levelElements) for levelElements in self.playingElements['level']]
-				[self.drawScore(game, scoreElements) for scoreElements in self.playingElements['score']]
-				[self.drawBoard(game, boardElements) for boardElements in self.playingElements['board']]
-				[self.drawPiece(game, shadowElements) for shadowElements in self.playingElements['piece']]
+				self.drawPlaying(game)
 
 			case GameStates.menu:
 				# guard clause used to examine the board for debugging
 				if self.debug:
+					self.fullRedraw = False
+					self.dirtyRects = restored
 					return
-				self.screen.fill((0, 0, 0))
-				menuText = pg.font.SysFont('calibri', self.menuElements['fontSize']).render("Paused, Esc to unpause", 1, (255, 255, 255))
-				self.screen.blit(menuText, (((w - menuText.get_width())/2 , (h - menuText.get_height())/2)))
+				if self.drawnKeys.get('screen') != 'menu':
+					self.drawnKeys['screen'] = 'menu'
+					self.screen.fill((0, 0, 0))
+					menuText = self.fonts.render('calibri', self.layout.menu.fontSize, "Paused, Esc to unpause")
+					self.screen.blit(menuText, (((w - menuText.get_width())/2 , (h - menuText.get_height())/2)))
+					self.fullRedraw = True
 
 
 			case GameStates.countdown:
-				self.screen.fill((0, 0, 0))
-				countdownText = pg.font.SysFont('calibri', self.countdownElements['fontSize']).render(f"Starting in: {math.ceil(game.countdownTimer)}", 1, (255, 255, 255))
-				self.screen.blit(countdownText, ((w - countdownText.get_width())/2 , (h - countdownText.get_height())/2))
+				if self.drawnKeys.get('screen') != math.ceil(game.countdownTimer):
+					self.drawnKeys['screen'] = math.ceil(game.countdownTimer)
+					self.screen.fill((0, 0, 0))
+					countdownText = self.fonts.render('calibri', self.layout.countdown.fontSize, f"Starting in: {math.ceil(game.countdownTimer)}")
+					self.screen.blit(countdownText, ((w - countdownText.get_width())/2 , (h - countdownText.get_height())/2))
+					self.fullRedraw = True
 
 			case GameStates.gameover:
-				self.screen.fill((0, 0, 0))
-				self.drawHighScores(self.gameoverElements)
-				
-				# self.drawHighScores(self.gameoverElements)
-			case GameStates.initialsInput:
-				self.screen.fill((0, 0, 0))
-				self.drawInitialsInput(self.initialsInputElements)
+				if self.drawnKeys.get('screen') != id(self.highscores):
+					self.drawnKeys['screen'] = id(self.highscores)
+					self.screen.fill((0, 0, 0))
+					with self.profiler.stage('drawHighScores'):
+						self.drawHighScores(self.layout.gameover)
+					self.fullRedraw = True
 
+			case GameStates.initialsInput:
+				if self.drawnKeys.get('screen') != self.initialsText:
+					self.drawnKeys['screen'] = self.initialsText
+					self.screen.fill((0, 0, 0))
+					with self.profiler.stage('drawInitialsInput'):
+						self.drawInitialsInput(self.layout.initialsInput)
+					self.fullRedraw = True
+
+		if self.fullRedraw:
+			self.repainted = [self.screen.get_rect()]
+			restored = []
+			self.fullRedraw = False
 
 		if len(self.fpsHistory) > self.maxFrameHistory:
 			subtracted = self.fpsHistory.pop(-self.maxFrameHistory-1)
 			self.fpsSum -= subtracted
 		if self.debug:
-			self.drawFrameRate()
-
-	def pseudoFramesByLevel(self, level):
-		if level > 29:
-			level = 29
-		speed = {
-			0 : 48,
-			1 :	43,
-			2 :	38,
-			3 :	33,
-			4 :	28,
-			5 :	23,
-			6 :	18,
-			7 :	13,
-			8 :	8,
-			9 :	6,
-			10:	5,
-			11: 5,
-			12:	5,
-			13: 4,
-			14: 4,
-			15:	4,
-			16: 3,
-			17: 3,
-			18:	3,
-			19: 2,
-			20: 2,
-			21: 2,
-			22: 2,
-			23: 2,
-			24: 2,
-			25: 2,
-			26: 2,
-			27: 2,
-			28:	2,
-			29:	1,
-		}
-		return speed[level]
-
-	def __init__(self, width, height) -> None:
-
-		self.screen = pg.display.set_mode((width, height))
+			with self.profiler.stage('debug overlay'):
+				self.drawRepaintedRegions(self.repainted)
+				self.drawFrameRate()
+
+		self.dirtyRects = restored + self.repainted + self.overlayRects
+		self.pixelsPushed = sum(rect.w*rect.h for rect in self.dirtyRects)
+
+	def __init__(self, width, height, targetFps :int = 60, idleFps :int = 10, vsync :bool = False, assets :AssetLoader | None = None, lateLatch :bool = False) -> None:
+
+		try:
+			# vsync needs one of the renderer backed modes, which stretch the frame to the window instead of following resizes
+			self.screen = pg.display.set_mode((width, height), pg.SCALED|pg.RESIZABLE if vsync else pg.RESIZABLE, vsync=int(vsync))
+		except pg.error:
+			# not available with this video driver, frames are paced by the scheduler alone
+			vsync = False
+			self.screen = pg.display.set_mode((width, height), pg.RESIZABLE)
 		pg.display.set_caption("Tetris")
-		self.clock = pg.time.Clock()
+		self.assets = assets if assets is not None else AssetLoader()
+		self.scheduler = FrameScheduler(targetFps, idleFps, vsync, lateLatch)
+		# times the stages of the loop while the debug overlay is on, see drawFrameRate
+		self.profiler = Profiler()
+		# seconds from each key event to the game changing from it, kept by the `Ticker`
+		self.inputLatencies :deque[float] = deque(maxlen=Ticker.latencyHistory)
+		self.presentLatencies :deque[float] = deque(maxlen=Ticker.latencyHistory)
+		self.fonts = Fonts()
+		# layout-static part of the playing screen, see updateStaticLayer
+		self.staticLayer :pg.Surface | None = None
+		self.staticLayerLayout = None
+
+		# what is currently on screen, compared against the game every frame to find what needs repainting
+		self.fullRedraw = True
+		self.drawnView = None
+		self.drawnKeys = {}
+		self.drawnCells = None
+		self.drawnBoardVersion = None
+		self.drawnPiece = None
+		self.dirtyRects = []
+		self.pixelsPushed = 0
+		# (rect, pixels) the debug overlay drew over
+		self.overlayUnder = []
 
 		with open('./resolutions.json', 'r') as f:
-			self.resolutionPreset = json.load(f)[f'{width}x{height}']
-		# pprint.pprint(self.resolutionPreset)
-
-		self.playingElements = self.resolutionPreset['playing']
-		self.menuElements = self.resolutionPreset['menu']
-		self.countdownElements = self.resolutionPreset['countdown']
-		self.gameoverElements = self.resolutionPreset['gameover']
-		self.initialsInputElements = self.resolutionPreset['initialsInput']
-
-
-		minoSize = self.playingElements['minoSize']
-		self.typeToImage = {
-			'I': pg.transform.scale(pg.image.load('./assets/i.png'), (minoSize, minoSize)),
-			'J': pg.transform.scale(pg.image.load('./assets/j.png'), (minoSize, minoSize)),
-			'L': pg.transform.scale(pg.image.load('./assets/l.png'), (minoSize, minoSize)),
-			'S': pg.transform.scale(pg.image.load('./assets/s.png'), (minoSize, minoSize)),
-			'Z': pg.transform.scale(pg.image.load('./assets/z.png'), (minoSize, minoSize)),
-			'O': pg.transform.scale(pg.image.load('./assets/o.png'), (minoSize, minoSize)),
-			'T': pg.transform.scale(pg.image.load('./assets/t.png'), (minoSize, minoSize)),
-		}
-
-		self.typeToShadowImage = {}
-		for k, v in self.typeToImage.items():
-			shadowTexture = pg.Surface(pg.Vector2(minoSize, minoSize), pg.SRCALPHA, 32)
+			self.presets = json.load(f)
+		self.layout :Layout | None = None
+		self.atlas :SpriteAtlas | None = None
+		self.applyLayout(width, height)
+
+	def resize(self, width :int, height :int):
+		"Follows a window resize, the display surface already has the new size"
+		self.screen = pg.display.get_surface()
+		self.applyLayout(width, height)
+
+	def applyLayout(self, width :int, height :int):
+		"Compiles the layout for a {width}x{height} window and rescales the sprites to it, unless it already has that size"
+		if self.layout is not None and self.layout.size == (width, height):
+			return
+		self.layout = Layout(width, height, self.presets)
+		self.scaleSprites()
+		# nothing on screen is where the new layout puts it, and what the overlay covered is gone
+		self.fullRedraw = True
+		self.overlayUnder = []
+
+	def scaleSprites(self):
+		"Starts loading the sprite atlas for the layout's cell size on the asset thread, see `preparePlaying`"
+		minoSize = self.layout.minoSize
+		if self.atlas is not None and self.atlas.minoSize == minoSize:
+			return
+		self.atlas = None
+		if self.assets.futures.get(('atlas', minoSize)) is None:
+			self.assets.load(('atlas', minoSize), functools.partial(SpriteAtlas, minoSize))
 
-			skew = 1
-			swatch = v.get_at((minoSize//2, minoSize//2))
-			shadowColor = pg.Color([x*y for x, y in zip(swatch, [skew, skew, skew])])
-			
-			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2( 1,  1), pg.Vector2( 3,  3), pg.Vector2(minoSize-3,  3), pg.Vector2(minoSize-1,  1)])
-			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2( 1,  1), pg.Vector2( 3,  3), pg.Vector2( 3, minoSize-3), pg.Vector2( 1, minoSize-1)])
-			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2(minoSize-1,  1), pg.Vector2(minoSize-3,  3), pg.Vector2(minoSize-3, minoSize-3), pg.Vector2(minoSize-1, minoSize-1)])
-			pg.draw.polygon(shadowTexture, shadowColor, [pg.Vector2(minoSize-1, minoSize-1), pg.Vector2(minoSize-3, minoSize-3), pg.Vector2( 3, minoSize-3), pg.Vector2( 1, minoSize-1)])
+class KeyboardInput:
+	"""
+	Where the main loop gets the player's inputs from: the window's events and keyboard, played in real time. A
+	script, a recording or a bot can stand in for the player by overriding these, see `Controller.startSinglePlayer`.
+	Key events are taken off the queue as they come in, while the frame scheduler waits, and stamped with the time
+	they were seen at, pygame's events carry none. Their presses and releases go to the `Ticker` at those times	"""
+	# the presses and releases of bound keys among `events` are fed to the ticker, sources without them say which
+	# inputs are held each frame from `held` instead
+	keyEvents = True
+
+	def __init__(self) -> None:
+		self.stamped :list[pg.event.Event] = []
+
+	def poll(self):
+		"Moves the key events that came in off the queue, stamped with `time.perf_counter` as `timestamp`"
+		now = time.perf_counter()
+		for e in pg.event.get((pg.KEYDOWN, pg.KEYUP)):
+			e.timestamp = now
+			self.stamped.append(e)
+
+	def events(self, game :Game) -> list[pg.event.Event]:
+		"The window and key events of this frame"
+		self.poll()
+		events, self.stamped = self.stamped, []
+		return events + pg.event.get()
+
+	def held(self, game :Game) -> set[Inputs] | None:
+		"Inputs held down over this frame, None when the key events say it"
+		return None
+
+	def elapsed(self, measured :float) -> float:
+		"Seconds the game moves on by this frame, given the {measured} time the frame took"
+		return measured
+
+
+class BotInput(KeyboardInput):
+	"""
+	Lets a `Bot` play in the window. Every new piece gets a placement from the bot, whose path is pressed one input
+	per tick with a released tick between them so nothing repeats, hold as a key press. The window's events still
+	come through, so the game can be paused and closed as usual. Finished games are skipped past without initials,
+	so it keeps playing unattended	"""
+	keyEvents = False
+
+	def __init__(self, bot :"Bot") -> None:
+		super().__init__()
+		self.bot = bot
+		self.path :list[Inputs] = []
+		self.holding :set[Inputs] = set()
+		self.dt = 0.0
+
+	def events(self, game :Game) -> list[pg.event.Event]:
+		events = pg.event.get()
+		match game.state:
+			case GameStates.playing:
+				if not self.path and not self.holding:
+					from bot import trimSoftDrops
+					self.path = trimSoftDrops(game, self.bot.choose(game))
+				if self.path and self.path[0] == Inputs.hold:
+					self.path.pop(0)
+					events.append(pg.event.Event(pg.KEYDOWN, key=pg.K_c, unicode='c', mod=0, scancode=0))
+			case GameStates.initialsInput:
+				events.append(pg.event.Event(pg.KEYDOWN, key=pg.K_ESCAPE, unicode='\x1b', mod=0, scancode=0))
+			case GameStates.gameover:
+				events.append(pg.event.Event(pg.KEYDOWN, key=pg.K_SPACE, unicode=' ', mod=0, scancode=0))
+		if game.state != GameStates.playing:
+			self.path, self.holding = [], set()
+		return events
+
+	def held(self, game :Game) -> set[Inputs]:
+		# the ticks this frame runs, see `Ticker.advance`. A frame that runs none keeps the same keys down, every
+		# press and every release has to be seen by a tick
+		playedFor = max(game.fTimeElapsed, 0.0)
+		if math.floor((playedFor+self.dt)*Ticker.ticksPerSecond + 1e-6) == math.floor(playedFor*Ticker.ticksPerSecond + 1e-6):
+			return self.holding
+		if self.holding:
+			self.holding = set()
+		elif self.path:
+			self.holding = {self.path.pop(0)}
+		return self.holding
+
+	def elapsed(self, measured :float) -> float:
+		self.dt = measured
+		return measured
 
-			self.typeToShadowImage[k] = shadowTexture
 
 class Controller:
-	def startSinglePlayer():
-		disp = Display(1200, 900)
-		disp.perKeyTickCache = {}
+	# held keys and the input they repeat, see `Ticker`
+	keyBindings = {
+		pg.K_LEFT: Inputs.left,
+		pg.K_RIGHT: Inputs.right,
+		pg.K_z: Inputs.rotateCCW,
+		pg.K_UP: Inputs.rotateCW,
+		pg.K_DOWN: Inputs.softDrop,
+		pg.K_SPACE: Inputs.hardDrop,
+	}
+
+	def startSinglePlayer(targetFps :int = 60, idleFps :int = 10, vsync :bool = False, size :tuple[int, int] = (1200, 900), startupReport :bool = False, traceTo :str | None = None, inputSource :KeyboardInput | None = None, logDir :str = "./logs", das :float | None = None, arr :float | None = None, lateLatch :bool = False):
+		"""
+		Runs the game until the window is closed. {traceTo} is a file to write a Chrome trace of the whole session
+		to on quitting, {inputSource} plays instead of the keyboard (it ends the session by sending a `pg.QUIT`),
+		scores and replays are kept in {logDir}. {das} and {arr} are the key repeat's delay and rate in seconds, the
+		`Ticker`'s defaults when None. {lateLatch} reads the input as late before presenting as the frames' work
+		allows, see `FrameScheduler`.
+		Every frame runs in three phases: input (the window and key events), simulate (the ticker and the state
+		the game is in), render, so what was pressed shows in the frame it was read for	"""
+		inputSource = inputSource if inputSource is not None else KeyboardInput()
+		# the window only waits for what the countdown draws, the rest loads on this while it plays
+		assets = AssetLoader()
+		sounds = Sounds(assets)
+		disp = Display(*size, targetFps, idleFps, vsync, assets, lateLatch)
 
 		run = True
-		game = Game(True)
+		# scores and replays are written on their own thread, so a slow disk never holds up a frame
+		writer = BackgroundWriter()
+		scores = ScoreStore(os.path.join(logDir, "scores.jsonl"), writer=writer)
+		if len(scores) == 0 and os.path.exists(os.path.join(logDir, "gamelogs.yaml")):
+			# first run with the score store, bring the old YAML game log over once
+			importYaml(scores, os.path.join(logDir, "gamelogs.yaml"))
+		profiler = disp.profiler
+		if traceTo:
+			profiler.startTrace()
+
+		def apply(tick :int, input :Inputs):
+			"Applies and records an input of the ticker, timing gravity apart from the player's inputs"
+			with profiler.stage('gravity' if input == Inputs.gravity else 'apply input'):
+				inputLog.apply(game, tick, input)
+
+		game = Game(True, sounds.onPiecePlaced, sounds.onGameOver)
+		inputLog = InputLog.forGame(game)
+		ticker = Ticker(game, apply, das, arr, disp.inputLatencies)
 
-		disp.pseudoFrameCount = 0
-		disp.pseudoFrameCountDelta = 0
-		disp.pseudoFrameCountLastTrigger = 0
 		disp.fpsHistory = []
 		disp.fpsSum = 0.0
 
-		disp.fTimeElapsed = 0
-
 		disp.pause = False
 		disp.debug = False
 
+		# seconds from the start of main.py's imports to the end of them, the first frame, and everything loaded
+		startup = {'import': importsDone-startupBegan}
 
 		while run:
-			dt = disp.clock.tick_busy_loop()/1000
-
-			disp.drawWindow(game)
-			pg.display.update()
-
-			for e in pg.event.get():
-				if e.type == pg.QUIT:
-					pg.quit()
-					quit()
-				if e.type == pg.KEYDOWN:
-					match game.state:
-						case GameStates.menu:
-							if e.key == pg.K_ESCAPE:
-								game.state = GameStates.countdown
-								timerList = [3.0, 0.0]
-								game.countdownTimer = timerList[int(disp.debug)]
+			# the pause and highscore screens only change on key presses, they are redrawn at the idle rate
+			with profiler.stage('scheduler.tick'):
+				# where the game clock stood when the frame's wait began, key events are placed in the frame from it
+				frameStart = disp.scheduler.lastTick
+				# key events are only timed to the millisecond while playing, the idle screens sleep their whole wait
+				poll = inputSource.poll if inputSource.keyEvents and game.state == GameStates.playing else None
+				dt = inputSource.elapsed(disp.scheduler.tick(game.state in (GameStates.menu, GameStates.gameover), poll))
+
+			# callbacks of saves that landed since the last frame
+			writer.poll()
+
+			# input
+			with profiler.stage('events'):
+				for e in inputSource.events(game):
+					if e.type == pg.QUIT:
+						run = False
+						break
+					if e.type == pg.WINDOWEXPOSED:
+						disp.fullRedraw = True
+					if e.type == pg.VIDEORESIZE and not disp.scheduler.vsync:
+						disp.resize(e.w, e.h)
+					# game time the key event happened at, within the frame the scheduler just waited out
+					stamp = getattr(e, 'timestamp', None)
+					at = ticker.elapsed + min(max(stamp-frameStart, 0.0), dt) if stamp is not None else None
+					if e.type == pg.KEYUP and inputSource.keyEvents and e.key in Controller.keyBindings:
+						ticker.keyUp(Controller.keyBindings[e.key], at)
+					if e.type == pg.KEYDOWN:
+						match game.state:
+							case GameStates.menu:
+								if e.key == pg.K_ESCAPE:
+									game.state = GameStates.countdown
+									timerList = [3.0, 0.0]
+									game.countdownTimer = timerList[int(disp.debug)]
 							
-						case GameStates.playing:
-							if e.key == pg.K_ESCAPE:
-								game.state = GameStates.menu
-								if game.canPlayMusic:game.themeSong.stop()
+							case GameStates.playing:
+								if e.key == pg.K_ESCAPE:
+									game.state = GameStates.menu
+									if sounds.canPlayMusic: sounds.themeSong.stop()
 						
-						case GameStates.gameover:
-							if e.key == pg.K_SPACE:
-								game.state = GameStates.countdown
-								game.countdownTimer = 3.0
+							case GameStates.gameover:
+								if e.key == pg.K_SPACE:
+									game.state = GameStates.countdown
+									game.countdownTimer = 3.0
 						
-						case GameStates.initialsInput:
-							if e.key == pg.K_BACKSPACE:
-								if len(disp.initialsText) > 0:
-									disp.initialsText = disp.initialsText[:-1]
-							if e.key == pg.K_ESCAPE:
-								with open("./logs/gamelogs.yaml", 'r+') as f:
-									file :dict= yaml.safe_load(f)
-									out = []
-									for id, g in file.items():
-										out.append((g['Initials'], g['Score']))
-									
-									disp.highscores = sorted(out, key=lambda x: x[1], reverse=True)
-								game.state = GameStates.gameover
-								game.countdownTimer = 3.0
-							elif e.key == pg.K_RETURN:
-								if len(disp.initialsText) == 3:
+							case GameStates.initialsInput:
+								if e.key == pg.K_BACKSPACE:
+									if len(disp.initialsText) > 0:
+										disp.initialsText = disp.initialsText[:-1]
+								if e.key == pg.K_ESCAPE:
+									disp.highscores = scores.leaderboard()
 									game.state = GameStates.gameover
-									game.countdownTimer = 4.0
-									with open("./logs/gamelogs.yaml", 'r+') as f:
-										file :dict= yaml.safe_load(f)
-										f.seek(0)
-										file.update({
-											f"Game @ {datetime.datetime.now()}": {
-												"Total Gametime": str(datetime.timedelta(seconds=game.fTimeElapsed)),
-												"Total Lines": game.totalLines,
-												"Level": game.totalLines//10,
-												"Score": game.score,
-												"Drought at Game Over": game.droughtCounter,
-												"Initials": disp.initialsText.upper(),
-											}
-										})
-										# set highscores for displaying in next game-state
-										out = []
-										for id, g in file.items():
-											out.append((g['Initials'], g['Score']))
-										
-										disp.highscores = sorted(out, key=lambda x: x[1], reverse=True)
-
-
-										yaml.safe_dump(file, f)
-							elif len(disp.initialsText) != 3:
-								# Append the pressed key to the input text
-								assert isinstance(e.unicode, str)
-
-								if e.unicode.isalnum():
-									disp.initialsText += e.unicode
-
-					if e.key == pg.K_p: # debug key
-						disp.debug = not disp.debug
-					if e.key == pg.K_F12:
-						pg.image.save(disp.screen, f"./screenshots/{datetime.datetime.now()}.png")
-					if game.state != GameStates.playing:
-						continue
-					if e.key == pg.K_c:
-						game.holdActivePiece()
-						disp.pseudoFrameCountDelta -= disp.pseudoFrameCount % disp.pseudoFramesByLevel(game.totalLines//10) + 1
-
+									game.countdownTimer = 3.0
+								elif e.key == pg.K_RETURN:
+									if len(disp.initialsText) == 3:
+										game.state = GameStates.gameover
+										game.countdownTimer = 4.0
+										scores.record({
+											"Game": f"Game @ {datetime.datetime.now()}",
+											"Total Gametime": str(datetime.timedelta(seconds=game.fTimeElapsed)),
+											"Total Lines": game.totalLines,
+											"Level": game.totalLines//10,
+											"Score": game.score,
+											"Drought at Game Over": game.droughtCounter,
+											"Initials": disp.initialsText.upper(),
+										}, onSaved=lambda: setattr(disp, 'highscores', scores.leaderboard()))
+										# the store has the game in memory already, the highscore screen does not wait for the disk
+										disp.highscores = scores.leaderboard()
+								elif len(disp.initialsText) != 3:
+									# Append the pressed key to the input text
+									assert isinstance(e.unicode, str)
+
+									if e.unicode.isalnum():
+										disp.initialsText += e.unicode
+
+						if e.key == pg.K_p: # debug key
+							disp.debug = not disp.debug
+							profiler.setEnabled(disp.debug)
+						if e.key == pg.K_F12:
+							pg.image.save(disp.screen, f"./screenshots/{datetime.datetime.now()}.png")
+						if game.state != GameStates.playing:
+							continue
+						if e.key == pg.K_c:
+							ticker.press(Inputs.hold, at, stamp)
+						elif inputSource.keyEvents and e.key in Controller.keyBindings:
+							ticker.keyDown(Controller.keyBindings[e.key], at, stamp)
+			if not run:
+				break
+			if game.state == GameStates.playing:
+				with profiler.stage('input'):
+					held = inputSource.held(game)
+
+			# simulate
 			match game.state:
 
 				case GameStates.playing:
-					disp.fTimeElapsed += dt
-					disp.pseudoFrameCount = math.floor(disp.fTimeElapsed*disp.pseudoFramesPerSecond)
-					game.fTimeElapsed = disp.fTimeElapsed
-					if dt == 0.0: dt = 0.001
-					
 					fps = round(1/max(0.001,dt))
 					disp.fpsHistory.append(fps)
 					disp.fpsSum += fps
 
-					keys = pg.key.get_pressed()
-					buttons = pg.mouse.get_pressed()
-
-					if disp.checkIfKeyShouldExec(pg.K_LEFT, keys):
-						game.moveActivePieceHorz(-1)
-					if disp.checkIfKeyShouldExec(pg.K_RIGHT, keys):
-						game.moveActivePieceHorz( 1)
-					if disp.checkIfKeyShouldExec(pg.K_z, keys):
-						game.rotateActivePiece(-1)
-					if disp.checkIfKeyShouldExec(pg.K_UP, keys):
-						game.rotateActivePiece( 1)
-
-					if disp.checkIfKeyShouldExec(pg.K_DOWN, keys):
-						game.stepActivePieceDown()
-						disp.pseudoFrameCountDelta = disp.pseudoFrameCount % disp.pseudoFramesByLevel(game.totalLines//10)-1
-
-					if disp.checkIfKeyShouldExec(pg.K_SPACE, keys):
-						game.dropActivePieceDown()
-						disp.pseudoFrameCountDelta = disp.pseudoFrameCount % disp.pseudoFramesByLevel(game.totalLines//10)-1
-
-					if ((disp.pseudoFrameCount+disp.pseudoFrameCountDelta) % disp.pseudoFramesByLevel(game.totalLines//10)) == 0 and (disp.pseudoFrameCount+disp.pseudoFrameCountDelta) != disp.pseudoFrameCountLastTrigger:
-						disp.pseudoFrameCountLastTrigger = (disp.pseudoFrameCount+disp.pseudoFrameCountDelta)
-						game.stepActivePieceDown()
+					# gravity runs on the ticker's fixed 60 Hz ticks, however many this frame's time covers, in order with the
+					# frame's key events and repeats
+					with profiler.stage('ticker.advance'):
+						ticker.advance(dt, held)
+					game.fTimeElapsed = ticker.elapsed
+					if game.state == GameStates.initialsInput:
+						# game just ended, archive its inputs so it can be replayed with inputLog.py. Done here, the initials
+						# screen can be left by the next frame's events before it ever gets simulated (the bot escapes it at once)
+						inputLog.finish(game)
+						writer.submit(functools.partial(inputLog.save, os.path.join(logDir, "replays", f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.tlog")))
 
 				case GameStates.menu:
 					pass
-				
-				case GameStates.initialsInput:
-					pass
 
 				case GameStates.countdown:
+					# builds the playing screen while the countdown runs, once the atlas is loaded
+					disp.preparePlaying(wait=False)
 					game.countdownTimer -= dt
 					if game.countdownTimer <= 0:
 						game.state = GameStates.playing
-						if game.canPlayMusic: game.themeSong.play(loops=-1)
+						# normally long loaded, only a countdown skipped in debug mode can get here first
+						assets.wait('sounds')
+						if sounds.canPlayMusic: sounds.themeSong.play(loops=-1)
 												
 
 				case GameStates.gameover:
 					disp.initialsText = ''
 					game.countdownTimer -= dt
 					if game.countdownTimer <= 0:
-						game = Game(game.isEasymode)
+						game = Game(game.isEasymode, sounds.onPiecePlaced, sounds.onGameOver)
+						inputLog = InputLog.forGame(game)
+						ticker = Ticker(game, apply, das, arr, disp.inputLatencies)
 						game.state = GameStates.gameover
 
+			# render, this frame's input and what it did included
+			with profiler.stage('drawWindow'):
+				disp.drawWindow(game)
+			with profiler.stage('display.update'):
+				pg.display.update(disp.dirtyRects)
+			presentedAt = disp.scheduler.presented()
+			disp.presentLatencies.extend(presentedAt-stamp for stamp in ticker.applied)
+			ticker.applied.clear()
+			if 'first frame' not in startup:
+				startup['first frame'] = time.perf_counter()-startupBegan
+			if 'fully loaded' not in startup and not assets.pending() and disp.preparePlaying(wait=False):
+				startup['fully loaded'] = time.perf_counter()-startupBegan
+				if startupReport:
+					print("startup:", ", ".join(f"{name} {seconds*1000:.0f} ms" for name, seconds in startup.items()),
+						"| loaded on the asset thread:", ", ".join(f"{name} {seconds*1000:.0f} ms" for name, seconds in assets.loadTimes.items()), flush=True)
+
+		if traceTo:
+			writer.submit(functools.partial(atomicWrite, traceTo, profiler.traceBytes()))
+		# waits for the last scores, replays and the trace to be on disk
+		writer.close()
+
 
 if __name__ == "__main__":
-	Controller.startSinglePlayer()
+	parser = argparse.ArgumentParser(description="Tetris")
+	parser.add_argument("--fps", type=int, default=60, help="target frame rate, 0 for uncapped")
+	parser.add_argument("--idle-fps", type=int, default=10, help="frame rate on the pause and highscore screens")
+	parser.add_argument("--vsync", action="store_true", help="let the display's vsync pace the frames")
+	parser.add_argument("--size", default="1200x900", help="window size as WIDTHxHEIGHT, the layout scales to any size")
+	parser.add_argument("--startup-report", action="store_true", help="print how long importing, the first frame and loading everything took")
+	parser.add_argument("--trace", metavar="FILE", help="time every stage of every frame and write them to FILE as a Chrome trace on quitting")
+	parser.add_argument("--bot", action="store_true", help="let the beam search bot play, game after game, see bot.py")
+	parser.add_argument("--beam-width", type=int, default=8, help="boards the bot keeps after every piece it looks ahead to")
+	parser.add_argument("--das", type=float, default=Ticker.das*1000, help="ms a held key waits before it starts repeating")
+	parser.add_argument("--arr", type=float, default=Ticker.arr*1000, help="ms between repeats of a held key, 0 moves the piece all the way at once")
+	parser.add_argument("--late-latch", action="store_true", help="read the input as late before presenting each frame as its work allows")
+	args = parser.parse_args()
+	inputSource = None
+	if args.bot:
+		# the bot and its move generation are only loaded to play, the startup report measures launches without them
+		from bot import Bot
+		from transposition import TranspositionTable
+		inputSource = BotInput(Bot(args.beam_width, table=TranspositionTable(8)))
+	Controller.startSinglePlayer(args.fps, args.idle_fps, args.vsync, tuple(map(int, args.size.split('x'))), args.startup_report, args.trace, inputSource, das=args.das/1000, arr=args.arr/1000, lateLatch=args.late_latch)
+	pg.quit()
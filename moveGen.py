@@ -0,0 +1,238 @@
+from typing import NamedTuple
+from game import Game, Inputs
+
+
+#
+# Move generation: every final resting placement the active piece (or the hold
+# alternative) can reach, each with an input path that gets it there
+#
+# The search runs on a padded copy of `Game.bitBoard`: every row is shifted left by
+# `padding` bits with wall bits on both sides, and `padding` full rows sit above and
+# below the board. The padded rows are packed into one int, padded row y `paddedWidth`*y
+# bits up, and an anchor is numbered the same way, bit (anchorY+padding)*paddedWidth +
+# anchorX+padding. Shifting the packed board right by each cell's offset in the piece's box
+# and ORing gives every anchor the piece collides at in a few operations, the rest are the
+# free anchors of that rotation. A move is then a shift of a whole set of anchors: one bit
+# right, one bit left, a row down, or a kick's offset into the rotated piece's free anchors,
+# so the search floods sets of anchors instead of visiting them one by one.
+#
+
+
+padding = 4
+paddedWidth = 10+2*padding
+paddedHeight = 20+2*padding
+wallMask = ((1 << padding)-1) | (((1 << padding)-1) << (10+padding))
+solidRow = (1 << paddedWidth)-1
+
+
+class Placement(NamedTuple):
+	metaId :int
+	anchorX :int
+	anchorY :int
+	usedHold :bool
+	path :tuple[Inputs, ...]
+
+
+# metaId -> offsets of the piece's cells from its anchor in the packed board, box row r and column c is r*`paddedWidth`+c
+metaIdToCellShifts :dict[int, tuple[int, ...]] = {
+	metaID: tuple(paddedWidth*((15-bit)//4) + (15-bit)%4 for bit in activeBits) for metaID, activeBits in Game.metaIdToActiveBits.items()
+}
+
+# metaId -> the piece's cells at the packed board's anchor 0
+metaIdToCells :dict[int, int] = {metaID: sum(1 << shift for shift in shifts) for metaID, shifts in metaIdToCellShifts.items()}
+
+# metaId -> list of (input, rotated metaId, kicks as anchor offsets in the packed board) taken from `Game.kickTests`, in
+# test order
+metaIdToRotations :dict[int, list] = {}
+# metaId -> the metaIds rotating it can reach, itself first
+metaIdToFamily :dict[int, tuple[int, ...]] = {}
+for metaID, typeAndRot in Game.metaIdToTypeAndRot.items():
+	pieceType, pieceRot = typeAndRot
+	metaIdToRotations[metaID] = []
+	metaIdToFamily[metaID] = (metaID,)
+	if pieceType == "O":
+		continue
+	metaIdToFamily[metaID] = tuple(dict.fromkeys((metaID, *Game.typeAndRotToMeta[pieceType].values())))
+	for dir, input in ((1, Inputs.rotateCW), (-1, Inputs.rotateCCW)):
+		newRot = Game.nextRotation[(pieceRot, dir)]
+		kicks = tuple(-yKick*paddedWidth + xKick for xKick, yKick in Game.kickTests[(pieceRot, newRot, pieceType=="I")])
+		metaIdToRotations[metaID].append((input, Game.typeAndRotToMeta[pieceType][newRot], kicks))
+
+
+# anchors of each column and row of the packed board
+columnMasks = [sum(1 << (paddedWidth*y + x) for y in range(paddedHeight)) for x in range(paddedWidth)]
+rowMasks = [((1 << paddedWidth)-1) << paddedWidth*y for y in range(paddedHeight)]
+
+
+def paddedBoard(game :Game) -> list[int]:
+	return [solidRow]*padding + [(row << padding) | wallMask for row in game.bitBoard] + [solidRow]*padding
+
+def packBoard(board :list[int]) -> int:
+	"The padded {board}'s rows packed into one int, with the rows a piece's box can reach below it solid"
+	packed = ((1 << 3*paddedWidth) - 1) << paddedWidth*paddedHeight
+	for y, row in enumerate(board):
+		packed |= row << (paddedWidth*y)
+	return packed
+
+def freeAnchors(packed :int, metaID :int) -> int:
+	"Anchors of the {packed} board that {metaID} does not collide at"
+	collisions = 0
+	for shift in metaIdToCellShifts[metaID]:
+		collisions |= packed >> shift
+	return ((1 << paddedWidth*paddedHeight) - 1) & ~collisions
+
+def fillDown(anchors :int, free :int) -> int:
+	"{anchors} and every anchor of {free} straight below one of them with only free anchors between"
+	for step in (paddedWidth, 2*paddedWidth, 4*paddedWidth, 8*paddedWidth, 16*paddedWidth):
+		anchors |= free & (anchors << step)
+		free &= free << step
+	return anchors
+
+def fillRow(anchors :int, free :int) -> int:
+	"""
+	{anchors} and every anchor of {free} left or right of one of them with only free anchors between. Only the
+	anchors of columns 1 to 13 can be free, none of a row runs into the next	"""
+	left = right = anchors
+	freeLeft = freeRight = free
+	for step in (1, 2, 4, 8):
+		left |= freeLeft & (left >> step)
+		freeLeft &= freeLeft >> step
+		right |= freeRight & (right << step)
+		freeRight &= freeRight << step
+	return left | right
+
+def rotate(anchors :int, free :int, kicks :tuple[int, ...]) -> int:
+	"Where {anchors} end up rotated into the {free} anchors of the new rotation, each taking the first kick that fits"
+	out = 0
+	for kick in kicks:
+		fits = anchors & (free >> kick if kick >= 0 else free << -kick)
+		if fits:
+			out |= fits << kick if kick >= 0 else fits >> -kick
+			anchors ^= fits
+			if not anchors:
+				break
+	return out
+
+def generatePlacementsForPiece(game :Game, metaID :int, anchorX :int, anchorY :int, prefix :tuple = (), usedHold :bool = False, packed :int | None = None) -> list[Placement]:
+	"""
+	Every resting placement reachable from the given anchor by shifts, rotations (with SRS kicks) and soft
+	drops, so every tuck and kicked spin is found. The anchors reached are flooded in layers, each layer what
+	one soft drop of any length, one shift of any length along the row, or one rotation takes the last one's new
+	anchors to, and a placement's path is rebuilt by stepping back through the layers. Gravity is not modelled,
+	paths assume inputs are applied faster than the piece falls. Placements are deduplicated by the cells they
+	cover, keeping the one found in the earliest layer. {packed} is `packBoard` of the game's board, worked out
+	when None	"""
+	if packed is None:
+		packed = packBoard(paddedBoard(game))
+	free = {rotation: freeAnchors(packed, rotation) for rotation in metaIdToFamily[metaID]}
+	start = 1 << ((anchorY+padding)*paddedWidth + anchorX+padding)
+	if not free[metaID] & start:
+		return []
+
+	# layers[i] = metaId -> anchors first reached in layer i
+	layers = [{metaID: start}]
+	reached = dict.fromkeys(free, 0)
+	reached[metaID] = start
+	while layers[-1]:
+		found = dict.fromkeys(free, 0)
+		for rotation, anchors in layers[-1].items():
+			found[rotation] |= fillDown(anchors, free[rotation]) | fillRow(anchors, free[rotation])
+			for input, newMetaID, kicks in metaIdToRotations[rotation]:
+				found[newMetaID] |= rotate(anchors, free[newMetaID], kicks)
+		layer = {}
+		for rotation, anchors in found.items():
+			anchors &= ~reached[rotation]
+			if anchors:
+				reached[rotation] |= anchors
+				layer[rotation] = anchors
+		layers.append(layer)
+
+	out = []
+	covered = set()
+	paths = {(metaID, start): prefix}
+	for depth, layer in enumerate(layers):
+		for rotation, anchors in layer.items():
+			# anchors the piece cannot drop from
+			resting = anchors & ~(free[rotation] >> paddedWidth)
+			cells = metaIdToCells[rotation]
+			while resting:
+				bit = resting & -resting
+				resting ^= bit
+				# the cells covered as the key so rotations covering the same cells count once
+				key = cells << (bit.bit_length()-1)
+				if key in covered:
+					continue
+				covered.add(key)
+				path = prefix
+				if depth:
+					rotated, previous, inputs = stepBack(layers[depth-1], free, rotation, bit)
+					# the hard drop makes the last soft drops
+					path = pathTo(layers, free, paths, depth-1, rotated, previous) + (inputs if inputs[0] != Inputs.softDrop else ())
+				anchor = bit.bit_length()-1
+				out.append(Placement(rotation, anchor%paddedWidth - padding, anchor//paddedWidth - padding, usedHold, path + (Inputs.hardDrop,)))
+	return out
+
+def rotatedFrom(layer :dict[int, int], free :dict[int, int], metaID :int, bit :int) -> tuple[int, int, tuple[Inputs, ...]]:
+	"(metaId, anchor bit, rotation input) of an anchor of {layer} that rotating takes to the {bit} anchor of {metaID}"
+	for rotation, anchors in layer.items():
+		for input, newMetaID, kicks in metaIdToRotations[rotation]:
+			if newMetaID != metaID:
+				continue
+			for kick in kicks:
+				previous = bit >> kick if kick >= 0 else bit << -kick
+				if previous & anchors and rotate(previous, free[metaID], kicks) == bit:
+					return rotation, previous, (input,)
+	raise ValueError("no anchor rotates there")
+
+def stepBack(layer :dict[int, int], free :dict[int, int], metaID :int, bit :int) -> tuple[int, int, tuple[Inputs, ...]]:
+	"""
+	(metaId, anchor bit, inputs) of an anchor of {layer} that one soft drop, shift or rotation takes to the {bit}
+	anchor of {metaID}. Only the closest anchor above, left and right of it can reach it by dropping or shifting, any
+	one further away would have to pass that one	"""
+	anchors = layer.get(metaID, 0)
+	if anchors:
+		freeHere = free[metaID]
+		anchor = bit.bit_length()-1
+		column = columnMasks[anchor%paddedWidth]
+		above = anchors & column & (bit-1)
+		if above:
+			previous = 1 << (above.bit_length()-1)
+			between = column & ((bit << 1) - previous)
+			if freeHere & between == between:
+				return metaID, previous, (Inputs.softDrop,)*((bit.bit_length() - above.bit_length())//paddedWidth)
+		row = rowMasks[anchor//paddedWidth]
+		left = anchors & row & (bit-1)
+		if left:
+			previous = 1 << (left.bit_length()-1)
+			between = (bit << 1) - previous
+			if freeHere & between == between:
+				return metaID, previous, (Inputs.right,)*(bit.bit_length() - left.bit_length())
+		right = anchors & row & ~((bit << 1) - 1)
+		if right:
+			previous = right & -right
+			between = (previous << 1) - bit
+			if freeHere & between == between:
+				return metaID, previous, (Inputs.left,)*(previous.bit_length() - bit.bit_length())
+	return rotatedFrom(layer, free, metaID, bit)
+
+def pathTo(layers :list[dict[int, int]], free :dict[int, int], paths :dict[tuple[int, int], tuple], depth :int, metaID :int, bit :int) -> tuple[Inputs, ...]:
+	"""
+	Inputs from the start of the search to the {bit} anchor of {metaID} first reached in layer {depth} of
+	`generatePlacementsForPiece`, {paths} keeps those already worked out	"""
+	path = paths.get((metaID, bit))
+	if path is None:
+		rotation, previous, inputs = stepBack(layers[depth-1], free, metaID, bit)
+		path = pathTo(layers, free, paths, depth-1, rotation, previous) + inputs
+		paths[(metaID, bit)] = path
+	return path
+
+def generatePlacements(game :Game, includeHold :bool = True) -> list[Placement]:
+	"""
+	Every reachable resting placement of the active piece from its current position, plus those of the piece
+	that holding would bring in (held piece, or the first of the next list) when holding is allowed	"""
+	packed = packBoard(paddedBoard(game))
+	placements = generatePlacementsForPiece(game, game.activePiece, game.anchorX, game.anchorY, packed=packed)
+	if includeHold and game.canHoldPiece:
+		swapped = game.heldPiece if game.heldPiece != 0 else game.nextList[0]
+		placements += generatePlacementsForPiece(game, swapped, 3, -1, (Inputs.hold,), True, packed)
+	return placements
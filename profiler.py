@@ -0,0 +1,91 @@
+"""
+Per-stage timing of the main loop
+
+Stages are timed with `with profiler.stage("name"):` around each step of a frame, and may
+nest. The debug overlay shows the rolling median and 99th percentile of each, and with
+tracing on every timed stage is also kept as an event of a Chrome trace (chrome://tracing,
+https://ui.perfetto.dev), see `traceBytes`. While neither is on `stage` hands
+back one shared no-op context, so the instrumentation left in the loop costs next to nothing.
+"""
+import json, time
+from collections import deque
+
+
+class NullStage:
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+nullStage = NullStage()
+
+
+class Stage:
+	__slots__ = ('profiler', 'name', 'start')
+
+	def __init__(self, profiler :"Profiler", name :str):
+		self.profiler = profiler
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		self.profiler.record(self.name, self.start, time.perf_counter())
+		return False
+
+
+class Profiler:
+	historySize = 240
+	# about 20 minutes of a fully instrumented 60 fps loop, the oldest events are dropped after that
+	maxTraceEvents = 10**6
+
+	def __init__(self) -> None:
+		self.enabled = False
+		self.tracing = False
+		self.origin = time.perf_counter()
+		# stage -> its last {historySize} durations in seconds, in the order the stages were first seen
+		self.durations :dict[str, deque[float]] = {}
+		# (stage, start, end) in perf_counter seconds
+		self.events :deque[tuple[str, float, float]] = deque(maxlen=self.maxTraceEvents)
+
+	def setEnabled(self, showing :bool):
+		"Times stages while their statistics are {showing} or a trace is being recorded"
+		self.enabled = showing or self.tracing
+
+	def startTrace(self):
+		self.tracing = True
+		self.enabled = True
+
+	def stage(self, name :str):
+		return Stage(self, name) if self.enabled else nullStage
+
+	def record(self, name :str, start :float, end :float):
+		history = self.durations.get(name)
+		if history is None:
+			history = self.durations[name] = deque(maxlen=self.historySize)
+		history.append(end-start)
+		if self.tracing:
+			self.events.append((name, start, end))
+
+	def percentiles(self) -> list[tuple[str, float, float]]:
+		"(stage, p50, p99) in seconds over each stage's recent durations"
+		result = []
+		for name, history in self.durations.items():
+			ordered = sorted(history)
+			result.append((name, ordered[len(ordered)//2], ordered[min(len(ordered)-1, int(len(ordered)*0.99))]))
+		return result
+
+	def traceBytes(self) -> bytes:
+		"The recorded events in the Chrome trace event format, complete ('X') events in microseconds"
+		# copied in one go, the loop keeps recording while this is serialised on another thread
+		events = list(self.events)
+		return json.dumps({
+			'traceEvents': [
+				{'name': name, 'ph': 'X', 'ts': round((start-self.origin)*1e6, 1), 'dur': round((end-start)*1e6, 1), 'pid': 1, 'tid': 1}
+				for name, start, end in events
+			],
+			'displayTimeUnit': 'ms',
+		}).encode()
@@ -0,0 +1,160 @@
+"""
+Persistent high score store
+
+Every finished game is appended as one JSON line to the log and never rewritten. The best
+`topN` scores are kept sorted in memory and mirrored to a small index file next to the log,
+together with how far into the log they cover, so opening the store reads the index and only
+the lines appended after it was written (normally none), recording a game is an append plus
+an insertion into the top list, and the leaderboard is read straight off it. A missing or
+unreadable index is rebuilt from the log.
+
+Given a `BackgroundWriter`, `record` updates the in-memory top list at once and leaves the
+append and the index rewrite to the writer thread, the index is always replaced atomically.
+
+	python scoreStore.py --import logs/gamelogs.yaml
+
+copies the games of an old YAML log into the store, `Controller` does this on its own the
+first time it runs without a store.
+"""
+import argparse, bisect, json, os
+from typing import Callable
+from backgroundWriter import BackgroundWriter, atomicWrite
+
+
+class ScoreStore:
+	indexVersion = 1
+
+	def __init__(self, path :str, topN :int = 100, writer :BackgroundWriter | None = None):
+		"{path} is the log, the index lives next to it in {path}.idx. Without a {writer} `record` writes before returning"
+		self.path = path
+		self.writer = writer
+		self.indexPath = path+'.idx'
+		self.topN = topN
+		# (-score, sequence number, initials), ascending so bisect keeps the best score first and ties in game order
+		self.top :list[tuple[int, int, str]] = []
+		self.count = 0
+		self.logSize = 0
+
+		os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+		if not self.loadIndex():
+			self.top, self.count, self.logSize = [], 0, 0
+		self.readLog(self.logSize)
+
+	def loadIndex(self) -> bool:
+		try:
+			with open(self.indexPath, 'r') as f:
+				index = json.load(f)
+			if index['version'] != self.indexVersion or index['topN'] != self.topN or index['logSize'] > os.path.getsize(self.path):
+				return False
+			self.top = [tuple(entry) for entry in index['top']]
+			self.count = index['count']
+			self.logSize = index['logSize']
+			return True
+		except (OSError, ValueError, KeyError):
+			return False
+
+	def writeIndex(self, top :list | None = None, count :int | None = None):
+		"Replaces the index with {top} and {count} (the current ones by default), which must cover exactly the log up to `logSize`"
+		top = self.top if top is None else top
+		count = self.count if count is None else count
+		atomicWrite(self.indexPath, json.dumps({'version': self.indexVersion, 'topN': self.topN, 'count': count, 'logSize': self.logSize, 'top': top}).encode())
+
+	def readLog(self, offset :int):
+		"Indexes every game in the log from byte {offset} on, the ones appended after the index was last written"
+		if not os.path.exists(self.path):
+			return
+		with open(self.path, 'rb') as f:
+			f.seek(offset)
+			for line in f:
+				if not line.endswith(b'\n'):
+					# torn write from a crash, the next append starts a fresh line after it
+					break
+				self.logSize += len(line)
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					# the remains of a torn write that later games were appended after
+					continue
+				self.insert(entry['Score'], entry['Initials'])
+		if offset != self.logSize:
+			self.writeIndex()
+
+	def insert(self, score :int, initials :str) -> int | None:
+		"Adds a score to the count and the top list, returns its rank or None when it did not make the list"
+		key = (-score, self.count, initials)
+		self.count += 1
+		rank = bisect.bisect(self.top, key)
+		if rank >= self.topN:
+			return None
+		self.top.insert(rank, key)
+		del self.top[self.topN:]
+		return rank
+
+	def record(self, entry :dict, onSaved :Callable[[], None] | None = None) -> int | None:
+		"""
+		Adds a finished game, a dict with at least 'Score' and 'Initials' (see `Controller` for the rest), and
+		returns its rank on the leaderboard, None when it is not in the top {self.topN}. The leaderboard has it
+		right away, {onSaved} is called once it is on disk (from `BackgroundWriter.poll` when there is a writer)	"""
+		line = (json.dumps(entry)+'\n').encode()
+		rank = self.insert(entry['Score'], entry['Initials'])
+		# the index written with this game must not mention games recorded after it, their lines are not in the log yet
+		top, count = list(self.top), self.count
+		def write():
+			self.append(line)
+			self.writeIndex(top, count)
+		if self.writer is None:
+			write()
+			if onSaved is not None:
+				onSaved()
+		else:
+			self.writer.submit(write, onSaved)
+		return rank
+
+	def append(self, line :bytes):
+		with open(self.path, 'ab') as f:
+			if f.tell() != self.logSize:
+				# something (a torn line, see readLog) sits past what is indexed, keep this game on its own line
+				line = b'\n'+line
+			f.write(line)
+			f.flush()
+			os.fsync(f.fileno())
+			self.logSize = f.tell()
+
+	def leaderboard(self, count :int | None = None) -> list[tuple[str, int]]:
+		"(initials, score) of the best games, best first"
+		return [(initials, -negScore) for negScore, sequence, initials in self.top[:count]]
+
+	def __len__(self) -> int:
+		return self.count
+
+
+def importYaml(store :ScoreStore, yamlPath :str) -> int:
+	"Appends every game of an old `gamelogs.yaml` to the store in file order, returns how many. Call it with no writes pending"
+	import yaml
+	with open(yamlPath, 'r') as f:
+		games :dict = yaml.safe_load(f) or {}
+	# one append and one index write for the lot, recording them one by one would flush the disk per game
+	lines = []
+	for id, game in games.items():
+		entry = {'Game': str(id), **game}
+		lines.append((json.dumps(entry)+'\n').encode())
+		store.insert(entry['Score'], entry['Initials'])
+	if lines:
+		store.append(b''.join(lines))
+		store.writeIndex()
+	return len(games)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="High score store maintenance")
+	parser.add_argument("--store", default="./logs/scores.jsonl")
+	parser.add_argument("--import", dest="yamlPath", metavar="YAML", help="append the games of an old YAML game log")
+	parser.add_argument("--top", type=int, default=10, help="print this many of the best scores")
+	args = parser.parse_args()
+
+	store = ScoreStore(args.store)
+	if args.yamlPath:
+		print(f"imported {importYaml(store, args.yamlPath)} games from {args.yamlPath}")
+	print(f"{len(store)} games in {args.store}")
+	for i, (initials, score) in enumerate(store.leaderboard(args.top)):
+		print(f"{i+1:3}. {initials:3} {score:8}")
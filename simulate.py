@@ -0,0 +1,140 @@
+"""
+Headless bulk simulation: plays many bot-driven games across a process pool
+
+	python simulate.py --games 10000 --workers 8 --policy greedy --easy
+
+Each game is fully determined by its seed, seeds are sharded over the workers and
+every finished game is streamed out as one JSON line, so results (and their summary)
+are the same whatever the worker count, only the order of the lines changes.
+"""
+import argparse, importlib, json, multiprocessing, os, random, sys, time
+from typing import Callable
+from game import Game, GameStates, Inputs
+from inputLog import InputLog
+from moveGen import Placement, generatePlacements
+from bot import beamPolicy
+
+
+# a policy looks at the game and returns the inputs to apply for its current piece,
+# rng is seeded per game so policies that roll dice stay reproducible
+Policy = Callable[[Game, random.Random], list[Inputs]]
+
+
+def randomPolicy(game :Game, rng :random.Random) -> list[Inputs]:
+	"Any legal placement, hold included"
+	return list(rng.choice(generatePlacements(game)).path)
+
+def landingScore(game :Game, placement :Placement) -> int:
+	"Higher is better: the piece's lowest row, minus the empty cells it leaves covered right under it"
+	minX, maxX, minY, maxY = game.metaIdToXYBounds[placement.metaId]
+	cells = [((15-bit)%4, (15-bit)//4) for bit in game.metaIdToActiveBits[placement.metaId]]
+	covered = 0
+	for x, y in cells:
+		if (x, y+1) in cells:
+			continue
+		below = placement.anchorY+y+1
+		while below < 20 and not (game.bitBoard[below] >> (placement.anchorX+x)) & 1:
+			covered += 1
+			below += 1
+	return 4*(placement.anchorY+maxY) - covered
+
+def greedyPolicy(game :Game, rng :random.Random) -> list[Inputs]:
+	"Lowest landing spot that covers the fewest holes, ties broken at random"
+	return list(max(generatePlacements(game), key=lambda p: (landingScore(game, p), rng.random())).path)
+
+policies :dict[str, Policy] = {
+	"random": randomPolicy,
+	"greedy": greedyPolicy,
+	"beam": beamPolicy,
+}
+
+def resolvePolicy(name :str) -> Policy:
+	"A name from `policies`, or 'module:function' for a policy defined elsewhere"
+	if name in policies:
+		return policies[name]
+	moduleName, sep, functionName = name.partition(':')
+	if not sep:
+		raise ValueError(f"Unknown policy '{name}', expected one of {list(policies)} or 'module:function'")
+	return getattr(importlib.import_module(moduleName), functionName)
+
+
+def playGame(seed :int, policyName :str, easyMode :bool, maxPieces :int, recordDir :str | None = None) -> dict:
+	"Plays one game to game over (or {maxPieces}) and returns its summary, optionally saving its input log"
+	policy = resolvePolicy(policyName)
+	rng = random.Random(-1-seed)
+	pieces = [0]
+	def onPiecePlaced():
+		pieces[0] += 1
+
+	start = time.process_time()
+	game = Game(easyMode, onPiecePlaced=onPiecePlaced, seed=seed)
+	# bots have no frames, inputs are keyed by the number of pieces placed so far instead
+	log = InputLog.forGame(game)
+	while game.state != GameStates.initialsInput and pieces[0] < maxPieces:
+		placedBefore = pieces[0]
+		for input in policy(game, rng):
+			log.apply(game, placedBefore, input)
+			if pieces[0] != placedBefore or game.state == GameStates.initialsInput:
+				break
+		else:
+			# the policy did not lock its piece, drop it where it is so the game moves on
+			log.apply(game, placedBefore, Inputs.hardDrop)
+	if recordDir is not None:
+		log.finish(game)
+		log.save(os.path.join(recordDir, f"{policyName.replace(':', '.')}-{seed}.tlog"))
+
+	return {
+		"seed": seed,
+		"pieces": pieces[0],
+		"lines": game.totalLines,
+		"score": game.score,
+		"level": game.totalLines//10,
+		"toppedOut": game.state == GameStates.initialsInput,
+		"droughtCounter": game.droughtCounter,
+		"cpuSeconds": time.process_time()-start,
+	}
+
+def playShard(args :tuple) -> list[dict]:
+	seeds, policyName, easyMode, maxPieces, recordDir = args
+	return [playGame(seed, policyName, easyMode, maxPieces, recordDir) for seed in seeds]
+
+
+def main(argv :list[str] | None = None):
+	parser = argparse.ArgumentParser(description="Run headless bot games in bulk")
+	parser.add_argument("--games", type=int, default=1000)
+	parser.add_argument("--seed", type=int, default=0, help="first seed, games use seeds seed..seed+games-1")
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	parser.add_argument("--shard-size", type=int, default=8, help="games handed to a worker at a time")
+	parser.add_argument("--policy", default="greedy", help=f"one of {list(policies)} or 'module:function'")
+	parser.add_argument("--easy", action="store_true", help="easy mode, the drought logic in Game.addNextPiece")
+	parser.add_argument("--max-pieces", type=int, default=1000)
+	parser.add_argument("--out", help="file for the per game JSON lines, stdout by default")
+	parser.add_argument("--record", metavar="DIR", help="save every game's input log in DIR, see inputLog.py")
+	args = parser.parse_args(argv)
+	resolvePolicy(args.policy) # fail before starting any worker
+
+	seeds = list(range(args.seed, args.seed+args.games))
+	shards = [(seeds[i:i+args.shard_size], args.policy, args.easy, args.max_pieces, args.record) for i in range(0, len(seeds), args.shard_size)]
+	out = open(args.out, 'w') if args.out else sys.stdout
+
+	results = []
+	start = time.perf_counter()
+	with multiprocessing.Pool(args.workers) as pool:
+		for shard in pool.imap_unordered(playShard, shards):
+			for result in shard:
+				out.write(json.dumps(result)+"\n")
+			out.flush()
+			results += shard
+	wallSeconds = time.perf_counter()-start
+	if args.out:
+		out.close()
+
+	pieces = sum(r["pieces"] for r in results)
+	cpuSeconds = sum(r["cpuSeconds"] for r in results)
+	print(f"{len(results)} games, {pieces} pieces, {sum(r['lines'] for r in results)} lines, {sum(r['toppedOut'] for r in results)} topped out", file=sys.stderr)
+	print(f"mean score {sum(r['score'] for r in results)/max(1, len(results)):.1f}, longest drought at game end {max((max(r['droughtCounter'].values()) for r in results), default=0)}", file=sys.stderr)
+	print(f"{pieces/wallSeconds:,.0f} pieces/sec over {args.workers} workers, {pieces/max(cpuSeconds, 1e-9):,.0f} pieces/sec per core", file=sys.stderr)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,190 @@
+"""
+Fixed rate simulation clock, and the input timeline
+
+Gravity counts ticks of 1/60 s instead of rendered frames. Key presses and releases come in with the time they
+happened on the game clock (`keyDown`, `keyUp`), and auto-repeat runs in seconds from the press: DAS, the delay
+before a held key starts repeating, and ARR, how often it repeats after, 0 shifting all the way at once. Every frame
+hands `Ticker.advance` the time that passed, and it applies everything that happened in it in time order, gravity
+ticks included, so a press between two frames keeps its place among the ticks, a long frame loses no repeats, and
+the game plays the same at any frame rate. Sources that only know which inputs are held each frame hand that to
+`advance` instead, their presses and releases are put at the start of the frame.
+"""
+import heapq, math, time
+from collections import deque
+from typing import Callable
+from game import Game, GameStates, Inputs
+
+
+class Ticker:
+	ticksPerSecond = 60
+	# default DAS and ARR, in seconds
+	das = 16/60
+	arr = 4/60
+	# inputs that repeat while held, applied in this order when they come due together
+	repeatable = (Inputs.left, Inputs.right, Inputs.rotateCCW, Inputs.rotateCW, Inputs.softDrop, Inputs.hardDrop)
+	# with an ARR of 0 these go as far as the piece can once their DAS is up, and keep it there while held (soft drop
+	# without locking), the others do not repeat
+	instant = {Inputs.left: (-1, 0), Inputs.right: (1, 0), Inputs.softDrop: (0, 1)}
+	opposite = {Inputs.left: Inputs.right, Inputs.right: Inputs.left}
+	# ticks between gravity steps for levels 0 to 29, 29 and above share the last speed
+	gravityByLevel = (48, 43, 38, 33, 28, 23, 18, 13, 8, 6, 5, 5, 5, 4, 4, 4, 3, 3, 3, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1)
+	latencyHistory = 600
+
+	def __init__(self, game :Game, apply :Callable[[int, Inputs], None] | None = None, das :float | None = None, arr :float | None = None, latencies :deque[float] | None = None):
+		"""
+		{apply} applies an input to the game on the given tick, pass `InputLog.apply` (bound to the game) to
+		record them, `Game.applyInput` is used when none is given. {das} and {arr} are in seconds, the class'
+		defaults when None. Seconds from a timestamped key event to the game changing from it are kept in
+		{latencies}, a new deque of the last `latencyHistory` when none is given	"""
+		self.game = game
+		self.apply = apply if apply is not None else lambda tick, input: game.applyInput(input)
+		self.das = self.das if das is None else das
+		self.arr = self.arr if arr is None else arr
+		self.latencies = latencies if latencies is not None else deque(maxlen=self.latencyHistory)
+		# stamps of the key events that changed the game, until whoever shows the game takes them
+		self.applied :list[float] = []
+		self.elapsed = 0.0
+		self.elapsedError = 0.0
+		self.tick = 0
+		# tick gravity counts from, manual drops and holds restart the count
+		self.gravityFrom = 0
+		# held repeatable input -> game time of its next repeat, inf once it is charged (see `instant`)
+		self.held :dict[Inputs, float] = {}
+		self.charged :list[Inputs] = []
+		# (game time, arrival order, input, down, perf_counter stamp) of key events not applied yet, a heap
+		self.events :list[tuple[float, int, Inputs, bool, float | None]] = []
+		self.arrivals = 0
+
+	def gravityTicks(self) -> int:
+		return self.gravityByLevel[min(self.game.totalLines//10, 29)]
+
+	def tickOf(self, at :float) -> int:
+		"The tick something happening at game time {at} comes before, one that happens right on a tick comes after it"
+		return math.floor(at*self.ticksPerSecond + 1e-6)+1
+
+	def keyDown(self, input :Inputs, at :float | None = None, stamp :float | None = None):
+		"""
+		{input}'s key went down at game time {at}, the start of the next `advance` when None. Inputs that do not
+		repeat (hold) fire once. {stamp} is the `time.perf_counter` the event was seen at, if known	"""
+		# rounded to the nanosecond, so times that are the same at any frame rate compare equal
+		at = round(self.elapsed if at is None else max(at, self.elapsed), 9)
+		heapq.heappush(self.events, (at, self.arrivals, input, True, stamp))
+		self.arrivals += 1
+
+	def keyUp(self, input :Inputs, at :float | None = None):
+		at = round(self.elapsed if at is None else max(at, self.elapsed), 9)
+		heapq.heappush(self.events, (at, self.arrivals, input, False, None))
+		self.arrivals += 1
+
+	def press(self, input :Inputs, at :float | None = None, stamp :float | None = None):
+		"A one-shot input (hold), see `keyDown`"
+		self.keyDown(input, at, stamp)
+
+	def follow(self, held :set[Inputs] | frozenset, at :float):
+		"Presses and releases the repeatable inputs whose held state differs from {held}, at {at}"
+		for input in self.repeatable:
+			if input in held and input not in self.held:
+				self.keyDown(input, at)
+			elif input not in held and input in self.held:
+				self.keyUp(input, at)
+
+	def advance(self, dt :float, held :set[Inputs] | frozenset | None = None) -> int:
+		"""
+		Moves the clock {dt} seconds forward and applies the key events, repeats and ticks that happened in that
+		time, in order. {held}, when given, are the repeatable inputs held down over the frame, see `follow`.
+		Returns the number of ticks run	"""
+		if held is not None:
+			self.follow(held, self.elapsed)
+		# compensated (Kahan) sum, a plain sum of thousands of small frame times drifts enough to push a tick into the next frame
+		y = dt-self.elapsedError
+		total = self.elapsed+y
+		self.elapsedError = (total-self.elapsed)-y
+		self.elapsed = total
+		# a frame ending right on a tick must run it even when the sum lands a hair short of it
+		due = math.floor(self.elapsed*self.ticksPerSecond + 1e-6)
+		now = round(self.elapsed, 9)
+		ran = 0
+		while self.game.state == GameStates.playing:
+			at, input, isEvent = self.nextUp()
+			if at <= now and self.tickOf(at) <= self.tick+1:
+				self.happen(at, input, isEvent)
+			elif self.tick < due:
+				self.step()
+				ran += 1
+			elif at <= now:
+				# after the frame's last tick, applied now rather than a frame late
+				self.happen(at, input, isEvent)
+			else:
+				break
+		self.tick = max(self.tick, due)
+		return ran
+
+	def nextUp(self) -> tuple[float, Inputs | None, bool]:
+		"(game time, input, is a key event) of the next key event or repeat, (inf, None, False) when there is none"
+		at, next, isEvent = math.inf, None, False
+		if self.events:
+			at, next, isEvent = self.events[0][0], self.events[0][2], True
+		for input in self.repeatable:
+			if self.held.get(input, math.inf) < at:
+				at, next, isEvent = self.held[input], input, False
+		return at, next, isEvent
+
+	def happen(self, at :float, input :Inputs, isEvent :bool):
+		"Applies the key event or repeat due at {at}"
+		tick = self.tick+1
+		if not isEvent:
+			if input in self.instant and self.arr == 0:
+				self.held[input] = math.inf
+				self.charge(input)
+			else:
+				self.held[input] = round(at+self.arr, 9) if self.arr > 0 else math.inf
+				self.fire(tick, input)
+			self.shift(tick)
+			return
+
+		at, arrival, input, down, stamp = heapq.heappop(self.events)
+		if not down:
+			self.held.pop(input, None)
+			if input in self.charged:
+				self.charged.remove(input)
+			return
+		if input in self.repeatable:
+			if input in self.held:
+				return
+			self.held[input] = round(at+self.das, 9)
+		before = self.game.zobrist
+		self.fire(tick, input)
+		if stamp is not None and self.game.zobrist != before:
+			self.latencies.append(time.perf_counter()-stamp)
+			self.applied.append(stamp)
+		self.shift(tick)
+
+	def fire(self, tick :int, input :Inputs):
+		if self.game.state != GameStates.playing:
+			return
+		self.apply(tick, input)
+		if input in (Inputs.softDrop, Inputs.hardDrop, Inputs.hold):
+			self.gravityFrom = tick
+
+	def charge(self, input :Inputs):
+		"Starts shifting {input} all the way, a direction cancels the other one's charge"
+		opposite = self.opposite.get(input)
+		if opposite in self.charged:
+			self.charged.remove(opposite)
+		self.charged.append(input)
+
+	def shift(self, tick :int):
+		"Moves the piece as far as the charged inputs go, after everything that could have let it move further"
+		game = self.game
+		for input in self.charged:
+			dx, dy = self.instant[input]
+			while game.state == GameStates.playing and not game.checkPieceCollision(game.anchorX+dx, game.anchorY+dy, game.activePiece):
+				self.fire(tick, input)
+
+	def step(self):
+		"Runs one tick of gravity"
+		self.tick += 1
+		tick = self.tick
+		if tick != self.gravityFrom and (tick-self.gravityFrom)%self.gravityTicks() == 0 and self.game.state == GameStates.playing:
+			self.apply(tick, Inputs.gravity)
+			self.shift(tick)
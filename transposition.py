@@ -0,0 +1,61 @@
+"""
+Bounded transposition table: what a search already worked out about a state, keyed by the state's Zobrist hash
+(see `Game.zobrist`), so a state reached again through another move order is looked up instead of evaluated again
+"""
+from typing import Any
+
+
+class TranspositionTable:
+	"""
+	2**{bits} slots in buckets of two, a hash can only be in the bucket its low bits pick. A new entry goes into the
+	slot already holding its hash, else an empty one, else over the one least recently used, counted in searches
+	(see `newSearch`), the second slot when both were used in the same search. Entries the current search keeps
+	hitting so stay, those of searches long gone make room	"""
+	def __init__(self, bits :int = 16) -> None:
+		self.size = 1 << bits
+		self.bucketMask = (self.size-1) & ~1
+		# 0 marks an empty slot, a state hashing to 0 is simply never stored
+		self.keys = [0]*self.size
+		self.values :list[Any] = [None]*self.size
+		# the search each slot was last stored or hit in
+		self.used = [0]*self.size
+		self.search = 0
+		self.probes = self.hits = self.stores = self.replaced = 0
+
+	def newSearch(self):
+		"Starts a new search, entries not used since get replaced first"
+		self.search += 1
+
+	def get(self, key :int) -> Any | None:
+		"The value stored for {key}, None when it is not in the table"
+		self.probes += 1
+		i = key & self.bucketMask
+		if self.keys[i] != key:
+			i += 1
+			if self.keys[i] != key:
+				return None
+		self.hits += 1
+		self.used[i] = self.search
+		return self.values[i]
+
+	def put(self, key :int, value :Any):
+		if not key:
+			return
+		keys, used = self.keys, self.used
+		i = key & self.bucketMask
+		j = i+1
+		if keys[i] == key or (not keys[i] and keys[j] != key):
+			pass
+		elif keys[j] == key or not keys[j]:
+			i = j
+		else:
+			self.replaced += 1
+			if used[j] <= used[i]:
+				i = j
+		self.stores += 1
+		keys[i] = key
+		self.values[i] = value
+		used[i] = self.search
+
+	def hitRate(self) -> float:
+		return self.hits/self.probes if self.probes else 0.0